@@ -1,37 +1,342 @@
-from agno.agent import Agent
-from agno.models.groq import Groq
+import asyncio
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+
+from planner import plan_fast, search_queries
+from routing import MODEL_BASE_URL, MODEL_ID, model_route, recording_search, validate_itinerary
+from sessions import PlanSession, plan_session
+from tools.batch import make_parallel_tool, make_prefetched_search_tool, prefetch_searches, search_key
+from tools.compact import COMPACT_INSTRUCTIONS, PlaceRegistry, expand_itinerary_markdown, make_compact_search_tool
+from tools.http import deadline_scope, time_left
+from tools.llmcache import fingerprint, response_cache
 from tools.olamaps import search_places
 
+# Seconds one plan may take end to end; every search and model call made
+# for it gets only what is left.
+PLAN_DEADLINE = float(os.getenv("PLAN_DEADLINE", "90"))
+
+# Plan simple requests (one cuisine, one or two activities) without the
+# model; FAST_PATH_POLISH lets the model reword those plans afterwards.
+FAST_PATH_PLANNER = os.getenv("FAST_PATH_PLANNER", "1") == "1"
+FAST_PATH_POLISH = os.getenv("FAST_PATH_POLISH", "0") == "1"
+
+POLISH_INSTRUCTIONS = [
+    "Rewrite the descriptions and the summary of the itinerary you are given so they read naturally.",
+    "Keep every '### Name' heading, *address* line and '🕒 Start - End' line exactly as given, in the same order.",
+    "Do not add, remove or rename places. Output only the itinerary Markdown.",
+]
+
+# The system message (description + instructions) carries nothing
+# request-specific, so it is byte-identical across runs and providers with
+# prompt-prefix caching can reuse it; everything per request is in build_prompt.
+DESCRIPTION = "You are an expert local discovery assistant. Your goal is to find the best places for the user based on their preferences, enrich the data, and build a logical itinerary."
+
+INSTRUCTIONS = [
+    "1. **Analyze Preferences**: Understand the user's cuisine, place types, and distance constraints.",
+    "2. **Search Strategy**: Perform searches for EACH selected interest.",
+    "   - **QUERY FORMAT**: You MUST append the location name to the query. Format: `'{Interest} in {Location}'`.",
+    "   - **Example**: If user is in 'Koramangala' and wants 'Italian', search for `'Italian Restaurant in Koramangala'`.",
+    "   - **DO NOT** search for just 'Italian Restaurant'. Context is key.",
+    "   - **USE OLA MAPS**: Call `search_places` with this specific query.",
+    "   - **PROVIDE LOCATION**: You MUST pass the user's `lat` and `lon` to the tool.",
+    "   - **ALL AT ONCE**: Make the `search_places` calls for every interest together in your first turn; they run in parallel.",
+    "3. **Final Selection**: From all results, select the TOP 3 BEST places for EACH user interest.",
+    "   - Example: If user wants 'Italian Restaurant' and 'Parks', you should find 3 Italian restaurants AND 3 parks.",
+    "   - Prioritize highly-rated, well-known places for each category.",
+    "4. **Search Strategy**:",
+    "   - **DISCARD**: Cloud kitchens, corporate offices, or irrelevant places.",
+    "   - **HALLUCINATION CHECK**: You MUST ONLY recommend places returned by the `search_places` tool. DO NOT invent places or addresses.",
+    "5. **Time Allocation**: Assign logical start and end times for each activity (e.g., Lunch at 1:00 PM, Park at 4:00 PM).",
+    "6. **Output Format**: Generate a **Bullet Point Itinerary** in Markdown.",
+    "   - **STRICT FORMATTING**: You MUST follow this exact format for each place so it can be parsed:",
+    "     ### Name of Place",
+    "     *Address of Place*",
+    "     🕒 Start Time - End Time (e.g., 10:00 AM - 12:00 PM)",
+    "     Brief description of why this place fits.",
+    "   - **NO JSON**: Do not output JSON. Use pure Markdown.",
+    "   - End with a '📝 Summary' section."
+]
+
 # Initialize the agent
-def get_agent():
+def get_agent(
+    registry: Optional[PlaceRegistry] = None,
+    search: Callable[[str, float, float], List[Dict]] = search_places,
+    model_id: str = MODEL_ID
+):
+    """
+    Build the planning agent. Passing a PlaceRegistry switches the tool to
+    compact table results; expand the output with expand_itinerary_markdown.
+    search is the lookup behind the tool, e.g. one serving prefetched results.
+    model_id picks the model (see routing.py).
+
+    The model may request several searches per turn; run the agent with
+    arun so they execute concurrently on the tool worker pool. search must
+    therefore be thread-safe.
+    """
+    # The agno/Groq stack takes ~1s to import; defer it until a plan is made.
+    from agno.agent import Agent
+
+    if registry is not None:
+        tools = [make_compact_search_tool(registry, search)]
+    else:
+        tools = [search]
+
     return Agent(
         name="Local Discovery Agent",
-        model=Groq(id="llama-3.1-8b-instant"),
-        tools=[search_places],
-        description="You are an expert local discovery assistant. Your goal is to find the best places for the user based on their preferences, enrich the data, and build a logical itinerary.",
-        instructions=[
-            "1. **Analyze Preferences**: Understand the user's cuisine, place types, and distance constraints.",
-            "2. **Search Strategy**: Perform searches for EACH selected interest.",
-            "   - **QUERY FORMAT**: You MUST append the location name to the query. Format: `'{Interest} in {Location}'`.",
-            "   - **Example**: If user is in 'Koramangala' and wants 'Italian', search for `'Italian Restaurant in Koramangala'`.",
-            "   - **DO NOT** search for just 'Italian Restaurant'. Context is key.",
-            "   - **USE OLA MAPS**: Call `search_places` with this specific query.",
-            "   - **PROVIDE LOCATION**: You MUST pass the user's `lat` and `lon` to the tool.",
-            "3. **Final Selection**: From all results, select the TOP 3 BEST places for EACH user interest.",
-            "   - Example: If user wants 'Italian Restaurant' and 'Parks', you should find 3 Italian restaurants AND 3 parks.",
-            "   - Prioritize highly-rated, well-known places for each category.",
-            "4. **Search Strategy**:",
-            "   - **DISCARD**: Cloud kitchens, corporate offices, or irrelevant places.",
-            "   - **HALLUCINATION CHECK**: You MUST ONLY recommend places returned by the `search_places` tool. DO NOT invent places or addresses.",
-            "5. **Time Allocation**: Assign logical start and end times for each activity (e.g., Lunch at 1:00 PM, Park at 4:00 PM).",
-            "6. **Output Format**: Generate a **Bullet Point Itinerary** in Markdown.",
-            "   - **STRICT FORMATTING**: You MUST follow this exact format for each place so it can be parsed:",
-            "     ### Name of Place",
-            "     *Address of Place*",
-            "     🕒 Start Time - End Time (e.g., 10:00 AM - 12:00 PM)",
-            "     Brief description of why this place fits.",
-            "   - **NO JSON**: Do not output JSON. Use pure Markdown.",
-            "   - End with a '📝 Summary' section."
-        ],
+        model=get_model(model_id, parallel_tool_calls=True),
+        tools=[make_parallel_tool(tool) for tool in tools],
+        description=DESCRIPTION,
+        instructions=agent_instructions(registry is not None),
         markdown=True
     )
+
+def get_model(model_id: str = MODEL_ID, parallel_tool_calls: bool = False):
+    """
+    The Groq model (served from MODEL_BASE_URL if set), with its HTTP
+    timeout cut to what is left of the current deadline. Retries are off
+    then, as they could not finish in time either. parallel_tool_calls lets
+    one reply request several tool calls; only set it for agents that have
+    tools.
+    """
+    from agno.models.groq import Groq
+
+    params = {"request_params": {"parallel_tool_calls": True}} if parallel_tool_calls else {}
+    if MODEL_BASE_URL:
+        params["base_url"] = MODEL_BASE_URL
+    left = time_left()
+    if left is None:
+        return Groq(id=model_id, **params)
+    return Groq(id=model_id, timeout=left, max_retries=0, **params)
+
+def agent_instructions(compact: bool = False) -> List[str]:
+    return INSTRUCTIONS + COMPACT_INSTRUCTIONS if compact else INSTRUCTIONS
+
+def load_agent_stack():
+    """
+    Import the agno/Groq stack now, e.g. from a background warm-up thread.
+    """
+    import agno.agent
+    import agno.models.groq
+
+def build_prompt(area: str, coordinates: str, interests: List[str]) -> str:
+    return (
+        "Plan a perfect outing for me!\n"
+        f"- **Location**: {area} (Coordinates: {coordinates})\n"
+        f"- **Interests**: {', '.join(interests)}\n"
+        "\n"
+        "Please find relevant places, enrich them with details, and create a mini-itinerary."
+    )
+
+def build_revision_prompt(area: str, coordinates: str, interests: List[str], previous: str, added: List[str], removed: List[str]) -> str:
+    """
+    Ask for an edit of the previous itinerary rather than a new one.
+    """
+    changes = []
+    if added:
+        changes.append(f"- **Add**: {', '.join(added)} (search only for these)")
+    if removed:
+        changes.append(f"- **Remove**: every place chosen for {', '.join(removed)}")
+    return (
+        "Update my itinerary for a change in preferences.\n"
+        f"- **Location**: {area} (Coordinates: {coordinates})\n"
+        f"- **Interests**: {', '.join(interests)}\n"
+        + "\n".join(changes) + "\n"
+        "\n"
+        "Keep every other place exactly as it is below, with its address and description; "
+        "only adjust times where the changes require it. Return the full updated itinerary.\n"
+        "\n"
+        "Previous itinerary:\n"
+        f"{previous}"
+    )
+
+def _coordinates(coordinates: str) -> Tuple[float, float]:
+    lat, lon = (float(v.strip()) for v in coordinates.split(","))
+    return lat, lon
+
+def _cache_key(area: str, coordinates: str, interests: List[str], compact: bool, prefetched: Dict, previous: Optional[str] = None) -> str:
+    """
+    Everything that determines the model's answer: model route, system prefix,
+    the prompt with interests in canonical order, the places the searches
+    returned and, for a revision, the itinerary being revised.
+    """
+    canonical = sorted({" ".join(i.lower().split()) for i in interests})
+    prompt = " ".join(build_prompt(area.lower(), coordinates.replace(" ", ""), canonical).split())
+    tool_results = sorted(
+        (list(key), [place.get("place_id") for place in results])
+        for key, results in prefetched.items()
+    )
+    return fingerprint({
+        "model": model_route(),
+        "system": [DESCRIPTION, agent_instructions(compact)],
+        "prompt": prompt,
+        "tools": tool_results,
+        "previous": fingerprint(previous) if previous else None,
+    })
+
+def polish_itinerary(itinerary: str) -> str:
+    """
+    Have the model reword a rules-based itinerary. Falls back to the input
+    if the reply changes, drops or reorders any place or time.
+    """
+    from agno.agent import Agent
+    from utils import parse_markdown_itinerary
+
+    agent = Agent(model=get_model(), instructions=POLISH_INSTRUCTIONS, markdown=True)
+    try:
+        polished = agent.run(itinerary).content or ""
+    except Exception as e:
+        print(f"⚠️ Polish pass failed: {e}")
+        return itinerary
+
+    def skeleton(markdown_text):
+        items, _ = parse_markdown_itinerary(markdown_text)
+        return [(i.get("name"), i.get("start_time"), i.get("end_time")) for i in items]
+
+    if skeleton(polished) != skeleton(itinerary):
+        print("⚠️ Polish pass changed the schedule; keeping the original.")
+        return itinerary
+    return polished
+
+def plan_itinerary(
+    area: str,
+    coordinates: str,
+    interests: List[str],
+    compact: bool = False,
+    fast_path: bool = FAST_PATH_PLANNER,
+    session_id: Optional[str] = None,
+    profile: Optional[str] = None
+) -> str:
+    """
+    Plan one request and return the itinerary markdown.
+
+    The searches the agent is told to make are run up front in one batch.
+    Simple requests are then planned from those results without the model;
+    for the rest the results complete the response-cache key and answer the
+    agent's own tool calls, so a cache miss costs no extra API calls.
+
+    With a session_id, search results per interest and the itinerary are
+    kept between calls: only added interests are searched, and the agent
+    revises the previous itinerary instead of writing a new one. A change
+    of area, profile, compact or fast_path starts the session over.
+
+    profile names the search profile (fast / balanced / thorough) used for
+    every search in this plan; None uses SEARCH_PROFILE.
+
+    The whole plan runs within PLAN_DEADLINE (or the caller's deadline, if
+    tighter): searches and model calls time out instead of queueing up when
+    upstreams are slow.
+    """
+    with deadline_scope(PLAN_DEADLINE):
+        if not session_id:
+            return _plan(area, coordinates, interests, compact, fast_path, None, profile)
+        session = plan_session(session_id, area, coordinates, (profile, compact, fast_path))
+        with session.lock:
+            return _plan(area, coordinates, interests, compact, fast_path, session, profile)
+
+def _plan(area: str, coordinates: str, interests: List[str], compact: bool, fast_path: bool, session: Optional[PlanSession], profile: Optional[str]) -> str:
+    added, removed = session.changes(interests) if session is not None else (interests, [])
+    previous = session.itinerary if session is not None else None
+    if previous and not added and not removed:
+        print("♻️ Interests unchanged; reusing the previous itinerary")
+        return previous
+
+    prefetched = {}
+    try:
+        lat, lon = _coordinates(coordinates)
+        queries = dict(zip(interests, search_queries(area, interests)))
+        searched = prefetch_searches([(queries[interest], lat, lon) for interest in added], profile=profile)
+        if session is None:
+            prefetched = searched
+        else:
+            if previous:
+                print(f"♻️ Re-planning: +{len(added)} / -{len(removed)} interests, {len(interests) - len(added)} kept")
+            # Only places found are kept: an interest whose search came back
+            # empty (or failed) is searched again on the next plan.
+            for interest in added:
+                results = searched.get(search_key(queries[interest], lat, lon))
+                if results:
+                    session.candidates[interest] = results
+            prefetched = {search_key(queries[i], lat, lon): session.candidates[i] for i in interests if i in session.candidates}
+    except Exception as e:
+        print(f"⚠️ Skipping search prefetch: {e}")
+
+    itinerary = None
+    if fast_path and prefetched:
+        itinerary = plan_fast(area, (lat, lon), interests, prefetched)
+        if itinerary is not None and FAST_PATH_POLISH:
+            itinerary = polish_itinerary(itinerary)
+    if itinerary is None:
+        itinerary = _run_agent(area, coordinates, interests, compact, prefetched, previous, added, removed, profile)
+
+    if session is not None:
+        session.update(interests, itinerary)
+    return itinerary
+
+def _run_agent(
+    area: str,
+    coordinates: str,
+    interests: List[str],
+    compact: bool,
+    prefetched: Dict,
+    previous: Optional[str],
+    added: List[str],
+    removed: List[str],
+    profile: Optional[str]
+) -> str:
+    key = None
+    if response_cache.enabled and prefetched:
+        key = _cache_key(area, coordinates, interests, compact, prefetched, previous)
+        cached = response_cache.get(key)
+        if cached is not None:
+            stats = response_cache.stats()
+            print(f"💾 Response cache hit ({stats['hit_rate']:.0%} hit rate, {stats['tokens_saved']} tokens saved)")
+            return cached
+
+    if previous:
+        prompt = build_revision_prompt(area, coordinates, interests, previous, added, removed)
+    else:
+        prompt = build_prompt(area, coordinates, interests)
+
+    # Places the searches returned: what the prefetch found plus whatever
+    # each attempt's tool calls fetch, for validate_itinerary.
+    known = [place for results in prefetched.values() for place in results]
+    route = model_route()
+    fallback = None
+    tokens = 0
+    for attempt, model_id in enumerate(route):
+        returned = list(known)
+        registry = PlaceRegistry() if compact else None
+        agent = get_agent(registry, recording_search(make_prefetched_search_tool(prefetched, profile), returned), model_id)
+        # arun awaits all tool calls of a turn together (see get_agent).
+        response = asyncio.run(agent.arun(prompt))
+        tokens += getattr(response.metrics, "total_tokens", 0) or 0
+        escalation = route[attempt + 1] if attempt + 1 < len(route) else None
+
+        # A failed run's content is the error message; it is neither cached
+        # nor kept as the session's itinerary.
+        from agno.run.base import RunStatus
+        if getattr(response, "status", None) == RunStatus.error:
+            problems = [f"run failed: {response.content or 'unknown error'}"]
+        else:
+            itinerary = response.content
+            if registry is not None:
+                itinerary = expand_itinerary_markdown(itinerary, registry)
+            problems = validate_itinerary(itinerary, returned, previous)
+            if not problems:
+                if attempt:
+                    print(f"🧭 {model_id} produced a valid itinerary")
+                if key is not None:
+                    response_cache.set(key, itinerary, tokens)
+                return itinerary
+            fallback = itinerary
+
+        if escalation:
+            print(f"🧭 {model_id} output failed validation ({'; '.join(problems)}); escalating to {escalation}")
+        else:
+            print(f"⚠️ {model_id} output failed validation ({'; '.join(problems)})")
+
+    # Nothing passed: return the last readable itinerary uncached rather
+    # than fail the plan, or surface the error if every run failed.
+    if fallback is None:
+        raise RuntimeError(problems[0])
+    return fallback
@@ -1,14 +1,44 @@
 import streamlit as st
 from dotenv import load_dotenv
 import json
+import os
 
 load_dotenv()
 
-from agent import get_agent
+from agent import plan_itinerary
+from jobs import JobQueue
+from profiling import SamplingProfiler, profile_path, profiled
+from sessions import has_plan
+from tools.areas import AREAS
+from tools.profiles import DEFAULT_PROFILE, PROFILES
 from utils import create_ics_file, create_pdf_file, parse_markdown_itinerary
+from warmup import start_warm_up
 import datetime
+import uuid
+
+# Send search results to the model as compact tables with short ids.
+COMPACT_TOOL_RESULTS = os.getenv("COMPACT_TOOL_RESULTS", "0") == "1"
+# Profile every plan; with this off, add ?debug=1 to the URL for a toggle.
+PROFILE_PLANS = os.getenv("PROFILE_PLANS", "0") == "1"
+
+@st.cache_resource
+def warm_up_once():
+    """
+    Start the background warm-up once per server process, not on every rerun.
+    """
+    return start_warm_up()
 
 st.set_page_config(page_title="Local Discovery AI", page_icon="🗺️", layout="wide")
+warm_up_once()
+
+@st.cache_resource
+def get_job_queue() -> JobQueue:
+    """
+    One plan worker pool per server process, shared by all sessions.
+    """
+    return JobQueue(profiled(plan_itinerary), session_has_plan=has_plan)
+
+job_queue = get_job_queue()
 
 st.title("🗺️ Local Discovery AI")
 st.markdown("Your personalized agent for discovering the best places around you.")
@@ -33,49 +63,86 @@ with st.sidebar:
     
     st.divider()
     
-    # Popular Areas in Bangalore
-    areas = {
-        "Koramangala": "12.9352,77.6245",
-        "Indiranagar": "12.9719,77.6412",
-        "MG Road": "12.9756,77.6066",
-        "Whitefield": "12.9698,77.7500",
-        "Jayanagar": "12.9308,77.5838",
-        "Malleshwaram": "13.0031,77.5643",
-        "HSR Layout": "12.9121,77.6446"
-    }
-    
-    selected_area = st.selectbox("Choose an Area", list(areas.keys()))
-    location_input = areas[selected_area]
+    selected_area = st.selectbox("Choose an Area", list(AREAS.keys()))
+    location_input = AREAS[selected_area]
     st.caption(f"Coordinates: {location_input}")
+
+    profile_names = list(PROFILES)
+    selected_profile = st.selectbox(
+        "Search Depth",
+        profile_names,
+        index=profile_names.index(DEFAULT_PROFILE) if DEFAULT_PROFILE in PROFILES else 1,
+        help="fast answers sooner with fewer candidates; thorough checks more places and waits longer."
+    )
     
     st.divider()
+    profile_run = PROFILE_PLANS
+    if PROFILE_PLANS or st.query_params.get("debug") == "1":
+        profile_run = st.checkbox("Profile next plan 🔬", value=PROFILE_PLANS)
+
     if st.button("Reset Agent Memory 🧹"):
         st.session_state.clear()
         st.rerun()
 
 if st.button("Plan My Day 🚀", type="primary"):
-    with st.spinner("Agent is working..."):
-        agent = get_agent()
-        
-        # Combine interests for the agent
-        all_interests = [f"{c} Restaurant" for c in selected_cuisines] + selected_activities
-        
-        # Construct the prompt
-        prompt = f"""
-        Plan a perfect outing for me!
-        - **Location**: {selected_area} (Coordinates: {location_input})
-        - **Interests**: {", ".join(all_interests)}
-        
-        Please find relevant places, enrich them with details, and create a mini-itinerary.
-        """
-        
-        # Run the agent
-        response = agent.run(prompt)
-        st.session_state['itinerary'] = response.content
+    # Combine interests for the agent
+    all_interests = [f"{c} Restaurant" for c in selected_cuisines] + selected_activities
+    
+    # Plan generation runs on the shared worker pool; the job id is kept in
+    # the URL so a browser refresh picks the result up instead of losing it.
+    # The plan session lets a re-plan reuse this session's earlier searches.
+    plan_session_id = st.session_state.setdefault('plan_session', uuid.uuid4().hex)
+    payload = {
+        "area": selected_area,
+        "coordinates": location_input,
+        "interests": all_interests,
+        "compact": COMPACT_TOOL_RESULTS,
+        "session_id": plan_session_id,
+        "profile": selected_profile
+    }
+    st.session_state.pop('profile_id', None)
+    if profile_run:
+        payload["profile_id"] = st.session_state['profile_id'] = uuid.uuid4().hex
+    job_id = job_queue.submit(payload)
+    st.session_state.pop('itinerary', None)
+    st.session_state.pop('profile_exported', None)
+    st.session_state['job_id'] = job_id
+    st.query_params["job"] = job_id
+
+if 'job_id' not in st.session_state and 'itinerary' not in st.session_state and "job" in st.query_params:
+    st.session_state['job_id'] = st.query_params["job"]
+
+@st.fragment(run_every=2)
+def show_job_status():
+    job_id = st.session_state.get('job_id')
+    if not job_id:
+        return
+    job = job_queue.get(job_id)
+    if job is None:
+        st.session_state.pop('job_id', None)
+        return
+    if job["status"] in ("queued", "running"):
+        st.info("Agent is working... ⏳")
+    elif job["status"] == "done":
+        st.session_state['itinerary'] = job["result"]
+        st.session_state.pop('job_id', None)
+        st.rerun()
+    else:
+        st.error(f"Planning failed: {job['error']}")
+        st.session_state.pop('job_id', None)
+
+show_job_status()
 
 # Display Itinerary if available
 if 'itinerary' in st.session_state:
     st.markdown(st.session_state['itinerary'])
+
+    # A profiled plan also profiles its export step once, into the same file.
+    profile_id = st.session_state.get('profile_id')
+    export_profiler = None
+    if profile_id and not st.session_state.get('profile_exported'):
+        export_profiler = SamplingProfiler()
+        export_profiler.start()
     
     # Parse for Export
     try:
@@ -83,20 +150,23 @@ if 'itinerary' in st.session_state:
         summary = extracted_summary if extracted_summary else "Your custom itinerary generated by Local Discovery AI."
         
         if items:
+            ics_data = create_ics_file(items)
+            pdf_data = create_pdf_file(items, summary)
+
             # Export Options
             st.divider()
             col1, col2 = st.columns(2)
             with col1:
                 st.download_button(
                     label="Add to Calendar 📅",
-                    data=create_ics_file(items),
+                    data=ics_data,
                     file_name="itinerary.ics",
                     mime="text/calendar"
                 )
             with col2:
                 st.download_button(
                     label="Download PDF 📄",
-                    data=create_pdf_file(items, summary),
+                    data=pdf_data,
                     file_name="itinerary.pdf",
                     mime="application/pdf"
                 )
@@ -105,3 +175,18 @@ if 'itinerary' in st.session_state:
             
     except Exception as e:
         st.error(f"An error occurred during export preparation: {e}")
+
+    if export_profiler is not None:
+        export_profiler.stop()
+        export_profiler.save(profile_path(profile_id), "export")
+        st.session_state['profile_exported'] = True
+
+    if profile_id and os.path.exists(profile_path(profile_id)):
+        with open(profile_path(profile_id), "rb") as f:
+            st.download_button(
+                label="Download Profile 🔬",
+                data=f.read(),
+                file_name=f"plan-{profile_id[:8]}.speedscope.json",
+                mime="application/json",
+                help="Open at https://www.speedscope.app"
+            )
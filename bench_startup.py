@@ -0,0 +1,49 @@
+"""
+Measure cold import times of the app's modules, each in a fresh interpreter.
+
+    python bench_startup.py [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+MODULES = [
+    "app_imports",
+    "agent",
+    "agno.agent",
+    "agno.models.groq",
+    "tools.olamaps",
+    "utils",
+    "fpdf",
+    "numpy",
+    "streamlit",
+]
+
+# What app.py imports before the first render (streamlit itself excluded).
+APP_IMPORTS = "import agent, jobs, profiling, tools.areas, tools.profiles, utils, warmup"
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+def import_ms(module: str) -> float:
+    statement = APP_IMPORTS if module == "app_imports" else f"import {module}"
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"{statement}; "
+        "print((time.perf_counter() - start) * 1000)"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=ROOT)
+    return float(output.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    for module in MODULES:
+        samples = [import_ms(module) for _ in range(args.runs)]
+        print(f"{module:<20} {statistics.median(samples):8.1f} ms (median of {args.runs})")
+
+if __name__ == "__main__":
+    main()
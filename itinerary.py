@@ -0,0 +1,207 @@
+from typing import List, Dict, Optional, Tuple
+import numpy as np
+
+from tools.geo import haversine_matrix
+from tools.traveltime import UNREACHABLE, get_grid
+
+# Average door-to-door city speed used to turn km into minutes.
+CITY_SPEED_KMPH = 18.0
+
+# Meal windows in minutes since midnight. A meal stop must start inside one.
+MEAL_WINDOWS = [
+    ("Lunch", 12 * 60 + 30, 14 * 60 + 30),
+    ("Dinner", 19 * 60 + 30, 22 * 60),
+]
+
+# Cafes are treated as activities so they can fill any gap in the day.
+MEAL_KEYWORDS = ["restaurant", "food", "dining", "brewery"]
+
+# Visit length in minutes, first keyword match wins.
+DURATIONS = [
+    ("cafe", 60),
+    ("restaurant", 90),
+    ("brewery", 120),
+    ("park", 90),
+    ("garden", 90),
+    ("museum", 120),
+    ("shopping", 120),
+    ("mall", 120),
+    ("movie", 180),
+    ("cinema", 180),
+    ("zoo", 180),
+]
+DEFAULT_DURATION = 90
+
+MISSED_MEAL_PENALTY = 10_000
+
+def parse_clock(time_str: str) -> int:
+    """
+    Convert '10:00 AM' to minutes since midnight.
+    """
+    hours, rest = time_str.strip().split(":")
+    minutes, meridiem = rest.split()
+    hours = int(hours) % 12 + (12 if meridiem.upper() == "PM" else 0)
+    return hours * 60 + int(minutes)
+
+def format_clock(minutes: int) -> str:
+    """
+    Convert minutes since midnight to '1:00 PM'.
+    """
+    hours, mins = divmod(int(minutes) % (24 * 60), 60)
+    meridiem = "PM" if hours >= 12 else "AM"
+    return f"{hours % 12 or 12}:{mins:02d} {meridiem}"
+
+def _label(place: Dict) -> str:
+    return f"{place.get('category', '')} {place.get('name', '')}".lower()
+
+def is_meal(place: Dict) -> bool:
+    """
+    A place is a meal stop if it was found for a food interest.
+    """
+    if "kind" in place:
+        return place["kind"] == "meal"
+    label = _label(place)
+    return "cafe" not in label and any(k in label for k in MEAL_KEYWORDS)
+
+def visit_duration(place: Dict) -> int:
+    if place.get("duration"):
+        return int(place["duration"])
+    label = _label(place)
+    for keyword, minutes in DURATIONS:
+        if keyword in label:
+            return minutes
+    return DEFAULT_DURATION
+
+def travel_time_matrix(points: List[Tuple[float, float]], speed_kmph: float = CITY_SPEED_KMPH) -> np.ndarray:
+    """
+    Pairwise travel minutes between (lat, lon) points, rounded to 5 minutes.
+    Uses the road travel-time grid where installed, straight-line speed elsewhere.
+    """
+    lats = [p[0] for p in points]
+    lons = [p[1] for p in points]
+    minutes = haversine_matrix(lats, lons) / speed_kmph * 60
+
+    # Prefer real road times wherever the precomputed grid covers a pair.
+    grid = get_grid()
+    if grid is not None:
+        cells = [grid.cell(lat, lon) for lat, lon in points]
+        known = np.array([c is not None for c in cells])
+        if known.any():
+            idx = np.array([c if c is not None else 0 for c in cells])
+            road = grid.seconds[np.ix_(idx, idx)].astype(float) / 60
+            usable = known[:, None] & known[None, :] & (grid.seconds[np.ix_(idx, idx)] != UNREACHABLE)
+            minutes = np.where(usable, road, minutes)
+
+    minutes = np.ceil(minutes / 5) * 5
+    np.fill_diagonal(minutes, 0)
+    return minutes
+
+def _simulate(order: List[int], travel: np.ndarray, meals: List[bool], durations: List[int], start: int):
+    """
+    Walk a visit order from the origin (index 0) and return (cost, slots).
+    Meal stops wait for the next free meal window; a meal that cannot start
+    in any window is heavily penalized. Cost is travel plus waiting minutes.
+    """
+    clock = start
+    cost = 0.0
+    used_windows = set()
+    slots = []
+    prev = 0
+    for idx in order:
+        leg = float(travel[prev][idx])
+        clock += leg
+        cost += leg
+        if meals[idx]:
+            window = next(
+                (w for w in MEAL_WINDOWS if w[0] not in used_windows and clock <= w[2]),
+                None
+            )
+            if window is None:
+                cost += MISSED_MEAL_PENALTY
+            else:
+                used_windows.add(window[0])
+                if clock < window[1]:
+                    cost += window[1] - clock
+                    clock = window[1]
+        slots.append((idx, clock, clock + durations[idx], leg))
+        clock += durations[idx]
+        prev = idx
+    return cost, slots
+
+def _nearest_neighbour(travel: np.ndarray) -> List[int]:
+    n = len(travel)
+    order = []
+    remaining = set(range(1, n))
+    current = 0
+    while remaining:
+        current = min(remaining, key=lambda j: (travel[current][j], j))
+        order.append(current)
+        remaining.remove(current)
+    return order
+
+def _two_opt(order: List[int], cost_fn) -> List[int]:
+    best = order
+    best_cost = cost_fn(best)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(len(best) - 1):
+            for k in range(i + 1, len(best)):
+                candidate = best[:i] + best[i:k + 1][::-1] + best[k + 1:]
+                candidate_cost = cost_fn(candidate)
+                if candidate_cost < best_cost - 1e-9:
+                    best, best_cost = candidate, candidate_cost
+                    improved = True
+    return best
+
+def optimize_itinerary(
+    places: List[Dict],
+    origin: Tuple[float, float],
+    start_time: str = "10:00 AM",
+    travel: Optional[np.ndarray] = None
+) -> List[Dict]:
+    """
+    Order places to minimize travel under meal-time constraints and assign times.
+
+    places: dicts from search_places (need 'lat'/'lon'); an optional 'category'
+        (the interest they were found for), 'kind' ('meal'/'activity') or
+        'duration' (minutes) refine the schedule.
+    origin: (lat, lon) where the day starts.
+    travel: optional precomputed (n+1, n+1) minutes matrix, origin first.
+
+    Returns itinerary items (name, address, description, start_time, end_time)
+    in visit order, ready for create_ics_file / create_pdf_file.
+    """
+    places = [p for p in places if p.get("lat") is not None and p.get("lon") is not None]
+    if not places:
+        return []
+
+    if travel is None:
+        points = [origin] + [(float(p["lat"]), float(p["lon"])) for p in places]
+        travel = travel_time_matrix(points)
+
+    # Index 0 is the origin; place i lives at index i + 1.
+    meals = [False] + [is_meal(p) for p in places]
+    durations = [0] + [visit_duration(p) for p in places]
+    start = parse_clock(start_time)
+
+    def cost(order):
+        return _simulate(order, travel, meals, durations, start)[0]
+
+    order = _two_opt(_nearest_neighbour(travel), cost)
+    _, slots = _simulate(order, travel, meals, durations, start)
+
+    items = []
+    for idx, begin, end, leg in slots:
+        place = places[idx - 1]
+        items.append({
+            "name": place.get("name", ""),
+            "address": place.get("address") or "",
+            "description": place.get("description", ""),
+            "start_time": format_clock(begin),
+            "end_time": format_clock(end),
+            "lat": place.get("lat"),
+            "lon": place.get("lon"),
+            "travel_minutes": int(leg),
+        })
+    return items
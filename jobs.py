@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+JOBS_DIR = os.getenv("JOBS_DIR", os.path.join("data", "jobs"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# Seconds a finished job (and its file) is kept for get()/wait() before eviction.
+JOB_TTL = float(os.getenv("JOB_TTL", "3600"))
+# Per-user payload field left out of the dedup key, so identical first
+# plans from different browser sessions share one job.
+SESSION_FIELD = "session_id"
+# Minimum seconds between sweeps of the job directory for expired files.
+SWEEP_INTERVAL = 60.0
+
+class JobQueue:
+    """
+    Runs plan requests on a worker pool, independent of any Streamlit session.
+
+    Identical payloads submitted while a job for them is queued or running
+    join that job instead of starting a new one. The SESSION_FIELD is left
+    out of that comparison only for sessions session_has_plan says have no
+    earlier plan (a re-plan revises that session's own itinerary); without
+    session_has_plan it always counts. Every job's state and result is
+    persisted as JSON under store_dir, so a refreshed browser (or another
+    process sharing the directory) can pick the result up by job id.
+    Finished jobs are dropped from memory and disk ttl seconds after they end.
+    """
+
+    def __init__(self, worker: Callable[..., Any], max_workers: int = JOB_WORKERS, store_dir: str = JOBS_DIR, ttl: float = JOB_TTL,
+                 session_has_plan: Optional[Callable[[str], bool]] = None):
+        self.worker = worker
+        self.session_has_plan = session_has_plan
+        self.store_dir = store_dir
+        self.ttl = ttl
+        os.makedirs(store_dir, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="plan-worker")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict] = {}
+        self._inflight: Dict[str, str] = {}
+        self._done: Dict[str, threading.Event] = {}
+        self._subscribers: Dict[str, list] = {}
+        self._last_sweep = 0.0
+
+    def payload_key(self, payload: Dict) -> str:
+        session_id = payload.get(SESSION_FIELD)
+        shared = payload
+        if session_id and self.session_has_plan is not None and not self.session_has_plan(session_id):
+            shared = {k: v for k, v in payload.items() if k != SESSION_FIELD}
+        return hashlib.sha256(json.dumps(shared, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.store_dir, f"{job_id}.json")
+
+    def _persist(self, job: Dict):
+        """
+        Write the job's record. Failures only cost the on-disk copy; the
+        job itself carries on in memory.
+        """
+        tmp_path = self._path(job["id"]) + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(job, f)
+            os.replace(tmp_path, self._path(job["id"]))
+        except (OSError, TypeError, ValueError) as e:
+            print(f"⚠️ Could not persist job {job['id']}: {e}")
+
+    def _evict_expired(self):
+        """
+        Drop jobs that finished more than ttl seconds ago and delete their
+        files, including ones left by earlier runs. Call with the lock held.
+        """
+        now = time.time()
+        cutoff = now - self.ttl
+        expired = [job_id for job_id, job in self._jobs.items() if job["finished_at"] is not None and job["finished_at"] < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+            self._done.pop(job_id, None)
+            self._remove_file(self._path(job_id))
+
+        if now - self._last_sweep < min(self.ttl, SWEEP_INTERVAL):
+            return
+        self._last_sweep = now
+        try:
+            names = os.listdir(self.store_dir)
+        except OSError:
+            return
+        for name in names:
+            job_id = name.split(".", 1)[0]
+            path = os.path.join(self.store_dir, name)
+            if job_id in self._jobs:
+                continue
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    self._remove_file(path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _remove_file(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def submit(self, payload: Dict) -> str:
+        """
+        Queue a job for payload (keyword arguments for the worker) and return its id.
+        """
+        key = self.payload_key(payload)
+        with self._lock:
+            self._evict_expired()
+            existing = self._inflight.get(key)
+            if existing:
+                print(f"🔁 Joining in-flight job {existing}")
+                return existing
+
+            job_id = uuid.uuid4().hex
+            job = {
+                "id": job_id,
+                "key": key,
+                "payload": payload,
+                "status": "queued",
+                "result": None,
+                "error": None,
+                "created_at": time.time(),
+                "finished_at": None,
+            }
+            self._jobs[job_id] = job
+            self._inflight[key] = job_id
+            self._done[job_id] = threading.Event()
+            self._persist(job)
+
+        self._executor.submit(self._run, job_id)
+        print(f"📥 Queued job {job_id}")
+        return job_id
+
+    def _run(self, job_id: str):
+        with self._lock:
+            job = self._jobs[job_id]
+            job["status"] = "running"
+            self._persist(job)
+
+        result, status, error = None, "failed", "Job did not finish"
+        try:
+            result = self.worker(**job["payload"])
+            status, error = "done", None
+        except Exception as e:
+            print(f"❌ Job {job_id} failed: {e}")
+            error = str(e)
+        finally:
+            # Always release the payload key and wake waiters, or identical
+            # requests would keep joining a job that never finishes.
+            with self._lock:
+                job.update(status=status, result=result, error=error, finished_at=time.time())
+                self._inflight.pop(job["key"], None)
+                subscribers = self._subscribers.pop(job_id, [])
+                self._done[job_id].set()
+                self._persist(job)
+
+        for callback in subscribers:
+            callback(dict(job))
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """
+        Current state of a job, falling back to the persisted record.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+        try:
+            with open(self._path(job_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict]:
+        """
+        Block until the job finishes or timeout elapses, then return its state.
+        """
+        event = self._done.get(job_id)
+        if event is not None:
+            event.wait(timeout)
+        return self.get(job_id)
+
+    def subscribe(self, job_id: str, callback: Callable[[Dict], None]):
+        """
+        Call callback(job) once the job finishes (immediately if it already has).
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job["status"] in ("queued", "running"):
+                self._subscribers.setdefault(job_id, []).append(callback)
+                return
+        job = self.get(job_id)
+        if job is not None:
+            callback(job)
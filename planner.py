@@ -0,0 +1,184 @@
+"""
+Rules-based fast path for common plan requests.
+
+A known area with one cuisine and one or two activities needs no model: the
+best search results per interest are picked by score, ordered and timed by
+itinerary.optimize_itinerary, and written in the same markdown the agent
+produces, so parse_markdown_itinerary and the exports work unchanged.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from itinerary import MEAL_WINDOWS, optimize_itinerary
+from tools.areas import AREAS
+from tools.batch import prefetch_searches, search_key
+
+# Interests the app offers outside of cuisines.
+KNOWN_ACTIVITIES = {"parks", "museums", "shopping", "movies", "zoo"}
+CUISINE_SUFFIX = " restaurant"
+MAX_CUISINES = 1
+MAX_ACTIVITIES = 2
+
+# Stops per day: one per meal window for the cuisine, ACTIVITY_STOPS shared
+# across the other interests (at least one each).
+ACTIVITY_STOPS = 2
+
+# Score = rating + distance + category fit, each scaled to 0..1 first.
+RATING_WEIGHT = 0.5
+DISTANCE_WEIGHT = 0.3
+FIT_WEIGHT = 0.2
+# Rating assumed for places the API returns without one.
+NEUTRAL_RATING = 3.5
+# Distance at which the distance score halves.
+DISTANCE_SCALE_KM = 3.0
+
+GENERIC_WORDS = {"restaurant", "restaurants", "in", "near", "the", "and"}
+
+def search_queries(area: str, interests: List[str]) -> List[str]:
+    """
+    The '{Interest} in {Location}' queries the agent is instructed to make.
+    """
+    return [f"{' '.join(interest.split())} in {area}" for interest in interests]
+
+def _is_cuisine(interest: str) -> bool:
+    return interest.lower().endswith(CUISINE_SUFFIX)
+
+def is_fast_path(area: str, interests: List[str]) -> bool:
+    """
+    True for a known area with at most one cuisine and one or two known activities.
+    """
+    if area not in AREAS or not interests:
+        return False
+    cuisines = [i for i in interests if _is_cuisine(i)]
+    activities = [i for i in interests if not _is_cuisine(i)]
+    if any(a.lower() not in KNOWN_ACTIVITIES for a in activities):
+        return False
+    return len(cuisines) <= MAX_CUISINES and len(activities) <= MAX_ACTIVITIES
+
+def _rating(place: Dict) -> Optional[float]:
+    # Directory entries carry a placeholder rating, not a real one.
+    if str(place.get("place_id", "")).startswith("dir_"):
+        return None
+    try:
+        return float(place.get("rating"))
+    except (TypeError, ValueError):
+        return None
+
+def _distance_km(place: Dict) -> float:
+    try:
+        return float(str(place.get("distance", "")).split()[0])
+    except (IndexError, ValueError):
+        return DISTANCE_SCALE_KM
+
+def category_fit(place: Dict, interest: str) -> float:
+    """
+    Share of the interest's specific words that appear in the place name,
+    e.g. 'italian' for 'Italian Restaurant'. 1.0 when there are none.
+    """
+    words = [w for w in interest.lower().split() if w not in GENERIC_WORDS]
+    if not words:
+        return 1.0
+    name = (place.get("name") or "").lower()
+    # Plural interests ('Parks') should match singular names ('Cubbon Park').
+    return sum(1 for w in words if w in name or w.rstrip("s") in name) / len(words)
+
+def score_place(place: Dict, interest: str) -> float:
+    rating = _rating(place)
+    rating_score = min(max(((rating if rating is not None else NEUTRAL_RATING) - 3.0) / 2.0, 0.0), 1.0)
+    distance_score = 1.0 / (1.0 + _distance_km(place) / DISTANCE_SCALE_KM)
+    return RATING_WEIGHT * rating_score + DISTANCE_WEIGHT * distance_score + FIT_WEIGHT * category_fit(place, interest)
+
+def _stops_per_interest(interests: List[str]) -> Dict[str, int]:
+    activities = [i for i in interests if not _is_cuisine(i) or "cafe" in i.lower()]
+    stops = {}
+    for interest in interests:
+        if interest in activities:
+            stops[interest] = max(1, ACTIVITY_STOPS // len(activities))
+        else:
+            stops[interest] = len(MEAL_WINDOWS)
+    return stops
+
+def _description(place: Dict, interest: str, kind: str) -> str:
+    what = interest.replace(" Restaurant", "").strip()
+    parts = [f"Top pick for {what} food" if kind == "meal" else f"Top pick for {what}"]
+    rating = _rating(place)
+    if rating is not None:
+        parts.append(f"rated {rating:g}")
+    parts.append(f"{_distance_km(place):g} km away")
+    return ", ".join(parts) + "."
+
+def select_places(results_by_interest: Dict[str, List[Dict]]) -> List[Dict]:
+    """
+    Pick the highest-scoring places for each interest, tagged with the
+    category and kind optimize_itinerary uses for durations and meal windows.
+    """
+    stops = _stops_per_interest(list(results_by_interest))
+    selected = []
+    seen = set()
+    for interest, results in results_by_interest.items():
+        kind = "meal" if _is_cuisine(interest) and "cafe" not in interest.lower() else "activity"
+        ranked = sorted(results, key=lambda p: score_place(p, interest), reverse=True)
+        picked = 0
+        for place in ranked:
+            if picked >= stops[interest]:
+                break
+            key = place.get("place_id") or place.get("name")
+            if key in seen:
+                continue
+            seen.add(key)
+            selected.append(dict(place, category=interest, kind=kind, description=_description(place, interest, kind)))
+            picked += 1
+    return selected
+
+def render_markdown(area: str, items: List[Dict], interests: List[str]) -> str:
+    """
+    Write items in the '### Name / *Address* / 🕒 time' format the agent uses.
+    """
+    lines = [f"## Your Day in {area}", ""]
+    for item in items:
+        lines.append(f"### {item['name']}")
+        if item.get("address"):
+            lines.append(f"*{item['address']}*")
+        lines.append(f"🕒 {item['start_time']} - {item['end_time']}")
+        if item.get("description"):
+            lines.append(item["description"])
+        lines.append("")
+    lines.append("📝 Summary")
+    lines.append(
+        f"A {len(items)}-stop day in {area} covering {', '.join(interests)}, "
+        "ordered to keep travel short and meals inside lunch and dinner hours."
+    )
+    return "\n".join(lines)
+
+def plan_fast(
+    area: str,
+    origin: Tuple[float, float],
+    interests: List[str],
+    prefetched: Optional[Dict[Tuple[str, float, float], List[Dict]]] = None,
+    start_time: str = "10:00 AM",
+    profile: Optional[str] = None
+) -> Optional[str]:
+    """
+    Plan without the model. Returns None when the request is not a fast-path
+    request or some interest found no places, so the caller can fall back.
+    """
+    if not is_fast_path(area, interests):
+        return None
+
+    lat, lon = origin
+    queries = search_queries(area, interests)
+    if prefetched is None:
+        prefetched = prefetch_searches([(query, lat, lon) for query in queries], profile=profile)
+
+    results_by_interest = {}
+    for interest, query in zip(interests, queries):
+        results = prefetched.get(search_key(query, lat, lon))
+        if not results:
+            print(f"⚡ Fast path skipped: no results for '{interest}'")
+            return None
+        results_by_interest[interest] = results
+
+    items = optimize_itinerary(select_places(results_by_interest), (lat, lon), start_time)
+    if not items:
+        return None
+    print(f"⚡ Fast path planned {len(items)} stops for {area}")
+    return render_markdown(area, items, interests)
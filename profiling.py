@@ -0,0 +1,185 @@
+"""
+Opt-in sampling profiler for single plan requests.
+
+A background thread snapshots the stacks of every thread running project
+code at a fixed interval and writes them in speedscope's file format
+(https://www.speedscope.app), one profile per thread, so a slow "Plan My
+Day" run can be opened as a flamegraph. Nothing is installed or sampled
+unless a profiler is started.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join("data", "profiles"))
+SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+Frame = Tuple[str, str, int]
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler; use as a context manager around the code
+    to profile. Only stacks that pass through files under root are kept,
+    so idle pool threads and the server's own threads drop out.
+
+    Sampling is process-wide: work of other requests that runs at the same
+    time shows up too.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL, root: str = PROJECT_ROOT):
+        self.interval = interval
+        self.root = root
+        self._frames: List[Frame] = []
+        self._frame_index: Dict[Frame, int] = {}
+        self._samples: Dict[str, List[List[int]]] = {}
+        self._weights: Dict[str, List[float]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.duration = 0.0
+
+    def __enter__(self) -> "SamplingProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self._started_at
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            self._sample(now - last)
+            last = now
+
+    def _sample(self, elapsed: float):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            in_project = False
+            while frame is not None:
+                code = frame.f_code
+                in_project = in_project or (code.co_filename.startswith(self.root) and "site-packages" not in code.co_filename)
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if not in_project:
+                continue
+
+            thread_name = names.get(ident, str(ident))
+            # speedscope wants the root frame first.
+            self._samples.setdefault(thread_name, []).append([self._index(f) for f in reversed(stack)])
+            self._weights.setdefault(thread_name, []).append(elapsed)
+
+    def _index(self, frame: Frame) -> int:
+        index = self._frame_index.get(frame)
+        if index is None:
+            index = self._frame_index[frame] = len(self._frames)
+            self._frames.append(frame)
+        return index
+
+    @property
+    def sample_count(self) -> int:
+        return sum(len(samples) for samples in self._samples.values())
+
+    def to_speedscope(self, name: str) -> Dict:
+        """
+        The profile as a speedscope JSON document.
+        """
+        profiles = []
+        for thread_name, samples in self._samples.items():
+            weights = self._weights[thread_name]
+            profiles.append({
+                "type": "sampled",
+                "name": f"{name}: {thread_name}",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "local-discovery-agent",
+            "shared": {"frames": [
+                {"name": func, "file": os.path.relpath(path, self.root) if path.startswith(self.root) else path, "line": line}
+                for func, path, line in self._frames
+            ]},
+            "profiles": profiles,
+        }
+
+    def save(self, path: str, name: str):
+        """
+        Write the profile to path, adding its threads to the profiles
+        already in the file if there is one.
+        """
+        document = self.to_speedscope(name)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                document = merge_speedscope(json.load(f), document)
+        except (OSError, ValueError):
+            pass
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(document, f)
+        print(f"🔬 Profile '{name}': {self.sample_count} samples over {self.duration:.2f}s -> {path}")
+
+def merge_speedscope(first: Dict, second: Dict) -> Dict:
+    """
+    Combine two speedscope documents into one with a shared frame table.
+    """
+    frames = list(first["shared"]["frames"])
+    index = {(f["name"], f.get("file"), f.get("line")): i for i, f in enumerate(frames)}
+    remap = []
+    for frame in second["shared"]["frames"]:
+        key = (frame["name"], frame.get("file"), frame.get("line"))
+        if key not in index:
+            index[key] = len(frames)
+            frames.append(frame)
+        remap.append(index[key])
+
+    profiles = list(first["profiles"])
+    for profile in second["profiles"]:
+        profiles.append(dict(profile, samples=[[remap[i] for i in sample] for sample in profile["samples"]]))
+    return dict(first, shared={"frames": frames}, profiles=profiles)
+
+def profile_path(profile_id: str) -> str:
+    return os.path.join(PROFILE_DIR, f"{profile_id}.speedscope.json")
+
+def profiled(fn: Callable[..., str]) -> Callable[..., str]:
+    """
+    Wrap a job worker so payloads carrying a profile_id are run under the
+    profiler and saved to profile_path(profile_id). Payloads without one
+    call fn directly.
+    """
+    def run(profile_id: Optional[str] = None, **kwargs):
+        if not profile_id:
+            return fn(**kwargs)
+        with SamplingProfiler() as profiler:
+            try:
+                return fn(**kwargs)
+            finally:
+                # Stop sampling before writing, so the write is not profiled.
+                profiler.stop()
+                profiler.save(profile_path(profile_id), "plan")
+
+    return run
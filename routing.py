@@ -0,0 +1,92 @@
+"""
+Model routing for the planning agent.
+
+Every plan starts on the small, fast MODEL_ID, which handles the tool calls
+and the selection. Its itinerary is checked locally: it must parse into at
+least one '### Name' item, and every item must be a place the searches
+returned. Only when that check fails is the request run again on
+ESCALATION_MODEL_ID, so the larger model is paid for on the requests that
+need it.
+
+MODEL_BASE_URL points both models at another server that speaks Groq's
+chat-completions API, e.g. a local stand-in to try out the routing without
+Groq's latency and cost.
+"""
+import difflib
+import functools
+import os
+import re
+from typing import Callable, Dict, Iterable, List, Optional
+
+from utils import parse_markdown_itinerary
+
+MODEL_ID = os.getenv("MODEL_ID", "llama-3.1-8b-instant")
+# Larger model for plans whose small-model output fails validation; set
+# ESCALATION_MODEL_ID= (empty) to never escalate.
+ESCALATION_MODEL_ID = os.getenv("ESCALATION_MODEL_ID", "llama-3.3-70b-versatile")
+MODEL_BASE_URL = os.getenv("MODEL_BASE_URL") or None
+
+# Names at least this similar after normalizing count as the same place,
+# so 'Truffles, Koramangala' matches 'Truffles - Koramangala'.
+NAME_MATCH_RATIO = 0.85
+# Shorter names are not matched by containment ('Park' in 'Cubbon Park').
+MIN_CONTAINED_LENGTH = 5
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+def model_route() -> List[str]:
+    """
+    Models to try in order.
+    """
+    route = [MODEL_ID]
+    if ESCALATION_MODEL_ID and ESCALATION_MODEL_ID != MODEL_ID:
+        route.append(ESCALATION_MODEL_ID)
+    return route
+
+def _normalize(name: Optional[str]) -> str:
+    return " ".join(_NON_WORD.split((name or "").lower())).strip()
+
+def _same_place(name: str, known: str) -> bool:
+    if name == known:
+        return True
+    shorter, longer = sorted((name, known), key=len)
+    if len(shorter) >= MIN_CONTAINED_LENGTH and shorter in longer:
+        return True
+    return difflib.SequenceMatcher(None, name, known).ratio() >= NAME_MATCH_RATIO
+
+def validate_itinerary(itinerary: Optional[str], places: Iterable[Dict], previous: Optional[str] = None) -> List[str]:
+    """
+    Problems that make an agent itinerary unusable: no parseable items, or
+    items that are not among places (what search_places returned) nor, for
+    a revision, in the previous itinerary. An empty list means it passed.
+    """
+    items, _ = parse_markdown_itinerary(itinerary or "")
+    if not items:
+        return ["no itinerary items could be parsed"]
+
+    known = {_normalize(place.get("name")) for place in places}
+    if previous:
+        known.update(_normalize(item.get("name")) for item in parse_markdown_itinerary(previous)[0])
+    known.discard("")
+
+    unknown = [
+        item["name"] for item in items
+        if not any(_same_place(_normalize(item["name"]), name) for name in known)
+    ]
+    if unknown:
+        return [f"places not returned by search_places: {', '.join(unknown)}"]
+    return []
+
+def recording_search(search: Callable[[str, float, float], List[Dict]], returned: List[Dict]) -> Callable[[str, float, float], List[Dict]]:
+    """
+    Wrap a search tool so every place it returns is also appended to
+    returned, for validate_itinerary. Name, docstring and signature are kept
+    for the tool schema.
+    """
+    @functools.wraps(search)
+    def tool(query: str, lat: float, lon: float) -> List[Dict]:
+        results = search(query, lat, lon)
+        returned.extend(results or [])
+        return results
+
+    return tool
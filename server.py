@@ -0,0 +1,197 @@
+import asyncio
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request, Response
+from pydantic import BaseModel
+
+from agent import plan_itinerary
+from tools.areas import AREAS
+from tools.breaker import breaker_stats
+from tools.http import deadline_scope
+from tools.llmcache import response_cache
+from tools.olamaps import search_places_with_profile
+from tools.rejections import rejection_cache
+from utils import create_ics_file, create_pdf_file, parse_markdown_itinerary
+
+# Limits apply per worker process; total capacity scales with --workers.
+PER_CLIENT_CONCURRENCY = int(os.getenv("API_PER_CLIENT_CONCURRENCY", "2"))
+MAX_INFLIGHT = int(os.getenv("API_MAX_INFLIGHT", "16"))
+MAX_QUEUED = int(os.getenv("API_MAX_QUEUED", "32"))
+PLAN_TIMEOUT = float(os.getenv("API_PLAN_TIMEOUT", "90"))
+SEARCH_TIMEOUT = float(os.getenv("API_SEARCH_TIMEOUT", "30"))
+EXPORT_TIMEOUT = float(os.getenv("API_EXPORT_TIMEOUT", "10"))
+
+class ConcurrencyLimiter:
+    """
+    Per-client and global admission control.
+
+    A client over its concurrency limit gets 429. Requests beyond the global
+    in-flight limit wait in a bounded queue; once that is full, new requests
+    get 503 with Retry-After instead of piling up.
+    """
+
+    def __init__(self, per_client: int, max_inflight: int, max_queued: int):
+        self.per_client = per_client
+        self.max_inflight = max_inflight
+        self.max_queued = max_queued
+        self._active: Dict[str, int] = defaultdict(int)
+        self._queued = 0
+        self._inflight: Optional[asyncio.Semaphore] = None
+
+    async def acquire(self, client: str):
+        """
+        Take a slot for client, waiting in the queue if all are in use.
+        Every successful acquire() must be paired with one release().
+        """
+        if self._inflight is None:
+            self._inflight = asyncio.Semaphore(self.max_inflight)
+        if self._active[client] >= self.per_client:
+            raise HTTPException(status_code=429, detail="Too many concurrent requests for this client.")
+        if self._inflight.locked() and self._queued >= self.max_queued:
+            raise HTTPException(status_code=503, detail="Server busy, retry shortly.", headers={"Retry-After": "5"})
+
+        self._active[client] += 1
+        self._queued += 1
+        try:
+            await self._inflight.acquire()
+        except BaseException:
+            self._forget(client)
+            raise
+        finally:
+            self._queued -= 1
+
+    def release(self, client: str):
+        self._inflight.release()
+        self._forget(client)
+
+    def _forget(self, client: str):
+        self._active[client] -= 1
+        if not self._active[client]:
+            del self._active[client]
+
+limiter = ConcurrencyLimiter(PER_CLIENT_CONCURRENCY, MAX_INFLIGHT, MAX_QUEUED)
+# One thread per slot: blocking work never waits behind other work (or
+# behind asyncio's shared default executor) once it has been admitted.
+_workers = ThreadPoolExecutor(max_workers=MAX_INFLIGHT, thread_name_prefix="api-worker")
+
+app = FastAPI(title="Local Discovery Agent API")
+
+def client_id(request: Request) -> str:
+    return request.headers.get("X-Client-Id") or (request.client.host if request.client else "anonymous")
+
+def _with_deadline(timeout: float, fn, *args, **kwargs):
+    with deadline_scope(timeout):
+        return fn(*args, **kwargs)
+
+async def run_blocking(client: str, timeout: float, fn, *args, **kwargs):
+    """
+    Run blocking work on the worker pool under one of client's slots,
+    failing the request with 504 after timeout. The work's upstream calls
+    share the same deadline, so the thread stops calling out once the
+    client has been answered; the slot is only given back when the thread
+    is done, so timed-out work still counts against MAX_INFLIGHT.
+    """
+    await limiter.acquire(client)
+    loop = asyncio.get_running_loop()
+    try:
+        future = _workers.submit(_with_deadline, timeout, fn, *args, **kwargs)
+    except BaseException:
+        limiter.release(client)
+        raise
+
+    def done(_):
+        try:
+            loop.call_soon_threadsafe(limiter.release, client)
+        except RuntimeError:
+            pass  # the event loop has already shut down
+
+    future.add_done_callback(done)
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"Timed out after {timeout:.0f}s.")
+
+class PlanRequest(BaseModel):
+    area: str
+    interests: List[str]
+    coordinates: Optional[str] = None
+    compact: bool = False
+    # Reuse searches and revise the itinerary of earlier plans with this id.
+    session_id: Optional[str] = None
+    # Search profile: fast, balanced or thorough (default SEARCH_PROFILE).
+    profile: Optional[str] = None
+
+class SearchRequest(BaseModel):
+    query: str
+    lat: float
+    lon: float
+    profile: Optional[str] = None
+
+class ExportRequest(BaseModel):
+    itinerary: Optional[str] = None
+    items: Optional[List[Dict[str, str]]] = None
+    summary: str = ""
+
+@app.get("/health")
+async def health():
+    return {
+        "status": "ok",
+        "response_cache": response_cache.stats(),
+        "rejections": rejection_cache.stats(),
+        "circuits": breaker_stats(),
+    }
+
+@app.post("/plan")
+async def plan(body: PlanRequest, request: Request):
+    coordinates = body.coordinates or AREAS.get(body.area)
+    if not coordinates:
+        raise HTTPException(status_code=400, detail=f"Unknown area '{body.area}'; pass coordinates.")
+
+    itinerary = await run_blocking(client_id(request), PLAN_TIMEOUT, plan_itinerary, body.area, coordinates, body.interests,
+                                   body.compact, session_id=body.session_id, profile=body.profile)
+
+    items, summary = parse_markdown_itinerary(itinerary)
+    return {"itinerary": itinerary, "items": items, "summary": summary}
+
+@app.post("/search")
+async def search(body: SearchRequest, request: Request):
+    places = await run_blocking(client_id(request), SEARCH_TIMEOUT, search_places_with_profile, body.query, body.lat, body.lon, profile=body.profile)
+    return {"places": places}
+
+def _export_items(body: ExportRequest):
+    if body.items is not None:
+        return body.items, body.summary
+    if body.itinerary:
+        items, summary = parse_markdown_itinerary(body.itinerary)
+        return items, body.summary or summary
+    raise HTTPException(status_code=400, detail="Pass either 'items' or 'itinerary' markdown.")
+
+@app.post("/export/ics")
+async def export_ics(body: ExportRequest, request: Request):
+    items, _ = _export_items(body)
+    ics = await run_blocking(client_id(request), EXPORT_TIMEOUT, create_ics_file, items)
+    return Response(content=ics, media_type="text/calendar",
+                    headers={"Content-Disposition": "attachment; filename=itinerary.ics"})
+
+@app.post("/export/pdf")
+async def export_pdf(body: ExportRequest, request: Request):
+    items, summary = _export_items(body)
+    pdf = await run_blocking(client_id(request), EXPORT_TIMEOUT, create_pdf_file, items, summary or "Your custom itinerary generated by Local Discovery AI.")
+    return Response(content=pdf, media_type="application/pdf",
+                    headers={"Content-Disposition": "attachment; filename=itinerary.pdf"})
+
+if __name__ == "__main__":
+    uvicorn.run(
+        "server:app",
+        host=os.getenv("API_HOST", "0.0.0.0"),
+        port=int(os.getenv("API_PORT", "8000")),
+        workers=int(os.getenv("API_WORKERS", "1"))
+    )
@@ -0,0 +1,67 @@
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from tools.cache import TTLCache
+
+# Idle seconds after which a session's candidates and itinerary are dropped.
+SESSION_TTL = int(os.getenv("PLAN_SESSION_TTL", str(2 * 3600)))
+MAX_SESSIONS = 1000
+
+class PlanSession:
+    """
+    What one user's last plan was built from: the search results per
+    interest and the itinerary, so the next plan only searches for added
+    interests and revises the previous itinerary instead of starting over.
+    settings holds the other options the plan was made with (search
+    profile, compact, fast path); changing any of them starts a new session.
+    """
+
+    def __init__(self, area: str, coordinates: str, settings: Tuple = ()):
+        self.area = area
+        self.coordinates = coordinates
+        self.settings = settings
+        self.candidates: Dict[str, List[Dict]] = {}
+        self.interests: List[str] = []
+        self.itinerary: Optional[str] = None
+        self.lock = threading.Lock()
+
+    def changes(self, interests: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        (added, removed) interests relative to the last plan.
+        """
+        added = [i for i in interests if i not in self.candidates]
+        removed = [i for i in self.interests if i not in interests]
+        return added, removed
+
+    def update(self, interests: List[str], itinerary: str):
+        """
+        Remember a finished plan and drop candidates of removed interests.
+        """
+        self.candidates = {i: r for i, r in self.candidates.items() if i in interests}
+        self.interests = list(interests)
+        self.itinerary = itinerary
+
+_sessions = TTLCache(ttl=SESSION_TTL, max_entries=MAX_SESSIONS)
+_sessions_lock = threading.Lock()
+
+def plan_session(session_id: str, area: str, coordinates: str, settings: Tuple = ()) -> PlanSession:
+    """
+    The session for session_id, started afresh when the area or any of the
+    settings changed.
+    """
+    with _sessions_lock:
+        session = _sessions.get(session_id)
+        if session is None or (session.area, session.coordinates, session.settings) != (area, coordinates, settings):
+            session = PlanSession(area, coordinates, settings)
+        # Setting again on every plan keeps active sessions from expiring.
+        _sessions.set(session_id, session)
+        return session
+
+def has_plan(session_id: str) -> bool:
+    """
+    True if session_id has an itinerary its next plan would revise.
+    """
+    with _sessions_lock:
+        session = _sessions.get(session_id)
+    return session is not None and session.itinerary is not None
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the app's root modules (agent, routing, ...) and the tools package.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,56 @@
+import numpy as np
+
+from tools.areas import KM_PER_DEG_LAT, Area, load_areas
+
+LAT, LON = 12.95, 77.60
+D = 0.01  # ~1.1 km
+
+def ring(lat, lon, half):
+    return [[lon - half, lat - half], [lon + half, lat - half], [lon + half, lat + half], [lon - half, lat + half], [lon - half, lat - half]]
+
+def square(hole=False):
+    polygon = [ring(LAT, LON, D)]
+    if hole:
+        polygon.append(ring(LAT, LON, D / 2))
+    return Area("Test", "Bengaluru", (LAT, LON), [polygon])
+
+def test_inside_and_outside_without_buffer():
+    area = square()
+    lats = [LAT, LAT + 0.9 * D, LAT + 1.1 * D, LAT, LAT - 2 * D]
+    lons = [LON, LON - 0.9 * D, LON, LON + 1.1 * D, LON]
+    assert area.contains(lats, lons, buffer_km=0).tolist() == [True, True, False, False, False]
+
+def test_hole_is_outside():
+    area = square(hole=True)
+    assert not area.contains_point(LAT, LON, buffer_km=0)
+    assert area.contains_point(LAT + 0.75 * D, LON, buffer_km=0)
+
+def test_buffer_admits_points_near_the_edge():
+    area = square()
+    just_outside = LAT + D + 0.3 / KM_PER_DEG_LAT  # 0.3 km north of the edge
+    assert not area.contains_point(just_outside, LON, buffer_km=0)
+    assert area.contains_point(just_outside, LON, buffer_km=0.5)
+    assert not area.contains_point(just_outside, LON, buffer_km=0.2)
+
+def test_multipolygon_parts():
+    other = ring(LAT + 5 * D, LON + 5 * D, D)
+    area = Area("Two", "Bengaluru", (LAT, LON), [[ring(LAT, LON, D)], [other]])
+    assert area.contains([LAT, LAT + 5 * D, LAT + 2.5 * D], [LON, LON + 5 * D, LON + 2.5 * D], buffer_km=0).tolist() == [True, True, False]
+
+def test_bbox_precheck_matches_full_test():
+    area = square(hole=True)
+    rng = np.random.default_rng(0)
+    lats = LAT + rng.uniform(-3 * D, 3 * D, 500)
+    lons = LON + rng.uniform(-3 * D, 3 * D, 500)
+    inside = area.contains(lats, lons, buffer_km=0.2)
+    assert not (inside & ~area.in_bbox(lats, lons, buffer_km=0.2)).any()
+    assert inside.any() and not inside.all()
+
+def test_area_without_outline_contains_everything():
+    area = Area("Centroid only", "Bengaluru", (LAT, LON))
+    assert not area.has_geofence
+    assert area.contains([0.0, LAT], [0.0, LON]).all()
+
+def test_bundled_areas_contain_their_centroids():
+    for area in load_areas().values():
+        assert area.contains_point(*area.centroid, buffer_km=0), area.name
@@ -0,0 +1,149 @@
+import time
+
+import pytest
+import requests
+
+from tools import http
+from tools.breaker import CircuitBreaker, CircuitOpenError
+from tools.http import DeadlineExceeded, deadline_scope
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    return clock
+
+def fail(breaker, times):
+    for _ in range(times):
+        breaker.before_call()
+        breaker.record_failure()
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("test", failures=3, reset_after=30)
+    fail(breaker, 2)
+    breaker.before_call()
+    breaker.record_success()
+    fail(breaker, 2)
+    assert breaker.state == "closed"
+    fail(breaker, 1)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.stats() == {"state": "open", "consecutive_failures": 3, "rejected": 1}
+
+def test_half_open_lets_one_trial_through(clock):
+    breaker = CircuitBreaker("test", failures=1, reset_after=30)
+    fail(breaker, 1)
+    clock.now += 29
+    assert breaker.state == "open"
+    clock.now += 1
+    assert breaker.state == "half-open"
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+def test_trial_success_closes_and_failure_reopens(clock):
+    breaker = CircuitBreaker("test", failures=1, reset_after=30)
+    fail(breaker, 1)
+    clock.now += 30
+    fail(breaker, 1)
+    assert breaker.state == "open"
+    clock.now += 29
+    assert breaker.state == "open"
+    clock.now += 1
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+def test_release_frees_the_trial_without_judging_it(clock):
+    breaker = CircuitBreaker("test", failures=1, reset_after=30)
+    fail(breaker, 1)
+    clock.now += 30
+    breaker.before_call()
+    breaker.release()
+    assert breaker.state == "half-open"
+    breaker.before_call()
+
+class FakeResponse:
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+
+class FakeSession:
+    def __init__(self, result):
+        self.result = result
+        self.timeouts = []
+
+    def get(self, url, params=None, timeout=None):
+        self.timeouts.append(timeout)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+@pytest.fixture
+def upstream(monkeypatch, clock):
+    """
+    Point http.get at a fake session and a fresh breaker; returns a function
+    setting what the session answers.
+    """
+    breaker = CircuitBreaker("upstream", failures=1, reset_after=30)
+    monkeypatch.setattr(http, "get_breaker", lambda name: breaker)
+
+    def answer(result):
+        session = FakeSession(result)
+        monkeypatch.setattr(http, "get_session", lambda: session)
+        return session, breaker
+
+    return answer
+
+def test_timeout_is_capped_by_the_deadline(upstream, clock):
+    session, breaker = upstream(FakeResponse())
+    http.get("upstream", "https://example.test", {}, timeout=8)
+    with deadline_scope(3):
+        clock.now += 1
+        http.get("upstream", "https://example.test", {}, timeout=8)
+    with deadline_scope(20):
+        http.get("upstream", "https://example.test", {}, timeout=8)
+    assert session.timeouts == [8, 2, 8]
+    assert breaker.state == "closed"
+
+def test_no_call_once_the_deadline_has_passed(upstream, clock):
+    session, breaker = upstream(FakeResponse())
+    with deadline_scope(1):
+        clock.now += 1
+        with pytest.raises(DeadlineExceeded):
+            http.get("upstream", "https://example.test", {})
+    assert session.timeouts == []
+
+def test_capped_timeout_is_not_an_endpoint_failure(upstream, clock):
+    session, breaker = upstream(requests.exceptions.ReadTimeout())
+    with deadline_scope(2):
+        with pytest.raises(requests.exceptions.Timeout):
+            http.get("upstream", "https://example.test", {}, timeout=8)
+    assert breaker.state == "closed"
+
+    with pytest.raises(requests.exceptions.Timeout):
+        http.get("upstream", "https://example.test", {}, timeout=8)
+    assert breaker.state == "open"
+
+def test_capped_timeout_releases_a_trial(upstream, clock):
+    session, breaker = upstream(FakeResponse(503))
+    http.get("upstream", "https://example.test", {})
+    assert breaker.state == "open"
+    clock.now += 30
+
+    upstream(requests.exceptions.ReadTimeout())
+    with deadline_scope(2):
+        with pytest.raises(requests.exceptions.Timeout):
+            http.get("upstream", "https://example.test", {}, timeout=8)
+    assert breaker.state == "half-open"
+    upstream(FakeResponse())
+    http.get("upstream", "https://example.test", {})
+    assert breaker.state == "closed"
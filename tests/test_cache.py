@@ -0,0 +1,144 @@
+import fnmatch
+import socket
+import threading
+import time
+
+import pytest
+
+from tools import cache
+from tools.cache import RedisBackend, decode_value, encode_value
+
+class RespStandIn:
+    """
+    Just enough of a Redis server for RedisBackend: AUTH, SELECT, GET,
+    SET ... PX, SCAN and DEL over RESP, one thread per connection.
+    """
+
+    def __init__(self, password=None):
+        self.password = password
+        self.data = {}
+        self.commands = []
+        self.connections = 0
+        self._server = socket.create_server(("127.0.0.1", 0))
+        self.port = self._server.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def close(self):
+        self._server.close()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        reader = conn.makefile("rb")
+        authed = self.password is None
+        with conn:
+            while True:
+                header = reader.readline()
+                if not header:
+                    return
+                args = []
+                for _ in range(int(header[1:-2])):
+                    length = int(reader.readline()[1:-2])
+                    args.append(reader.read(length + 2)[:-2])
+                command = args[0].decode().upper()
+                self.commands.append(command)
+                if command == "AUTH":
+                    authed = args[1].decode() == self.password
+                    conn.sendall(b"+OK\r\n" if authed else b"-WRONGPASS invalid password\r\n")
+                elif not authed:
+                    conn.sendall(b"-NOAUTH Authentication required\r\n")
+                else:
+                    conn.sendall(self._reply(command, args[1:]))
+
+    def _reply(self, command, args):
+        now = time.time()
+        if command == "SELECT":
+            return b"+OK\r\n"
+        if command == "SET":
+            expires_at = now + int(args[3]) / 1000 if len(args) > 3 and args[2].upper() == b"PX" else None
+            self.data[args[0]] = (args[1], expires_at)
+            return b"+OK\r\n"
+        if command == "GET":
+            value, expires_at = self.data.get(args[0], (None, None))
+            if value is None or (expires_at is not None and expires_at <= now):
+                return b"$-1\r\n"
+            return b"$%d\r\n%s\r\n" % (len(value), value)
+        if command == "SCAN":
+            keys = [k for k in self.data if fnmatch.fnmatchcase(k.decode(), args[2].decode())]
+            return b"*2\r\n$1\r\n0\r\n*%d\r\n" % len(keys) + b"".join(b"$%d\r\n%s\r\n" % (len(k), k) for k in keys)
+        if command == "DEL":
+            removed = sum(self.data.pop(k, None) is not None for k in args)
+            return b":%d\r\n" % removed
+        return b"-ERR unknown command\r\n"
+
+@pytest.fixture
+def server():
+    stand_in = RespStandIn(password="secret")
+    yield stand_in
+    stand_in.close()
+
+def test_encode_roundtrip_compresses_large_values():
+    small = {"name": "Cubbon Park"}
+    large = [{"name": f"Place {i}", "address": "MG Road, Bengaluru"} for i in range(50)]
+    assert encode_value(small)[:1] == b"j"
+    assert encode_value(large)[:1] == b"z"
+    assert decode_value(encode_value(small)) == small
+    assert decode_value(encode_value(large)) == large
+
+def test_set_get_with_auth_and_select(server):
+    backend = RedisBackend(f"redis://:secret@127.0.0.1:{server.port}/2")
+    value = [{"name": f"Place {i}"} for i in range(100)]
+    backend.set("places", "k1", value, ttl=60)
+    assert backend.get("places", "k1") == value
+    assert backend.get("places", "missing") is None
+    assert server.commands[:3] == ["AUTH", "SELECT", "SET"]
+    assert server.connections == 1
+
+def test_px_expiry(server):
+    backend = RedisBackend(f"redis://:secret@127.0.0.1:{server.port}/0")
+    backend.set("autocomplete", "k", {"x": 1}, ttl=0.05)
+    assert backend.get("autocomplete", "k") == {"x": 1}
+    time.sleep(0.1)
+    assert backend.get("autocomplete", "k") is None
+
+def test_clear_only_touches_its_namespace(server):
+    backend = RedisBackend(f"redis://:secret@127.0.0.1:{server.port}/0")
+    backend.set("places", "a", 1, ttl=60)
+    backend.set("places", "b", 2, ttl=60)
+    backend.set("itinerary", "a", 3, ttl=60)
+    backend.clear("places")
+    assert backend.get("places", "a") is None
+    assert backend.get("places", "b") is None
+    assert backend.get("itinerary", "a") == 3
+
+def test_auth_error_misses_and_backs_off(server, monkeypatch):
+    backend = RedisBackend(f"redis://:wrong@127.0.0.1:{server.port}/0")
+    assert backend.get("places", "k") is None
+    backend.set("places", "k", 1, ttl=60)
+    # Within REDIS_RETRY_AFTER nothing is sent at all.
+    assert server.connections == 1
+    assert server.commands == ["AUTH"]
+
+    monkeypatch.setattr(cache, "REDIS_RETRY_AFTER", 0)
+    backend._down_until = 0
+    backend.password = "secret"
+    backend.set("places", "k", 1, ttl=60)
+    assert backend.get("places", "k") == 1
+
+def test_unreachable_server_misses_and_backs_off(monkeypatch):
+    with socket.create_server(("127.0.0.1", 0)) as probe:
+        port = probe.getsockname()[1]
+    backend = RedisBackend(f"redis://127.0.0.1:{port}/0")
+    started = time.monotonic()
+    assert backend.get("places", "k") is None
+    backend.set("places", "k", 1, ttl=60)
+    assert backend.get("places", "k") is None
+    assert backend._down_until > time.time()
+    assert time.monotonic() - started < 2
@@ -0,0 +1,96 @@
+import os
+import threading
+
+import jobs
+from jobs import JobQueue
+
+def make_queue(tmp_path, worker, **kwargs):
+    return JobQueue(worker, max_workers=2, store_dir=str(tmp_path), **kwargs)
+
+def test_identical_payloads_join_one_job(tmp_path):
+    release = threading.Event()
+    calls = []
+
+    def worker(**payload):
+        calls.append(payload)
+        release.wait(5)
+        return "itinerary"
+
+    queue = make_queue(tmp_path, worker)
+    first = queue.submit({"area": "Koramangala", "interests": ["Parks"]})
+    second = queue.submit({"interests": ["Parks"], "area": "Koramangala"})
+    other = queue.submit({"area": "Indiranagar", "interests": ["Parks"]})
+    assert first == second != other
+    release.set()
+    assert queue.wait(first, 5)["result"] == "itinerary"
+    assert queue.wait(other, 5)["status"] == "done"
+    assert len(calls) == 2
+
+def test_session_id_only_shared_for_sessions_without_a_plan(tmp_path):
+    release = threading.Event()
+    planned = {"returning"}
+
+    def worker(**payload):
+        release.wait(5)
+        return "itinerary"
+
+    queue = make_queue(tmp_path, worker, session_has_plan=lambda session_id: session_id in planned)
+    plan = {"area": "Koramangala", "interests": ["Parks"]}
+    first = queue.submit(dict(plan, session_id="a"))
+    assert queue.submit(dict(plan, session_id="b")) == first
+    assert queue.submit(dict(plan, session_id="returning")) != first
+    assert queue.submit(dict(plan, session_id="c", profile_id="p1")) != first
+    release.set()
+
+def test_session_id_counts_without_session_has_plan(tmp_path):
+    release = threading.Event()
+    queue = make_queue(tmp_path, lambda **payload: release.wait(5))
+    first = queue.submit({"a": 1, "session_id": "x"})
+    assert queue.submit({"a": 1, "session_id": "y"}) != first
+    release.set()
+
+def test_finished_job_is_not_joined(tmp_path):
+    queue = make_queue(tmp_path, lambda **payload: "ok")
+    first = queue.submit({"a": 1})
+    queue.wait(first, 5)
+    assert queue.submit({"a": 1}) != first
+
+def test_failed_job_records_error_and_releases_key(tmp_path):
+    def worker(**payload):
+        raise RuntimeError("no places")
+
+    queue = make_queue(tmp_path, worker)
+    job_id = queue.submit({"a": 1})
+    job = queue.wait(job_id, 5)
+    assert (job["status"], job["error"]) == ("failed", "no places")
+    assert queue.submit({"a": 1}) != job_id
+
+def test_unwritable_result_does_not_wedge_the_key(tmp_path):
+    queue = make_queue(tmp_path, lambda **payload: object())
+    job_id = queue.submit({"a": 1})
+    assert queue.wait(job_id, 5)["status"] == "done"
+    assert queue.submit({"a": 1}) != job_id
+
+def test_job_is_read_back_from_disk(tmp_path):
+    queue = make_queue(tmp_path, lambda **payload: "ok")
+    job_id = queue.submit({"a": 1})
+    queue.wait(job_id, 5)
+    assert make_queue(tmp_path, lambda **payload: None).get(job_id)["result"] == "ok"
+
+def test_finished_jobs_and_files_are_evicted(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(jobs.time, "time", lambda: now[0])
+    stale = tmp_path / "left-by-an-earlier-run.json"
+    stale.write_text("{}")
+    os.utime(stale, (0, 0))
+
+    queue = make_queue(tmp_path, lambda **payload: "ok", ttl=60)
+    job_id = queue.submit({"a": 1})
+    queue.wait(job_id, 5)
+    assert not stale.exists()
+    assert (tmp_path / f"{job_id}.json").exists()
+
+    now[0] += 61
+    queue.submit({"a": 2})
+    assert queue.get(job_id) is None
+    assert not (tmp_path / f"{job_id}.json").exists()
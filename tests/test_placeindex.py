@@ -0,0 +1,48 @@
+import json
+import time
+
+from tools.placeindex import PlaceIndex
+
+LAT, LON = 12.97, 77.64
+DAY = 24 * 3600
+
+def place(place_id, name, at, lat=LAT, lon=LON, categories=("park",)):
+    return {"place_id": place_id, "name": name, "address": "Indiranagar", "lat": lat, "lon": lon,
+            "rating": 4.5, "categories": list(categories), "at": at}
+
+def write_index(path, *places):
+    path.write_text(json.dumps({"places": {p["place_id"]: p for p in places}}))
+
+def stored(path):
+    return set(json.loads(path.read_text())["places"])
+
+def test_expired_places_dropped_on_load(tmp_path):
+    path = tmp_path / "index.json"
+    now = time.time()
+    write_index(path, place("old", "Old Park", now - 40 * DAY), place("new", "New Park", now))
+    index = PlaceIndex(str(path), max_age=30 * DAY)
+    assert len(index) == 1
+    assert [p["place_id"] for p in index.search("Parks", LAT, LON, 2, max_age=0)] == ["new"]
+    index.flush()
+    assert stored(path) == {"new"}
+
+def test_save_evicts_expired_rows_and_keeps_index_consistent(tmp_path):
+    path = tmp_path / "index.json"
+    index = PlaceIndex(str(path), max_age=30 * DAY)
+    index.add("Parks", [{"place_id": "a", "name": "Cubbon Park", "lat": LAT, "lon": LON}])
+    index.add("Parks", [{"place_id": "b", "name": "Lalbagh Park", "lat": LAT + 0.001, "lon": LON}])
+    # Another process wrote an expired place; "a" has aged out since it was added.
+    write_index(path, place("stale", "Stale Park", time.time() - 40 * DAY))
+    index._places["a"] = dict(index._places["a"], at=time.time() - 40 * DAY)
+    index.flush()
+
+    assert stored(path) == {"b"}
+    assert len(index) == 1
+    assert [p["place_id"] for p in index.search("Parks", LAT, LON, 2, max_age=0)] == ["b"]
+    index.add("Parks", [{"place_id": "c", "name": "Bugle Rock Park", "lat": LAT, "lon": LON + 0.001}])
+    assert {p["place_id"] for p in index.search("Parks", LAT, LON, 2)} == {"b", "c"}
+
+def test_max_age_zero_keeps_everything(tmp_path):
+    path = tmp_path / "index.json"
+    write_index(path, place("old", "Old Park", time.time() - 400 * DAY))
+    assert len(PlaceIndex(str(path), max_age=0)) == 1
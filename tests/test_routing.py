@@ -0,0 +1,54 @@
+import routing
+from routing import model_route, recording_search, validate_itinerary
+
+PLACES = [
+    {"name": "Cubbon Park", "place_id": "a"},
+    {"name": "Truffles - Koramangala", "place_id": "b"},
+    {"name": "Lalbagh Botanical Garden", "place_id": "c"},
+]
+
+def itinerary(*names):
+    stops = "\n".join(f"### {name}\n*Somewhere, Bengaluru*\n🕒 10:00 AM - 11:00 AM\nNice.\n" for name in names)
+    return f"## Your Day\n\n{stops}\n📝 Summary\nA good day."
+
+def test_valid_itinerary_passes():
+    assert validate_itinerary(itinerary("Cubbon Park", "Truffles - Koramangala"), PLACES) == []
+
+def test_names_match_loosely():
+    # Punctuation, case, a city suffix and small spelling differences are fine.
+    assert validate_itinerary(itinerary("cubbon park", "Truffles, Koramangala", "Lalbagh Botanical Garden, Bengaluru"), PLACES) == []
+
+def test_invented_place_fails():
+    problems = validate_itinerary(itinerary("Cubbon Park", "Imaginary Rooftop Bar"), PLACES)
+    assert problems == ["places not returned by search_places: Imaginary Rooftop Bar"]
+
+def test_short_names_are_not_matched_by_containment():
+    assert validate_itinerary(itinerary("Park"), PLACES) != []
+
+def test_unparseable_output_fails():
+    assert validate_itinerary("Sorry, I could not find anything.", PLACES) == ["no itinerary items could be parsed"]
+    assert validate_itinerary(None, PLACES) == ["no itinerary items could be parsed"]
+
+def test_revision_may_keep_previous_places():
+    previous = itinerary("Vidhana Soudha")
+    assert validate_itinerary(itinerary("Vidhana Soudha", "Cubbon Park"), PLACES, previous) == []
+    assert validate_itinerary(itinerary("Vidhana Soudha"), PLACES) != []
+
+def test_recording_search_keeps_tool_schema_and_records_results():
+    def search_places(query: str, lat: float, lon: float):
+        """
+        Searches for places.
+        """
+        return PLACES[:1]
+
+    returned = []
+    tool = recording_search(search_places, returned)
+    assert tool.__name__ == "search_places" and "Searches for places" in tool.__doc__
+    assert tool("Parks in Koramangala", 12.93, 77.62) == PLACES[:1]
+    assert returned == PLACES[:1]
+
+def test_model_route(monkeypatch):
+    monkeypatch.setattr(routing, "ESCALATION_MODEL_ID", "large")
+    assert model_route() == [routing.MODEL_ID, "large"]
+    monkeypatch.setattr(routing, "ESCALATION_MODEL_ID", "")
+    assert model_route() == [routing.MODEL_ID]
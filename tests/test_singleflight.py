@@ -0,0 +1,121 @@
+import threading
+import time
+
+import pytest
+
+from tools.batch import SharedLookup
+from tools.http import DeadlineExceeded, deadline_scope
+from tools.singleflight import SingleFlight
+
+def run_concurrently(n, target):
+    """
+    Start n threads running target(i) together; return their results by i.
+    """
+    results = [None] * n
+    start = threading.Barrier(n)
+
+    def run(i):
+        start.wait()
+        try:
+            results[i] = target(i)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    def slow(x):
+        calls.append(x)
+        time.sleep(0.1)
+        return x * 2
+
+    assert run_concurrently(5, lambda i: flight.do("k", slow, 21)) == [42] * 5
+    assert len(calls) == 1
+    assert (flight.executed, flight.coalesced) == (1, 4)
+
+def test_nothing_is_kept_after_the_call():
+    flight = SingleFlight()
+    assert flight.do("k", lambda: 1) == 1
+    assert flight.do("k", lambda: 2) == 2
+    assert flight.executed == 2
+
+def test_followers_share_the_leaders_error():
+    flight = SingleFlight()
+
+    def fail():
+        time.sleep(0.1)
+        raise ValueError("boom")
+
+    results = run_concurrently(3, lambda i: flight.do("k", fail))
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flight.executed == 1
+
+def test_follower_with_time_left_retries_after_leaders_deadline():
+    flight = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.15)
+        # What tools.http.get raises once the caller's budget is spent.
+        if len(calls) == 1:
+            raise DeadlineExceeded("No time left")
+        return "ok"
+
+    def leader():
+        with deadline_scope(0.1):
+            return flight.do("k", fetch)
+
+    def follower():
+        time.sleep(0.03)
+        with deadline_scope(5):
+            return flight.do("k", fetch)
+
+    results = run_concurrently(2, lambda i: leader() if i == 0 else follower())
+    assert isinstance(results[0], DeadlineExceeded)
+    assert results[1] == "ok"
+    assert len(calls) == 2
+
+def test_follower_with_earlier_deadline_gets_the_error():
+    flight = SingleFlight()
+
+    def fetch():
+        time.sleep(0.15)
+        raise DeadlineExceeded("No time left")
+
+    def leader():
+        with deadline_scope(0.1):
+            return flight.do("k", fetch)
+
+    def follower():
+        time.sleep(0.03)
+        with deadline_scope(0.05):
+            return flight.do("k", fetch)
+
+    results = run_concurrently(2, lambda i: leader() if i == 0 else follower())
+    assert all(isinstance(r, DeadlineExceeded) for r in results)
+
+def test_shared_lookup_memoizes_results_but_not_deadline_failures():
+    calls = []
+
+    def lookup(place_id):
+        calls.append(place_id)
+        if len(calls) == 1:
+            raise DeadlineExceeded("No time left")
+        return {"place_id": place_id}
+
+    shared = SharedLookup(lookup)
+    with pytest.raises(DeadlineExceeded):
+        shared("p1")
+    assert shared("p1") == {"place_id": "p1"}
+    assert shared("p1") == {"place_id": "p1"}
+    assert calls == ["p1", "p1"]
+    assert (shared.executed, shared.coalesced) == (2, 1)
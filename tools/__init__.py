@@ -0,0 +1,11 @@
+"""
+Place search, routing and caching for the Local Discovery Agent.
+
+This package is the single home of the provider clients (olamaps,
+geoapify), the compiled search rules (rules), the shared HTTP session
+(http) and the process-wide caches, pools and learned statistics that
+hang off them. Import these modules as ``tools.<name>``; the root-level
+olamaps.py and geoapify.py are aliases of the same module objects.
+
+Submodules are not imported here, so ``import tools`` stays cheap.
+"""
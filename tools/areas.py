@@ -0,0 +1,177 @@
+import json
+import math
+import os
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Area outlines as a GeoJSON FeatureCollection of Polygon/MultiPolygon
+# features with "name", "city" and "centroid" ([lat, lon]) properties.
+AREAS_GEOJSON = os.getenv("AREAS_GEOJSON", os.path.join(os.path.dirname(__file__), "areas.geojson"))
+# Drop places outside the area a search names. Off by default: the bundled
+# outlines are rough placeholders, not surveyed boundaries, so set
+# AREA_GEOFENCE=1 only with real outlines in AREAS_GEOJSON.
+AREA_GEOFENCE = os.getenv("AREA_GEOFENCE", "0") == "1"
+# Places this far outside an area's outline still count as inside it.
+GEOFENCE_BUFFER_KM = float(os.getenv("GEOFENCE_BUFFER_KM", "0.5"))
+
+# Used when the GeoJSON file is missing: centroids only, no geofences.
+DEFAULT_AREAS = {
+    "Koramangala": "12.9352,77.6245",
+    "Indiranagar": "12.9719,77.6412",
+    "MG Road": "12.9756,77.6066",
+    "Whitefield": "12.9698,77.7500",
+    "Jayanagar": "12.9308,77.5838",
+    "Malleshwaram": "13.0031,77.5643",
+    "HSR Layout": "12.9121,77.6446"
+}
+
+KM_PER_DEG_LAT = 110.57
+KM_PER_DEG_LON_EQUATOR = 111.32
+
+_AREA_IN_QUERY = re.compile(r"^.*\s(?:in|near|around)\s+(.+)$", re.IGNORECASE)
+
+class Area:
+    """
+    A named area with an optional polygon geofence. Rings are projected to
+    km around the centroid once, so membership tests for a batch of points
+    are a few numpy operations.
+    """
+
+    def __init__(self, name: str, city: str, centroid: Tuple[float, float], polygons: Sequence[Sequence[Sequence[Sequence[float]]]] = ()):
+        self.name = name
+        self.city = city
+        self.centroid = centroid
+        self._km_per_deg_lon = KM_PER_DEG_LON_EQUATOR * math.cos(math.radians(centroid[0]))
+        # Each polygon is [exterior, *holes]; each ring a (k, 2) array of km offsets.
+        self.polygons: List[List[np.ndarray]] = [
+            [self._project(np.asarray(ring, dtype=float)[:, 1], np.asarray(ring, dtype=float)[:, 0]).T for ring in polygon]
+            for polygon in polygons
+        ]
+        self.bbox: Optional[Tuple[float, float, float, float]] = None
+        if polygons:
+            points = np.concatenate([np.asarray(polygon[0], dtype=float) for polygon in polygons])
+            self.bbox = (points[:, 1].min(), points[:, 0].min(), points[:, 1].max(), points[:, 0].max())
+
+    @property
+    def has_geofence(self) -> bool:
+        return bool(self.polygons)
+
+    def _project(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        return np.stack([(lons - self.centroid[1]) * self._km_per_deg_lon, (lats - self.centroid[0]) * KM_PER_DEG_LAT])
+
+    def in_bbox(self, lats: Sequence[float], lons: Sequence[float], buffer_km: float = GEOFENCE_BUFFER_KM) -> np.ndarray:
+        """
+        Cheap pre-check: True for points inside the outline's bounding box
+        grown by buffer_km. Always True without a geofence.
+        """
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        if self.bbox is None:
+            return np.ones(lats.shape, dtype=bool)
+        lat_pad = buffer_km / KM_PER_DEG_LAT
+        lon_pad = buffer_km / self._km_per_deg_lon
+        min_lat, min_lon, max_lat, max_lon = self.bbox
+        return (lats >= min_lat - lat_pad) & (lats <= max_lat + lat_pad) & (lons >= min_lon - lon_pad) & (lons <= max_lon + lon_pad)
+
+    def contains(self, lats: Sequence[float], lons: Sequence[float], buffer_km: float = GEOFENCE_BUFFER_KM) -> np.ndarray:
+        """
+        Boolean mask of points inside the outline or within buffer_km of it.
+        Points outside the bounding box are rejected before the polygon test.
+        """
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        inside = self.in_bbox(lats, lons, buffer_km)
+        if not self.polygons or not inside.any():
+            return inside
+        x, y = self._project(lats[inside], lons[inside])
+        x, y = x[:, None], y[:, None]
+        hit = np.zeros(x.shape[0], dtype=bool)
+        for exterior, *holes in self.polygons:
+            hit |= _ring_contains(exterior, x, y) & ~np.any([_ring_contains(hole, x, y) for hole in holes], axis=0)
+            if buffer_km > 0:
+                hit |= _ring_distance(exterior, x, y) <= buffer_km
+        inside[inside] = hit
+        return inside
+
+    def contains_point(self, lat: float, lon: float, buffer_km: float = GEOFENCE_BUFFER_KM) -> bool:
+        return bool(self.contains([lat], [lon], buffer_km)[0])
+
+def _ring_contains(ring: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    Even-odd rule for (n, 1) points against a closed (k, 2) ring.
+    """
+    xi, yi = ring[:, 0], ring[:, 1]
+    xj, yj = np.roll(xi, 1), np.roll(yi, 1)
+    straddles = (yi > y) != (yj > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crossing_x = xi + (y - yi) * (xj - xi) / (yj - yi)
+    return (np.count_nonzero(straddles & (x < crossing_x), axis=1) % 2) == 1
+
+def _ring_distance(ring: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    Distance in km from (n, 1) points to the nearest edge of a ring.
+    """
+    ax, ay = ring[:-1, 0], ring[:-1, 1]
+    dx, dy = ring[1:, 0] - ax, ring[1:, 1] - ay
+    length2 = np.maximum(dx * dx + dy * dy, 1e-12)
+    t = np.clip(((x - ax) * dx + (y - ay) * dy) / length2, 0.0, 1.0)
+    return np.hypot(x - (ax + t * dx), y - (ay + t * dy)).min(axis=1)
+
+def load_areas(path: str = AREAS_GEOJSON) -> Dict[str, Area]:
+    """
+    Read area outlines from GeoJSON. Falls back to DEFAULT_AREAS (without
+    geofences) if the file is missing or unreadable.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            features = json.load(f)["features"]
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ Could not load area outlines from {path} ({e}); using centroids only")
+        return {
+            name: Area(name, "Bengaluru", tuple(float(v) for v in coordinates.split(",")))
+            for name, coordinates in DEFAULT_AREAS.items()
+        }
+
+    areas = {}
+    for feature in features:
+        props = feature.get("properties", {})
+        geometry = feature.get("geometry") or {}
+        if geometry.get("type") == "Polygon":
+            polygons = [geometry["coordinates"]]
+        elif geometry.get("type") == "MultiPolygon":
+            polygons = geometry["coordinates"]
+        else:
+            polygons = []
+        if props.get("centroid"):
+            centroid = tuple(float(v) for v in props["centroid"])
+        else:
+            exterior = np.asarray(polygons[0][0], dtype=float)
+            centroid = (float(exterior[:, 1].mean()), float(exterior[:, 0].mean()))
+        areas[props["name"]] = Area(props["name"], props.get("city", ""), centroid, polygons)
+    return areas
+
+AREA_REGISTRY = load_areas()
+_AREAS_BY_LOWER_NAME = {name.lower(): area for name, area in AREA_REGISTRY.items()}
+
+# Popular Areas, as the "lat,lon" strings the app and agent pass around.
+AREAS = {name: f"{area.centroid[0]:.4f},{area.centroid[1]:.4f}" for name, area in AREA_REGISTRY.items()}
+
+def area_centroid(area: str) -> Tuple[float, float]:
+    """
+    (lat, lon) of a named area. Raises KeyError for unknown areas.
+    """
+    return AREA_REGISTRY[area].centroid
+
+def area_centroids() -> Dict[str, Tuple[float, float]]:
+    return {area: area_centroid(area) for area in AREAS}
+
+def area_in_query(query: str) -> Optional[Area]:
+    """
+    The known area a query like 'Parks in Koramangala' is about, if any.
+    """
+    match = _AREA_IN_QUERY.search(" ".join(query.split()))
+    if not match:
+        return None
+    return _AREAS_BY_LOWER_NAME.get(match.group(1).lower())
@@ -0,0 +1,120 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from tools.http import submit
+from tools.olamaps import _search_places, fetch_autocomplete, fetch_place_details, search_places_with_profile
+from tools.singleflight import SingleFlight
+
+# Workers for the agent's tool calls; the searches the model asks for in one
+# turn run side by side, up to this many at a time.
+AGENT_TOOL_WORKERS = int(os.getenv("AGENT_TOOL_WORKERS", "8"))
+_tool_pool = ThreadPoolExecutor(max_workers=AGENT_TOOL_WORKERS, thread_name_prefix="agent-tools")
+
+class SharedLookup(SingleFlight):
+    """
+    Memoize an upstream lookup for the lifetime of one batch.
+    Concurrent callers asking for the same arguments wait on a single request.
+    """
+
+    def __init__(self, fn: Callable):
+        super().__init__(keep=True)
+        self._fn = fn
+
+    def __call__(self, *args):
+        return self.do(args, self._fn, *args)
+
+def search_key(query: str, lat: float, lon: float) -> Tuple[str, float, float]:
+    """
+    Normalize a search so trivially different spellings share one upstream request.
+    """
+    return (" ".join(query.lower().split()), round(lat, 5), round(lon, 5))
+
+def batch_search_places(
+    searches: Iterable[Tuple[str, float, float]],
+    max_workers: int = 8,
+    profile: Optional[str] = None
+) -> Iterator[Tuple[str, float, float, List[Dict]]]:
+    """
+    Run search_places for many (query, lat, lon) pairs on a bounded worker pool.
+
+    Identical searches run once, and autocomplete/details lookups are shared
+    across every search in the batch, so overlapping place_ids are fetched once.
+    Results are yielded as (query, lat, lon, results) as each search completes;
+    duplicate input pairs are each yielded with the shared result.
+
+    Use itertools.product(queries, origins) to search every query at every origin.
+    """
+    pending: Dict[Tuple[str, float, float], List[Tuple[str, float, float]]] = {}
+    for query, lat, lon in searches:
+        pending.setdefault(search_key(query, lat, lon), []).append((query, lat, lon))
+
+    if not pending:
+        return
+
+    autocomplete = SharedLookup(fetch_autocomplete)
+    details = SharedLookup(fetch_place_details)
+    print(f"📦 Batch Search: {len(pending)} unique searches on {max_workers} workers")
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {}
+        for key, requested in pending.items():
+            query, lat, lon = requested[0]
+            future = submit(executor, _search_places, query, lat, lon, autocomplete, details, profile)
+            futures[future] = key
+
+        for future in as_completed(futures):
+            results = future.result()
+            for query, lat, lon in pending[futures[future]]:
+                yield query, lat, lon, results
+
+        print(f"✅ Batch Search done: {autocomplete.executed} autocomplete calls, {details.executed} details calls ({details.coalesced} shared)")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def prefetch_searches(
+    searches: Iterable[Tuple[str, float, float]],
+    max_workers: int = 8,
+    profile: Optional[str] = None
+) -> Dict[Tuple[str, float, float], List[Dict]]:
+    """
+    Run a batch of searches up front and return their results by normalized search.
+    """
+    return {search_key(query, lat, lon): results for query, lat, lon, results in batch_search_places(searches, max_workers, profile)}
+
+def make_prefetched_search_tool(
+    prefetched: Dict[Tuple[str, float, float], List[Dict]],
+    profile: Optional[str] = None
+) -> Callable[[str, float, float], List[Dict]]:
+    """
+    Build a search_places tool that answers prefetched searches from memory
+    and falls through to Ola Maps for anything else.
+    """
+    def search_places(query: str, lat: float, lon: float) -> List[Dict]:
+        """
+        Searches for places using Ola Maps API (Autocomplete) and fetches details.
+        """
+        results = prefetched.get(search_key(query, lat, lon))
+        if results is not None:
+            print(f"📦 Using prefetched results for '{query}'")
+            return results
+        return search_places_with_profile(query, lat, lon, profile)
+
+    return search_places
+
+def make_parallel_tool(fn: Callable) -> Callable[..., Awaitable]:
+    """
+    Wrap a blocking, thread-safe tool as a coroutine that runs fn on the
+    agent tool pool. Under Agent.arun every tool call of one model turn is
+    awaited together, so the calls run concurrently and their results go
+    back to the model in one round trip. Name, docstring and signature are
+    kept for the tool schema.
+    """
+    @functools.wraps(fn)
+    async def tool(*args, **kwargs):
+        return await asyncio.wrap_future(submit(_tool_pool, fn, *args, **kwargs))
+
+    return tool
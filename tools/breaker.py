@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+from typing import Dict
+
+import requests
+
+# Consecutive failures that open an endpoint's circuit.
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+# Seconds an open circuit fails fast before letting one trial call through.
+BREAKER_RESET = float(os.getenv("BREAKER_RESET", "30"))
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """
+    Raised instead of calling an endpoint whose circuit is open. A
+    RequestException, so callers' existing error handling covers it.
+    """
+
+class CircuitBreaker:
+    """
+    Stops calling an endpoint after BREAKER_FAILURES consecutive failures
+    (connection errors, timeouts, 5xx/429). After BREAKER_RESET seconds one
+    trial call is let through: success closes the circuit, failure opens it
+    for another period.
+    """
+
+    def __init__(self, name: str, failures: int = BREAKER_FAILURES, reset_after: float = BREAKER_RESET):
+        self.name = name
+        self.failures = failures
+        self.reset_after = reset_after
+        self._lock = threading.Lock()
+        self._consecutive = 0
+        self._opened_at = None
+        self._trial_running = False
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_after:
+                return "half-open"
+            return "open"
+
+    def before_call(self):
+        """
+        Raise CircuitOpenError unless the endpoint may be called now.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at >= self.reset_after and not self._trial_running:
+                self._trial_running = True
+                return
+            self.rejected += 1
+        raise CircuitOpenError(f"{self.name} circuit open after {self._consecutive} failures")
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                print(f"✅ {self.name} recovered; circuit closed")
+            self._consecutive = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive += 1
+            if self._trial_running or (self._opened_at is None and self._consecutive >= self.failures):
+                print(f"🔌 {self.name} failing ({self._consecutive} in a row); circuit open for {self.reset_after:g}s")
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+    def release(self):
+        """
+        End a call that says nothing about the endpoint's health, e.g. one
+        cut short by the caller's own deadline.
+        """
+        with self._lock:
+            self._trial_running = False
+
+    def stats(self) -> Dict:
+        state = self.state
+        with self._lock:
+            return {"state": state, "consecutive_failures": self._consecutive, "rejected": self.rejected}
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name: str) -> CircuitBreaker:
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
+
+def breaker_stats() -> Dict[str, Dict]:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.stats() for breaker in breakers}
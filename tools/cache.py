@@ -0,0 +1,383 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import urllib.parse
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+class TTLCache:
+    """
+    Thread-safe in-memory cache with per-entry expiry and LRU eviction.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 10_000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[0] >= time.monotonic()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+# --- Pluggable backends ---
+#
+# Caches shared between replicas (places, autocomplete, reverse geocode,
+# itineraries) go through get_cache(namespace), which stores them in the
+# backend chosen by CACHE_BACKEND:
+#   memory - per-process TTLCache (nothing shared; the default)
+#   disk   - SQLite file at CACHE_PATH, shared by processes on one host
+#   redis  - any Redis-protocol server at REDIS_URL, shared by every replica
+# The backend is only created, and its file or connection opened, on the
+# first cache lookup.
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_PATH = os.getenv("CACHE_PATH", os.path.join("data", "cache.sqlite3"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_TIMEOUT = 0.5
+# Seconds to treat Redis as down after a failed command before retrying.
+REDIS_RETRY_AFTER = 30
+REDIS_KEY_PREFIX = "lda"
+# Seconds to skip the SQLite cache after an error (locked, read-only, ...).
+DISK_RETRY_AFTER = 30
+
+# Default TTL in seconds per namespace; override with CACHE_TTL_<NAMESPACE>.
+NAMESPACE_TTLS = {
+    "places": 7 * 24 * 3600,
+    "autocomplete": 24 * 3600,
+    "reverse_geocode": 7 * 24 * 3600,
+    "itinerary": 24 * 3600,
+}
+DEFAULT_NAMESPACE_TTL = 24 * 3600
+
+# Serialized values at least this large are zlib-compressed.
+COMPRESS_THRESHOLD = 512
+
+def encode_value(value: Any) -> bytes:
+    """
+    Compact binary form of a JSON-serializable value: a one-byte tag
+    followed by minified JSON, zlib-compressed when that is smaller.
+    """
+    raw = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if len(raw) >= COMPRESS_THRESHOLD:
+        compressed = zlib.compress(raw, 6)
+        if len(compressed) < len(raw):
+            return b"z" + compressed
+    return b"j" + raw
+
+def decode_value(data: bytes) -> Any:
+    tag, body = data[:1], data[1:]
+    if tag == b"z":
+        body = zlib.decompress(body)
+    elif tag != b"j":
+        raise ValueError(f"Unknown cache encoding {tag!r}")
+    return json.loads(body.decode("utf-8"))
+
+class MemoryBackend:
+    """
+    One in-process TTLCache per namespace. Values are stored as-is.
+    """
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._caches: Dict[str, TTLCache] = {}
+        self._lock = threading.Lock()
+
+    def _cache(self, namespace: str) -> TTLCache:
+        with self._lock:
+            cache = self._caches.get(namespace)
+            if cache is None:
+                cache = self._caches[namespace] = TTLCache(NAMESPACE_TTLS.get(namespace, DEFAULT_NAMESPACE_TTL), self.max_entries)
+            return cache
+
+    def get(self, namespace: str, key: str) -> Any:
+        return self._cache(namespace).get(key)
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float):
+        self._cache(namespace).set(key, value, ttl)
+
+    def clear(self, namespace: str):
+        self._cache(namespace).clear()
+
+class DiskBackend:
+    """
+    SQLite-backed cache, safe for several processes on the same host.
+    Expired rows are ignored on read and purged every PURGE_EVERY writes.
+    The file is created on first use. Like RedisBackend, errors (a locked
+    database, a read-only disk) make reads miss and writes drop for
+    DISK_RETRY_AFTER seconds instead of failing the search.
+    """
+
+    PURGE_EVERY = 1000
+
+    def __init__(self, path: str = CACHE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        self._down_until = 0.0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, expires_at REAL NOT NULL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            self._local.conn = conn
+        return conn
+
+    def _execute(self, sql: str, params: tuple = ()) -> Optional[sqlite3.Cursor]:
+        if time.time() < self._down_until:
+            return None
+        try:
+            return self._conn().execute(sql, params)
+        except (sqlite3.Error, OSError) as e:
+            print(f"⚠️ Disk cache unavailable ({self.path}): {e}")
+            self._down_until = time.time() + DISK_RETRY_AFTER
+            return None
+
+    def get(self, namespace: str, key: str) -> Any:
+        cursor = self._execute(
+            "SELECT value FROM cache WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (namespace, key, time.time())
+        )
+        row = cursor.fetchone() if cursor is not None else None
+        try:
+            return decode_value(row[0]) if row else None
+        except (ValueError, zlib.error):
+            return None
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float):
+        cursor = self._execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (namespace, key, encode_value(value), time.time() + ttl)
+        )
+        if cursor is None:
+            return
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            self._execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+
+    def clear(self, namespace: str):
+        self._execute("DELETE FROM cache WHERE namespace = ?", (namespace,))
+
+class RedisBackend:
+    """
+    Minimal client for the Redis protocol (RESP), enough for GET/SET/DEL,
+    so any Redis-compatible server works without an extra dependency.
+    One connection per thread. If the server is unreachable, reads miss and
+    writes are dropped for REDIS_RETRY_AFTER seconds rather than failing or
+    slowing down the search.
+    """
+
+    def __init__(self, url: str = REDIS_URL, timeout: float = REDIS_TIMEOUT, prefix: str = REDIS_KEY_PREFIX):
+        parsed = urllib.parse.urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self.prefix = prefix
+        self._local = threading.local()
+        self._down_until = 0.0
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}:{namespace}:{key}"
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._local.sock = sock
+        self._local.reader = sock.makefile("rb")
+        if self.password:
+            self._send("AUTH", self.password)
+        if self.db:
+            self._send("SELECT", str(self.db))
+
+    def _disconnect(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self._local.sock = None
+
+    def _send(self, *args) -> Any:
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._local.sock.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def _read_reply(self) -> Any:
+        line = self._local.reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RuntimeError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = self._local.reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(body)
+            return None if count < 0 else [self._read_reply() for _ in range(count)]
+        raise ConnectionError(f"Unexpected reply {line!r}")
+
+    def _command(self, *args) -> Any:
+        if time.time() < self._down_until:
+            return None
+        try:
+            if getattr(self._local, "sock", None) is None:
+                self._connect()
+            return self._send(*args)
+        except (OSError, ConnectionError, RuntimeError) as e:
+            print(f"⚠️ Redis cache unavailable ({self.host}:{self.port}): {e}")
+            self._disconnect()
+            self._down_until = time.time() + REDIS_RETRY_AFTER
+            return None
+
+    def get(self, namespace: str, key: str) -> Any:
+        data = self._command("GET", self._key(namespace, key))
+        return decode_value(data) if data else None
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float):
+        self._command("SET", self._key(namespace, key), encode_value(value), "PX", int(ttl * 1000))
+
+    def clear(self, namespace: str):
+        # SCAN-based deletion is enough for a cache of this size.
+        cursor = "0"
+        while True:
+            reply = self._command("SCAN", cursor, "MATCH", self._key(namespace, "*"), "COUNT", 500)
+            if not reply:
+                return
+            cursor, keys = reply[0].decode(), reply[1]
+            if keys:
+                self._command("DEL", *keys)
+            if cursor == "0":
+                return
+
+BACKENDS = {
+    "memory": MemoryBackend,
+    "disk": DiskBackend,
+    "redis": RedisBackend,
+}
+
+class NamespacedCache:
+    """
+    A TTLCache-like view of one namespace of the shared backend, which is
+    looked up on first use (None means get_backend()).
+    """
+
+    def __init__(self, namespace: str, ttl: float, backend=None):
+        self._backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = get_backend()
+        return self._backend
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.backend.get(self.namespace, key)
+        if value is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl > 0:
+            self.backend.set(self.namespace, key, value, ttl)
+
+    def __contains__(self, key: str) -> bool:
+        return self.backend.get(self.namespace, key) is not None
+
+    def clear(self):
+        self.backend.clear(self.namespace)
+
+_backend = None
+_namespaces: Dict[str, NamespacedCache] = {}
+_backend_lock = threading.Lock()
+
+def get_backend():
+    """
+    The process-wide backend selected by CACHE_BACKEND.
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            backend_cls = BACKENDS.get(CACHE_BACKEND)
+            if backend_cls is None:
+                print(f"⚠️ Unknown CACHE_BACKEND '{CACHE_BACKEND}', using memory")
+                backend_cls = MemoryBackend
+            _backend = backend_cls()
+        return _backend
+
+def namespace_ttl(namespace: str) -> float:
+    return float(os.getenv(f"CACHE_TTL_{namespace.upper()}", NAMESPACE_TTLS.get(namespace, DEFAULT_NAMESPACE_TTL)))
+
+def get_cache(namespace: str, ttl: Optional[float] = None) -> NamespacedCache:
+    """
+    Cache for one namespace on the shared backend. ttl overrides the
+    namespace default (and its CACHE_TTL_<NAMESPACE> setting). Cheap to
+    call at import time: the backend is not touched until the first lookup.
+    """
+    with _backend_lock:
+        cache = _namespaces.get(namespace)
+        if cache is None:
+            cache = _namespaces[namespace] = NamespacedCache(namespace, namespace_ttl(namespace) if ttl is None else ttl)
+        return cache
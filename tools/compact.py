@@ -0,0 +1,126 @@
+import re
+import threading
+from typing import Callable, Dict, List, Optional
+
+from tools.olamaps import search_places as _search_places
+
+COMPACT_HEADER = "id|name|area|km|rating"
+
+COMPACT_INSTRUCTIONS = [
+    "7. **Compact Tool Results**: `search_places` returns a table with the header `" + COMPACT_HEADER + "`.",
+    "   - Write each place heading as `### [id] Name`, using the id from the table (e.g. `### [p3] Truffles`).",
+    "   - You may omit the address line; it is filled in from the id automatically.",
+]
+
+_CITY_WORDS = ("bengaluru", "bangalore", "karnataka", "india")
+_ID_HEADING = re.compile(r'^(#{3}\s+)\[(p\d+)\]\s*(.*)$')
+_ADDRESS_LINE = re.compile(r'^\*(?!\*).*\*$|^Address:', re.IGNORECASE)
+
+class PlaceRegistry:
+    """
+    Maps short ids (p1, p2, ...) handed to the model back to full place records.
+    One registry lives as long as one planning session.
+    """
+
+    def __init__(self):
+        self._places: Dict[str, Dict] = {}
+        self._ids_by_place: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def register(self, place: Dict) -> str:
+        key = place.get("place_id") or place.get("name", "")
+        with self._lock:
+            short_id = self._ids_by_place.get(key)
+            if short_id is None:
+                short_id = f"p{len(self._places) + 1}"
+                self._ids_by_place[key] = short_id
+            self._places[short_id] = place
+            return short_id
+
+    def get(self, short_id: str) -> Optional[Dict]:
+        return self._places.get(short_id)
+
+    def __len__(self) -> int:
+        return len(self._places)
+
+def _locality(address: Optional[str]) -> str:
+    """
+    'Forum Mall, Hosur Rd, Koramangala, Bengaluru, Karnataka 560029' -> 'Koramangala'.
+    """
+    parts = [p.strip() for p in (address or "").split(",") if p.strip()]
+    parts = [p for p in parts if not any(w in p.lower() for w in _CITY_WORDS) and not p.isdigit()]
+    return parts[-1][:24] if parts else ""
+
+def _cell(value) -> str:
+    return str(value).replace("|", "/").replace("\n", " ").strip()
+
+def encode_places(places: List[Dict], registry: PlaceRegistry) -> str:
+    """
+    Encode search results as a terse table with short ids. Placeholder
+    ratings, status, coordinates and full addresses stay local.
+    """
+    rows = [COMPACT_HEADER]
+    for place in places:
+        short_id = registry.register(place)
+        distance = (place.get("distance") or "").replace(" km", "")
+        rating = place.get("rating")
+        if place.get("place_id", "").startswith("dir_") or rating in (None, "N/A"):
+            rating = ""
+        rows.append("|".join(_cell(v) for v in [
+            short_id,
+            place.get("name") or "",
+            _locality(place.get("address")),
+            distance if distance != "N/A" else "",
+            rating,
+        ]))
+    if len(rows) == 1:
+        return "no results"
+    return "\n".join(rows)
+
+def make_compact_search_tool(
+    registry: PlaceRegistry,
+    search: Callable[[str, float, float], List[Dict]] = _search_places
+) -> Callable[[str, float, float], str]:
+    """
+    Build a search_places tool for the agent that returns compact tables
+    of search's results.
+    """
+    def search_places(query: str, lat: float, lon: float) -> str:
+        """
+        Searches for places using Ola Maps API (Autocomplete) and fetches details.
+        Returns a table with the header 'id|name|area|km|rating', one place per row.
+        """
+        return encode_places(search(query, lat, lon), registry)
+
+    return search_places
+
+def expand_itinerary_markdown(markdown_text: str, registry: PlaceRegistry) -> str:
+    """
+    Replace '### [id] Name' headings with the full name and address of the
+    registered place, so the result reads (and parses) like a normal itinerary.
+    """
+    lines = markdown_text.split('\n')
+    expanded = []
+    i = 0
+    while i < len(lines):
+        match = _ID_HEADING.match(lines[i].strip())
+        place = registry.get(match.group(2)) if match else None
+        if place is None:
+            if match:
+                # Unknown id: keep the model's name, drop the id tag.
+                expanded.append(match.group(1) + match.group(3))
+            else:
+                expanded.append(lines[i])
+            i += 1
+            continue
+
+        expanded.append(f"{match.group(1)}{place.get('name') or match.group(3)}")
+        i += 1
+        # Skip blank lines and any address the model wrote; use the real one.
+        while i < len(lines) and not lines[i].strip():
+            i += 1
+        if i < len(lines) and _ADDRESS_LINE.match(lines[i].strip()):
+            i += 1
+        if place.get("address"):
+            expanded.append(f"*{place['address']}*")
+    return '\n'.join(expanded)
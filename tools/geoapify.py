@@ -1,9 +1,114 @@
 import os
 import requests
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Dict, NamedTuple, Optional, Tuple, Union
+
+from tools.http import get as http_get, submit
 
 GEOAPIFY_API_KEY = os.getenv("GEOAPIFY_API_KEY")
 
+PLACES_URL = "https://api.geoapify.com/v2/places"
+
+class Circle(NamedTuple):
+    lon: float
+    lat: float
+    radius_m: float
+
+    def to_param(self) -> str:
+        # Whole metres: ':g' would switch to exponent notation from 1e+06.
+        return f"circle:{self.lon},{self.lat},{round(self.radius_m)}"
+
+class Rect(NamedTuple):
+    lon1: float
+    lat1: float
+    lon2: float
+    lat2: float
+
+    def to_param(self) -> str:
+        return f"rect:{self.lon1},{self.lat1},{self.lon2},{self.lat2}"
+
+class Proximity(NamedTuple):
+    lon: float
+    lat: float
+
+    def to_param(self) -> str:
+        return f"proximity:{self.lon},{self.lat}"
+
+Area = Union[Circle, Rect]
+
+def _lon_lat(v1: float, v2: float) -> Tuple[float, float]:
+    """
+    App/Agent sends "lat,lon" OR "lon,lat"; Geoapify expects "lon,lat".
+    Heuristic for Bangalore/India: Lon (approx 77) > Lat (approx 12).
+    """
+    if v1 < v2:
+        # Input is Lat, Lon (Small, Big) -> SWAP
+        print(f"🔄 Smart Swap: {v1},{v2} -> {v2},{v1} (Lat,Lon -> Lon,Lat)")
+        return v2, v1
+    return v1, v2
+
+def parse_circle(value: str) -> Optional[Circle]:
+    """
+    Parse "lat,lon,radius" or "lon,lat,radius" (optionally "circle:"-prefixed).
+    Returns None if the string is not three numbers.
+    """
+    parts = value.replace("circle:", "").strip().split(',')
+    if len(parts) != 3:
+        return None
+    try:
+        v1, v2, radius = (float(p.strip()) for p in parts)
+    except ValueError:
+        return None
+    lon, lat = _lon_lat(v1, v2)
+    return Circle(lon, lat, radius)
+
+def parse_rect(value: str) -> Optional[Rect]:
+    """
+    Parse "lon1,lat1,lon2,lat2" (optionally "rect:"-prefixed).
+    """
+    parts = value.replace("rect:", "").strip().split(',')
+    if len(parts) != 4:
+        return None
+    try:
+        return Rect(*(float(p.strip()) for p in parts))
+    except ValueError:
+        return None
+
+def parse_bias(value: str) -> Optional[Proximity]:
+    """
+    Parse "proximity:lon,lat" or a bare "lat,lon" pair.
+    """
+    clean_bias = value.replace("proximity:", "").strip()
+    clean_bias = clean_bias.replace("countrycode:IN", "").strip() # Remove countrycode if mixed in
+    parts = clean_bias.split(',')
+    if len(parts) != 2:
+        return None
+    try:
+        v1, v2 = (float(p.strip()) for p in parts)
+    except ValueError:
+        return None
+    return Proximity(*_lon_lat(v1, v2))
+
+def _fetch_page(categories: str, area: Optional[str], bias: Optional[str], limit: int, offset: int, lang: str) -> List[Dict]:
+    """
+    Fetch one page of place features. Raises requests.exceptions.RequestException.
+    """
+    params = {
+        "categories": categories,
+        "apiKey": GEOAPIFY_API_KEY,
+        "limit": limit,
+        "offset": offset,
+        "lang": lang
+    }
+    if area:
+        params["filter"] = area
+    if bias:
+        params["bias"] = bias
+
+    response = http_get("geoapify.places", PLACES_URL, params)
+    response.raise_for_status()
+    return response.json().get("features", [])
+
 def search_places(
     categories: str = "catering.restaurant",
     filter_circle: Optional[str] = None,
@@ -15,7 +120,7 @@ def search_places(
 ) -> List[Dict]:
     """
     Search for places using Geoapify Places API.
-    
+
     Args:
         categories: Comma-separated list of categories.
         filter_circle: "lat,lon,radius_meters"
@@ -24,86 +129,84 @@ def search_places(
         limit: Max results (default 20).
         offset: Pagination offset.
         lang: Language code.
-        
+
     Returns:
         List of place features.
     """
     if not GEOAPIFY_API_KEY:
         raise ValueError("GEOAPIFY_API_KEY not found in environment variables.")
 
-    url = "https://api.geoapify.com/v2/places"
-    params = {
-        "categories": categories,
-        "apiKey": GEOAPIFY_API_KEY,
-        "limit": limit,
-        "offset": offset,
-        "lang": lang
-    }
-    
-    # Prioritize circle filter if both are present
+    # Prioritize circle filter if both are present; unparseable values are passed through.
+    area = None
     if filter_circle:
-        # App/Agent sends "lat,lon,radius" OR "lon,lat,radius"
-        # Geoapify expects "lon,lat,radius"
-        clean_filter = filter_circle.replace("circle:", "").strip()
-        parts = clean_filter.split(',')
-        if len(parts) == 3:
-            p1, p2, radius = parts
-            try:
-                v1 = float(p1.strip())
-                v2 = float(p2.strip())
-                
-                # Heuristic for Bangalore/India: Lon (approx 77) > Lat (approx 12)
-                # We want output to be Lon, Lat (Big, Small)
-                if v1 < v2: 
-                    # Input is Lat, Lon (Small, Big) -> SWAP
-                    params["filter"] = f"circle:{v2},{v1},{radius.strip()}"
-                    print(f"🔄 Smart Swap: {v1},{v2} -> {v2},{v1} (Lat,Lon -> Lon,Lat)")
-                else:
-                    # Input is Lon, Lat (Big, Small) -> KEEP
-                    params["filter"] = f"circle:{v1},{v2},{radius.strip()}"
-                    print(f"✅ Kept coordinates: {v1},{v2} (Already Lon,Lat)")
-            except ValueError:
-                # Fallback if parsing fails
-                params["filter"] = f"circle:{filter_circle}"
-        else:
-            params["filter"] = f"circle:{filter_circle}"
+        circle = parse_circle(filter_circle)
+        area = circle.to_param() if circle else f"circle:{filter_circle}"
     elif filter_rect:
-        params["filter"] = f"rect:{filter_rect}"
-        
+        rect = parse_rect(filter_rect)
+        area = rect.to_param() if rect else f"rect:{filter_rect}"
+
+    bias_param = None
     if bias:
-        # Handle bias parameter robustness
-        # Geoapify expects proximity:lon,lat
-        clean_bias = bias.replace("proximity:", "").strip()
-        clean_bias = clean_bias.replace("countrycode:IN", "").strip() # Remove countrycode if mixed in
-        
-        parts = clean_bias.split(',')
-        if len(parts) == 2:
-            try:
-                v1 = float(parts[0].strip())
-                v2 = float(parts[1].strip())
-                
-                # Same heuristic: We want Lon, Lat (Big, Small)
-                if v1 < v2:
-                     params["bias"] = f"proximity:{v2},{v1}"
-                     print(f"🔄 Smart Bias Swap: {v1},{v2} -> {v2},{v1}")
-                else:
-                     params["bias"] = f"proximity:{v1},{v2}"
-                     print(f"✅ Kept Bias: {v1},{v2}")
-            except ValueError:
-                 params["bias"] = bias
-        else:
-            params["bias"] = bias
-
-    print(f"🌍 Calling Geoapify API: {url}")
-    print(f"   Params: {params}")
+        proximity = parse_bias(bias)
+        bias_param = proximity.to_param() if proximity else bias
+
+    print(f"🌍 Calling Geoapify API: {categories} in {area or 'anywhere'} (offset {offset})")
 
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-        features = data.get("features", [])
+        features = _fetch_page(categories, area, bias_param, limit, offset, lang)
         print(f"✅ Geoapify Response: Found {len(features)} places.")
         return features
     except requests.exceptions.RequestException as e:
         print(f"❌ Error calling Geoapify Places API: {e}")
         return []
+
+def iter_places(
+    categories: str,
+    area: Area,
+    bias: Optional[Proximity] = None,
+    page_size: int = 50,
+    max_results: Optional[int] = None,
+    until: Optional[Callable[[Dict], bool]] = None,
+    lang: str = "en"
+) -> Iterator[Dict]:
+    """
+    Stream place features page by page, fetching the next page in the
+    background while the caller consumes the current one.
+
+    Only the current and the prefetched page are held in memory, so large
+    radius sweeps run in bounded memory. Iteration stops after the last page,
+    after max_results features, or right after a feature for which
+    until(feature) returns True. Raises requests.exceptions.RequestException.
+    """
+    if not GEOAPIFY_API_KEY:
+        raise ValueError("GEOAPIFY_API_KEY not found in environment variables.")
+
+    area_param = area.to_param()
+    bias_param = bias.to_param() if bias else None
+
+    def fetch(offset: int):
+        return _fetch_page(categories, area_param, bias_param, page_size, offset, lang)
+
+    print(f"🌍 Streaming Geoapify places: {categories} in {area_param}")
+    prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="geoapify-prefetch")
+    try:
+        offset = 0
+        yielded = 0
+        pending = submit(prefetcher, fetch, offset)
+        while pending is not None:
+            page = pending.result()
+            offset += page_size
+
+            # A short page is the last one; otherwise start on the next page now.
+            last_page = len(page) < page_size or (max_results is not None and offset >= max_results)
+            pending = None if last_page else submit(prefetcher, fetch, offset)
+
+            for feature in page:
+                yield feature
+                yielded += 1
+                if max_results is not None and yielded >= max_results:
+                    return
+                if until is not None and until(feature):
+                    return
+    finally:
+        prefetcher.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,127 @@
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from tools.breaker import get_breaker
+
+# Upper bound on pooled keep-alive connections per upstream host.
+POOL_MAXSIZE = 32
+# Timeout for one upstream call when no tighter deadline is in effect.
+REQUEST_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "8"))
+
+class DeadlineExceeded(requests.exceptions.RequestException):
+    """
+    Raised instead of starting an upstream call after the deadline passed.
+    """
+
+# Monotonic time by which the current request must be done, if any.
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("deadline", default=None)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """
+    The process-wide HTTP session, so every provider call reuses pooled
+    keep-alive connections instead of paying a new TLS handshake.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=8, pool_maxsize=POOL_MAXSIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+def warm_connections(urls: Iterable[str], timeout: float = 5.0):
+    """
+    Open a pooled connection to each URL's host ahead of the first real call.
+    Failures are ignored; the real call will retry the connection.
+    """
+    session = get_session()
+    for url in urls:
+        try:
+            session.head(url, timeout=timeout)
+        except requests.exceptions.RequestException:
+            pass
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Bound every upstream call made in this context to finish within seconds.
+    Nested scopes can only tighten the deadline. Work handed to a pool keeps
+    it when submitted with submit().
+    """
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def current_deadline() -> Optional[float]:
+    """
+    The current deadline as a time.monotonic() value, or None without one.
+    """
+    return _deadline.get()
+
+def time_left() -> Optional[float]:
+    """
+    Seconds until the current deadline, or None without one.
+    """
+    deadline = _deadline.get()
+    return None if deadline is None else max(deadline - time.monotonic(), 0.0)
+
+def submit(pool: Executor, fn: Callable, *args, **kwargs) -> Future:
+    """
+    pool.submit that runs fn under the caller's deadline.
+    """
+    return pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+def get(endpoint: str, url: str, params: Dict, timeout: float = REQUEST_TIMEOUT) -> requests.Response:
+    """
+    GET through the pooled session, guarded by the endpoint's circuit
+    breaker and capped by the current deadline. Connection errors, timeouts
+    and 5xx/429 answers count as endpoint failures.
+    Raises CircuitOpenError or DeadlineExceeded (both RequestExceptions)
+    without making the call.
+    """
+    left = time_left()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(f"No time left to call {endpoint}")
+    breaker = get_breaker(endpoint)
+    breaker.before_call()
+
+    capped = left is not None and left < timeout
+    try:
+        response = get_session().get(url, params=params, timeout=min(timeout, left) if capped else timeout)
+    except requests.exceptions.Timeout:
+        # Running out of our own time budget says nothing about the endpoint.
+        if capped:
+            breaker.release()
+        else:
+            breaker.record_failure()
+        raise
+    except requests.exceptions.RequestException:
+        breaker.record_failure()
+        raise
+
+    if response.status_code >= 500 or response.status_code == 429:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    return response
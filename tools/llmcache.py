@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+from tools.cache import get_cache, namespace_ttl
+from tools.persist import DeferredWriter, read_json, write_json
+
+# Hit/miss counts; the responses themselves live in the shared cache backend.
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join("data", "llm_cache.json"))
+# Seconds a cached response stays valid; 0 disables the cache.
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", namespace_ttl("itinerary")))
+
+def fingerprint(value) -> str:
+    """
+    Stable hash of any JSON-serializable value.
+    """
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """
+    Exact-match cache of final model responses, stored in the "itinerary"
+    namespace of the shared cache backend.
+
+    Keys are built by the caller from everything that determines the answer
+    (model, instructions, normalized prompt, tool results), so a hit is a
+    response the model already produced for the same inputs. Hit/miss counts
+    and the tokens a hit avoided are persisted as JSON at path, in batches
+    off the request path; a save adds this process's counts to those other
+    processes wrote.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl: float = LLM_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # Totals as of the last load or save, and counts gathered since.
+        self._stats: Optional[Dict] = None
+        self._pending = self._zero()
+        # Set by clear(): the next save replaces the file's counts.
+        self._reset = False
+        self._entries = None
+        self._writer = DeferredWriter(self._write, path)
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    @property
+    def entries(self):
+        if self._entries is None:
+            self._entries = get_cache("itinerary", ttl=self.ttl)
+        return self._entries
+
+    @staticmethod
+    def _zero() -> Dict[str, int]:
+        return {"hits": 0, "misses": 0, "tokens_saved": 0}
+
+    @classmethod
+    def _read_stats(cls, data: Optional[Dict]) -> Dict[str, int]:
+        stats = cls._zero()
+        if data is not None and isinstance(data.get("stats"), dict):
+            for name in stats:
+                stats[name] = data["stats"].get(name, 0)
+        return stats
+
+    def _load(self) -> Dict:
+        if self._stats is None:
+            self._stats = self._read_stats(read_json(self.path))
+        return self._stats
+
+    def _write(self):
+        with self._lock:
+            if not self._reset and not any(self._pending.values()):
+                return
+            pending, self._pending = self._pending, self._zero()
+            reset, self._reset = self._reset, False
+
+        on_disk = self._zero() if reset else self._read_stats(read_json(self.path))
+        with self._lock:
+            for name, count in pending.items():
+                on_disk[name] += count
+            self._stats = on_disk
+            snapshot = {"stats": dict(on_disk)}
+        write_json(self.path, snapshot)
+
+    def flush(self):
+        """
+        Save pending counts now rather than at the next batch.
+        """
+        self._writer.flush()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Cached response for key, or None on a miss or an expired entry.
+        """
+        if not self.enabled:
+            return None
+        entry = self.entries.get(key)
+        with self._lock:
+            if entry is None:
+                self._pending["misses"] += 1
+            else:
+                self._pending["hits"] += 1
+                self._pending["tokens_saved"] += entry.get("tokens", 0)
+        self._writer.schedule()
+        return entry["content"] if entry is not None else None
+
+    def set(self, key: str, content: str, tokens: int = 0):
+        """
+        Store a response and the tokens it cost to generate.
+        """
+        if not self.enabled or not content:
+            return
+        self.entries.set(key, {"content": content, "tokens": tokens})
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Hit/miss counts, hit rate and tokens saved since the stats were created.
+        """
+        with self._lock:
+            stats = dict(self._load())
+            for name, count in self._pending.items():
+                stats[name] += count
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        self.entries.clear()
+        with self._lock:
+            self._stats = self._zero()
+            self._pending = self._zero()
+            self._reset = True
+        self._writer.flush()
+
+response_cache = ResponseCache()
@@ -2,21 +2,76 @@ import os
 import requests
 import time
 import uuid
-from typing import Dict, Optional, List
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Iterable, Iterator, Optional, List, Tuple, Union
+
+from tools.areas import AREA_GEOFENCE, Area, area_in_query
+from tools.cache import get_cache
+from tools.geo import geohash_encode, haversine_km
+from tools.breaker import CircuitOpenError
+from tools.http import DeadlineExceeded, deadline_scope, get as http_get, submit, time_left
+from tools.placeindex import OFFLINE_MODE, PLACE_INDEX_MAX_AGE, place_index
+from tools.profiles import SearchProfile, get_profile
+from tools.radius import radius_engine
+from tools.rejections import rejection_cache
+from tools.rules import (
+    DIRECTORY_PLACES,
+    SPARSE_CATEGORIES,
+    irrelevant_keywords,
+    rejection_reason,
+    strategy_queries,
+)
+from tools.singleflight import SingleFlight
+from tools.traveltime import travel_minutes
 
 OLA_MAPS_API_KEY = os.getenv("OLA_MAPS_API_KEY")
 
 def get_access_token():
     return None
 
+REVERSE_GEOCODE_URL = "https://api.olamaps.io/places/v1/reverse-geocode"
+AUTOCOMPLETE_URL = "https://api.olamaps.io/places/v1/autocomplete"
+DETAILS_URL = "https://api.olamaps.io/places/v1/details"
+
+# Reverse-geocode results are shared by every point in the same cell.
+# Precision is decimal places of lat/lon (4 is ~11 m); set
+# REVERSE_GEOCODE_GEOHASH to a geohash length to bucket by geohash instead.
+REVERSE_GEOCODE_PRECISION = int(os.getenv("REVERSE_GEOCODE_PRECISION", "4"))
+REVERSE_GEOCODE_GEOHASH = int(os.getenv("REVERSE_GEOCODE_GEOHASH", "0"))
+
+# Upstream responses live in the shared cache backend (CACHE_BACKEND), so
+# every replica benefits from a call any one of them made. TTLs are set per
+# namespace in tools.cache.NAMESPACE_TTLS.
+_reverse_geocode_cache = get_cache("reverse_geocode")
+_autocomplete_cache = get_cache("autocomplete")
+_place_cache = get_cache("places")
+
+# Concurrent sessions asking for the same upstream resource share one request.
+_inflight = SingleFlight()
+
+def reverse_geocode_key(lat: float, lon: float) -> str:
+    """
+    Quantize a point to its reverse-geocode cache cell.
+    """
+    if REVERSE_GEOCODE_GEOHASH:
+        return geohash_encode(lat, lon, REVERSE_GEOCODE_GEOHASH)
+    return f"{round(lat, REVERSE_GEOCODE_PRECISION)},{round(lon, REVERSE_GEOCODE_PRECISION)}"
+
 def get_place_details(lat: float, lon: float) -> Dict:
     """
     Get place details using Ola Maps Reverse Geocoding or Places API.
+    Results are cached per quantized cell, so nearby points cost one call.
     """
     if not OLA_MAPS_API_KEY:
         raise ValueError("OLA_MAPS_API_KEY not found in environment variables.")
-        
-    url = "https://api.olamaps.io/places/v1/reverse-geocode"
+
+    key = reverse_geocode_key(lat, lon)
+    cached = _reverse_geocode_cache.get(key)
+    if cached is not None:
+        return cached
+    return _inflight.do(("reverse-geocode", key), _request_reverse_geocode, lat, lon, key)
+
+def _request_reverse_geocode(lat: float, lon: float, key: str) -> Dict:
     params = {
         "latlng": f"{lat},{lon}",
         "api_key": OLA_MAPS_API_KEY
@@ -25,11 +80,12 @@ def get_place_details(lat: float, lon: float) -> Dict:
     print(f"🗺️ Calling Ola Maps Reverse Geocode: {lat}, {lon}")
 
     try:
-        response = requests.get(url, params=params)
+        response = http_get("olamaps.reverse_geocode", REVERSE_GEOCODE_URL, params)
         response.raise_for_status()
         data = response.json()
         if data.get("results"):
             print("✅ Ola Maps Response: Details found.")
+            _reverse_geocode_cache.set(key, data["results"][0])
             return data["results"][0]
         print("⚠️ Ola Maps Response: No details found.")
         return {}
@@ -37,410 +93,418 @@ def get_place_details(lat: float, lon: float) -> Dict:
         print(f"❌ Error calling Ola Maps Reverse Geocode: {e}")
         return {}
 
+def get_place_details_many(points: Iterable[Tuple[float, float]], max_workers: int = 8) -> List[Dict]:
+    """
+    Reverse-geocode many (lat, lon) points, one API call per unique cell.
+    Returns results in the same order as points.
+    """
+    points = list(points)
+    first_point_in_cell: Dict[str, Tuple[float, float]] = {}
+    for lat, lon in points:
+        first_point_in_cell.setdefault(reverse_geocode_key(lat, lon), (lat, lon))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [submit(pool, get_place_details, lat, lon) for lat, lon in first_point_in_cell.values()]
+        by_cell = dict(zip(first_point_in_cell, (future.result() for future in futures)))
+    return [by_cell[reverse_geocode_key(lat, lon)] for lat, lon in points]
+
+def preload_reverse_geocode(points: Iterable[Tuple[float, float]]):
+    """
+    Warm the reverse-geocode cache, e.g. with the app's area centroids.
+    """
+    if not OLA_MAPS_API_KEY:
+        return
+    points = list(points)
+    get_place_details_many(points)
+    print(f"🔥 Reverse-geocode cache warmed for {len(points)} points")
+
+def fetch_autocomplete(input_text: str, lat: float, lon: float, radius_km: Optional[float] = None) -> List[Dict]:
+    """
+    Call the Ola Maps Autocomplete API and return the raw predictions.
+    radius_km biases results towards the search circle around (lat, lon).
+    Responses are cached; concurrent identical requests share one upstream call.
+    Raises requests.exceptions.RequestException on HTTP errors.
+    """
+    key = f"{' '.join(input_text.lower().split())}|{round(lat, 5)},{round(lon, 5)}|{radius_km}"
+    cached = _autocomplete_cache.get(key)
+    if cached is not None:
+        return cached
+    return _inflight.do(("autocomplete", key), _request_autocomplete, input_text, lat, lon, radius_km, key)
+
+def _request_autocomplete(input_text: str, lat: float, lon: float, radius_km: Optional[float], key: str) -> List[Dict]:
+    params = {
+        "input": input_text,
+        "location": f"{lat},{lon}",
+        "api_key": OLA_MAPS_API_KEY
+    }
+    if radius_km:
+        params["radius"] = int(radius_km * 1000)
+    response = http_get("olamaps.autocomplete", AUTOCOMPLETE_URL, params)
+    response.raise_for_status()
+    predictions = response.json().get("predictions", [])
+    _autocomplete_cache.set(key, predictions)
+    return predictions
+
+def fetch_place_details(place_id: str) -> Optional[Dict]:
+    """
+    Fetch the Ola Maps Place Details result for a place_id.
+    Results are cached; concurrent requests for the same place_id share one
+    upstream call. Returns None if the API did not answer with 200.
+    """
+    cached = _place_cache.get(place_id)
+    if cached is not None:
+        return cached
+    return _inflight.do(("details", place_id), _request_place_details, place_id)
+
+def _request_place_details(place_id: str) -> Optional[Dict]:
+    params = {"place_id": place_id, "api_key": OLA_MAPS_API_KEY}
+    response = http_get("olamaps.details", DETAILS_URL, params)
+    if response.status_code != 200:
+        return None
+    result = response.json().get("result", {})
+    _place_cache.set(place_id, result)
+    return result
+
+# Travel-time cutoffs used when a precomputed road grid covers both points;
+# the km cutoffs below remain the fallback outside the grid.
+MAX_TRAVEL_MINUTES = 25
+MAX_TRAVEL_MINUTES_SPARSE = 90
+
+def _too_far(lat: float, lon: float, place_lat: float, place_lon: float, distance: float, max_distance: float, max_minutes: float) -> Optional[str]:
+    """
+    Return why a place is out of range, or None if it is reachable.
+    Uses road travel time from the precomputed grid when available.
+    """
+    return _out_of_range(distance, travel_minutes(lat, lon, place_lat, place_lon), max_distance, max_minutes)
+
+def _out_of_range(distance: float, minutes: Optional[float], max_distance: float, max_minutes: float) -> Optional[str]:
+    """
+    _too_far for an already measured distance and travel time.
+    """
+    if minutes is not None:
+        if minutes > max_minutes:
+            return f"{minutes:.0f} min > {max_minutes} min"
+        return None
+    if distance > max_distance:
+        return f"{distance:.2f} km > {max_distance} km"
+    return None
+
+_speculative_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="olamaps-autocomplete")
+# Shared by all searches; each search keeps at most its profile's
+# details_concurrency requests in flight.
+_details_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="olamaps-details")
+
+def _directory_search(category: str, lat: float, lon: float) -> List[Dict]:
+    print(f"📂 Using Hardcoded Directory for: '{category}'")
+    results = []
+    for place in DIRECTORY_PLACES[category]:
+        distance = haversine_km(lat, lon, place["lat"], place["lon"])
+        results.append({
+            "name": place["name"],
+            "address": place["address"],
+            "lat": place["lat"],
+            "lon": place["lon"],
+            "place_id": f"dir_{place['name'].replace(' ', '_')}",
+            "rating": "4.5", # Placeholder rating
+            "distance": f"{distance:.1f} km",
+            "status": "ACTIVE"
+        })
+        
+    # Sort by distance
+    results.sort(key=lambda x: float(x["distance"].split()[0]))
+    return results
+
+def _geofence(query: str) -> Optional[Area]:
+    """
+    The area whose outline bounds this query's results, if it names one.
+    """
+    if not AREA_GEOFENCE:
+        return None
+    area = area_in_query(query)
+    return area if area is not None and area.has_geofence else None
+
+def _within_fence(fence: Optional[Area], places: List[Dict]) -> List[Dict]:
+    """
+    Drop places or autocomplete predictions whose coordinates fall outside
+    fence, testing the whole batch at once. Entries without coordinates
+    are kept for the details check to decide.
+    """
+    if fence is None or not places:
+        return places
+    rows, lats, lons = [], [], []
+    for i, place in enumerate(places):
+        loc = (place.get("geometry") or {}).get("location") or {}
+        place_lat = place.get("lat", loc.get("lat"))
+        place_lon = place.get("lon", loc.get("lng"))
+        if place_lat is not None and place_lon is not None:
+            rows.append(i)
+            lats.append(place_lat)
+            lons.append(place_lon)
+    if not rows:
+        return places
+
+    outside = {row for row, inside in zip(rows, fence.contains(lats, lons)) if not inside}
+    if outside:
+        print(f"🧭 Geofence: skipped {len(outside)} places outside {fence.name} without a details call")
+    return [place for i, place in enumerate(places) if i not in outside]
+
 def search_places(query: str, lat: float, lon: float) -> List[Dict]:
     """
     Searches for places using Ola Maps API (Autocomplete) and fetches details.
     """
-    if not OLA_MAPS_API_KEY:
+    return _search_places(query, lat, lon)
+
+def search_places_with_profile(query: str, lat: float, lon: float, profile: Union[str, SearchProfile, None] = None) -> List[Dict]:
+    """
+    search_places with a search profile (fast / balanced / thorough, or a
+    SearchProfile); None uses SEARCH_PROFILE. For callers other than the
+    agent, whose tool schema only has query, lat and lon.
+    """
+    return _search_places(query, lat, lon, profile=profile)
+
+def _search_places(
+    query: str,
+    lat: float,
+    lon: float,
+    autocomplete: Callable[[str, float, float, Optional[float]], List[Dict]] = fetch_autocomplete,
+    details: Callable[[str], Optional[Dict]] = fetch_place_details,
+    profile: Union[str, SearchProfile, None] = None
+) -> List[Dict]:
+    """
+    Implementation of search_places with injectable upstream lookups, so
+    batch callers can share autocomplete and details results across searches.
+    profile picks scan depth, concurrency, fallbacks, radius and deadline;
+    past the deadline the places found so far are returned.
+
+    Places earlier searches accepted are looked up in the local place index
+    first; Ola Maps is only called when the index has fewer than the
+    profile's target, and never in OFFLINE_MODE.
+
+    When the query names a known area ('Parks in Koramangala'), places
+    outside its geofence are dropped, using the autocomplete coordinates
+    where available so they never cost a details call.
+
+    The profile's deadline (or the caller's, if tighter) bounds every
+    upstream call. When Ola Maps fails or its circuit is open, the search
+    stops early and tops up with indexed places.
+    """
+    if not OLA_MAPS_API_KEY and not OFFLINE_MODE:
         raise ValueError("OLA_MAPS_API_KEY not found in environment variables.")
 
+    profile = get_profile(profile)
+    with deadline_scope(profile.deadline):
+        return _search(query, lat, lon, autocomplete, details, profile)
+
+def _search(
+    query: str,
+    lat: float,
+    lon: float,
+    autocomplete: Callable[[str, float, float, Optional[float]], List[Dict]],
+    details: Callable[[str], Optional[Dict]],
+    profile: SearchProfile
+) -> List[Dict]:
+    deadline = time.monotonic() + time_left()
+
+    def remaining() -> float:
+        return max(deadline - time.monotonic(), 0.0)
+
     query_lower = query.lower()
     
-    # --- Hardcoded Directory Logic ---
-    DIRECTORY_PLACES = {
-        "museum": [
-            {"name": "Visvesvaraya Industrial and Technological Museum", "lat": 12.9753, "lon": 77.5963, "address": "Kasturba Rd, Ambedkar Veedhi, Bengaluru, Karnataka 560001"},
-            {"name": "Government Museum", "lat": 12.9767, "lon": 77.5958, "address": "Kasturba Rd, Ambedkar Veedhi, Bengaluru, Karnataka 560001"},
-            {"name": "HAL Heritage Centre and Aerospace Museum", "lat": 12.9532, "lon": 77.6816, "address": "HAL Old Airport Rd, Marathahalli, Bengaluru, Karnataka 560037"},
-            {"name": "Jawaharlal Nehru Planetarium", "lat": 12.9849, "lon": 77.5896, "address": "Sri T, Sankey Rd, High Grounds, Bengaluru, Karnataka 560001"},
-            {"name": "Indian Music Experience Museum", "lat": 12.8914, "lon": 77.5861, "address": "JP Nagar 7th Phase, Bengaluru, Karnataka 560078"},
-            {"name": "Brain Museum", "lat": 12.9344, "lon": 77.5933, "address": "NIMHANS, Hosur Road, Bengaluru, Karnataka 560029"}
-        ],
-        "zoo": [
-            {"name": "Bannerghatta Biological Park", "lat": 12.8009, "lon": 77.5777, "address": "Bannerghatta Rd, Bengaluru, Karnataka 560083"}
-        ]
-    }
-    
     # Check if query matches a directory category
-    directory_category = None
     if "museum" in query_lower:
-        directory_category = "museum"
-    elif "zoo" in query_lower:
-        directory_category = "zoo"
-        
-    if directory_category:
-        print(f"📂 Using Hardcoded Directory for: '{directory_category}'")
-        results = []
-        from math import radians, sin, cos, sqrt, atan2
-        R = 6371  # Earth radius in km
-        
-        for place in DIRECTORY_PLACES[directory_category]:
-            # Calculate distance
-            place_lat = place["lat"]
-            place_lon = place["lon"]
-            dlat = radians(place_lat - lat)
-            dlon = radians(place_lon - lon)
-            a = sin(dlat / 2)**2 + cos(radians(lat)) * cos(radians(place_lat)) * sin(dlon / 2)**2
-            c = 2 * atan2(sqrt(a), sqrt(1 - a))
-            distance = R * c
-            
-            results.append({
-                "name": place["name"],
-                "address": place["address"],
-                "lat": place_lat,
-                "lon": place_lon,
-                "place_id": f"dir_{place['name'].replace(' ', '_')}",
-                "rating": "4.5", # Placeholder rating
-                "distance": f"{distance:.1f} km",
-                "status": "ACTIVE"
-            })
-            
-        # Sort by distance
-        results.sort(key=lambda x: float(x["distance"].split()[0]))
-        return results
+        return _directory_search("museum", lat, lon)
+    if "zoo" in query_lower:
+        return _directory_search("zoo", lat, lon)
 
     # --- Standard Ola Maps Search ---
-    refined_query = query
+    primary_query, variant_queries = strategy_queries(query)
+    if profile.fallback == "never":
+        variant_queries = []
+
+    is_sparse = any(cat in query_lower for cat in SPARSE_CATEGORIES)
+    default_distance = profile.sparse_radius_km if is_sparse else profile.radius_km
     
-    refinements = {
-        "parks": "Park",
-        "park": "Park",
-        "brewery": "Microbrewery",
-        "gym": "Gymnasium Fitness Center",
-        "library": "Public Library",
-        "arcade": "Shopping Mall",
-        "shopping": "Shopping Mall",
-        "theaters": "Cinema",
-        "movies": "Cinema"
-    }
+    # Size the radius from the venue density seen in past searches for this
+    # category and area, so the first autocomplete already yields enough.
+    max_distance, samples = radius_engine.suggest(query, lat, lon, default_distance)
+    max_minutes = (MAX_TRAVEL_MINUTES_SPARSE if is_sparse else MAX_TRAVEL_MINUTES) * max_distance / default_distance
     
-    for key, value in refinements.items():
-        if key in query_lower and value.lower() not in query_lower:
-            import re
-            refined_query = re.sub(r'\b' + re.escape(key) + r'\b', value, refined_query, flags=re.IGNORECASE)
-            print(f"🔄 Refined Query: '{query}' -> '{refined_query}'")
-            break
+    print(f"📏 Max Distance set to: {max_distance} km / {max_minutes:.0f} min (Sparse: {is_sparse}, learned from {samples} venues, profile: {profile.name})")
 
-    url = "https://api.olamaps.io/places/v1/autocomplete"
-    
-    params = {
-        "input": refined_query,
-        "location": f"{lat},{lon}",
-        "api_key": OLA_MAPS_API_KEY
-    }
+    # Sparse categories are worth leaving the area for.
+    fence = _geofence(query) if not is_sparse else None
 
-    print(f"🗺️ Calling Ola Maps Search (Autocomplete): {refined_query} near {lat},{lon}")
+    def indexed(max_age: Optional[float] = None) -> List[Dict]:
+        return [
+            place for place in _within_fence(fence, place_index.search(query, lat, lon, max_distance, limit=max(profile.target, profile.variant_target), max_age=max_age))
+            if not _too_far(lat, lon, place["lat"], place["lon"], haversine_km(lat, lon, place["lat"], place["lon"]), max_distance, max_minutes)
+        ]
+
+    if OFFLINE_MODE:
+        local_results = indexed(PLACE_INDEX_MAX_AGE)
+        print(f"📇 Place index: {len(local_results)} places for '{query}' (offline)")
+        return deduplicate_places(local_results)
+    local_results = indexed()
+    if len(local_results) >= profile.target:
+        print(f"📇 Place index: {len(local_results)} places for '{query}'")
+        return deduplicate_places(local_results)
+    # Places too old to skip Ola Maps for still beat nothing when it fails.
+    local_results = indexed(PLACE_INDEX_MAX_AGE)
+
+    # Variants go out together with the primary query so a thin primary
+    # result never waits on a second, serial autocomplete round trip.
+    print(f"🗺️ Calling Ola Maps Search (Autocomplete): {primary_query} near {lat},{lon}")
+    primary_future = submit(_speculative_pool, autocomplete, primary_query, lat, lon, max_distance)
+    variant_futures = []
+    for variant_query in variant_queries:
+        print(f"🗺️ Calling Ola Maps Search (Variant): {variant_query} near {lat},{lon}")
+        variant_futures.append((variant_query, submit(_speculative_pool, autocomplete, variant_query, lat, lon, max_distance)))
+
+    def indexed_fallback() -> List[Dict]:
+        if local_results:
+            print(f"📇 Falling back to {len(local_results)} indexed places for '{query}'")
+        return deduplicate_places(local_results)
 
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-        predictions = data.get("predictions", [])
-        print(f"✅ Ola Maps Response: Found {len(predictions)} places.")
-        
-        detailed_results = []
-        details_url = "https://api.olamaps.io/places/v1/details"
-        
-        sparse_categories = ["museum", "zoo", "amusement park", "stadium", "airport", "theme park"]
-        is_sparse = any(cat in query_lower for cat in sparse_categories)
-        max_distance = 30.0 if is_sparse else 7.0
-        
-        print(f"📏 Max Distance set to: {max_distance} km (Sparse: {is_sparse})")
-        
-        directory_names = []
-        for cat_list in DIRECTORY_PLACES.values():
-            for item in cat_list:
-                directory_names.append(item["name"].lower())
-
-        # Check up to 50 predictions to find 3 good ones
-        for p in predictions[:50]:
-            if len(detailed_results) >= 3:
-                break
-                
+        predictions = primary_future.result(timeout=remaining())
+    except FutureTimeoutError:
+        print(f"⏱️ Search deadline ({profile.deadline:g}s) reached before autocomplete answered")
+        return indexed_fallback()
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Error calling Ola Maps Search: {e}")
+        return indexed_fallback()
+    print(f"✅ Ola Maps Response: Found {len(predictions)} places.")
+
+    rejection_keywords = irrelevant_keywords(query_lower)
+    detailed_results = []
+    relevant_venues = []
+    rejections = []
+    seen_place_ids = set()
+
+    def consider(p: Dict, place_id: str, d_data: Dict):
+        place_name = (d_data.get("name") or p.get("description") or "").lower()
+        rejection = rejection_reason(place_name, rejection_keywords)
+        if rejection:
+            rule, reason = rejection
+            print(f"⚠️ Skipping {d_data.get('name')} ({reason})")
+            rejections.append((place_id, rule, reason, None))
+            return
+
+        loc = d_data.get("geometry", {}).get("location", {})
+        place_lat = loc.get("lat")
+        place_lon = loc.get("lng")
+        if not place_lat or not place_lon:
+            print(f"⚠️ Skipping {d_data.get('name')} (No coordinates)")
+            rejections.append((place_id, "no_coordinates", "No coordinates", None))
+            return
+
+        if fence is not None and not fence.contains_point(place_lat, place_lon):
+            print(f"⚠️ Skipping {d_data.get('name')} (Outside {fence.name})")
+            rejections.append((place_id, "geofence", f"Outside {fence.name}", None))
+            return
+
+        # --- Distance Check ---
+        distance = haversine_km(lat, lon, place_lat, place_lon)
+        relevant_venues.append((place_id, distance))
+        minutes = travel_minutes(lat, lon, place_lat, place_lon)
+        too_far = _out_of_range(distance, minutes, max_distance, max_minutes)
+        if too_far:
+            print(f"⚠️ Skipping {d_data.get('name')} (Too far: {too_far})")
+            # Kept with the rejection so a search with a larger radius re-checks it.
+            rejections.append((place_id, "distance", f"Too far: {too_far}", {"distance": distance, "minutes": minutes}))
+            return
+
+        detailed_results.append({
+            "name": d_data.get("name") or p.get("description"),
+            "address": d_data.get("formatted_address"),
+            "lat": place_lat,
+            "lon": place_lon,
+            "place_id": place_id,
+            "rating": d_data.get("rating", "N/A"),
+            "distance": f"{distance:.1f} km",
+            "status": "ACTIVE"
+        })
+
+    def still_too_far(measured: Dict) -> Optional[str]:
+        too_far = _out_of_range(measured["distance"], measured.get("minutes"), max_distance, max_minutes)
+        return f"Too far: {too_far}" if too_far else None
+
+    def next_window(candidates: Iterator[Dict]) -> List[Tuple[Dict, str]]:
+        window = []
+        for p in candidates:
             place_id = p.get("place_id")
-            if not place_id:
+            if not place_id or place_id in seen_place_ids:
                 continue
-                
-            try:
-                # Fetch details
-                d_params = {"place_id": place_id, "api_key": OLA_MAPS_API_KEY}
-                d_resp = requests.get(details_url, params=d_params)
-                if d_resp.status_code == 200:
-                    d_data = d_resp.json().get("result", {})
-                    
-                    place_name = (d_data.get("name") or p.get("description") or "").lower()
-                    
-                    # --- Directory Exclusion Check ---
-                    is_in_directory = False
-                    for dir_name in directory_names:
-                        if dir_name in place_name or place_name in dir_name:
-                             is_in_directory = True
-                             break
-                        
-                    if is_in_directory:
-                        print(f"⚠️ Skipping {d_data.get('name')} (Exists in Directory)")
-                        continue
-
-                    # --- Irrelevant Keywords Filtering ---
-                    irrelevant_keywords = [
-                        "parking", "metro", "ward", "road", "junction", "bus stop", 
-                        "railway", "station", "atm", "toll", "post office"
-                    ]
-                    
-                    is_activity_search = any(k in query_lower for k in ["park", "activity", "activities", "tourist", "sightseeing", "attraction", "place", "shopping", "mall", "market"])
-                    is_theater_search = any(k in query_lower for k in ["theater", "theatre", "movie", "cinema"])
-                    
-                    if is_activity_search or is_theater_search:
-                        irrelevant_keywords.extend([
-                            "hotel", "inn", "residency", "packers", "movers", "travels", "lodge", 
-                            "school", "college", "university", "academy", "class", "openhouse",
-                            "developers", "enclave", "apartment", "building", "tower", "mall", 
-                            "shopping", "store", "outlet", "estate", 
-                            "tech park", "industrial", "campus", "office", "corporate", "sez", 
-                            "zone", "business park", "export",
-                            "infra", "infrastructure", "construction", "pvt ltd", "private limited", "limited",
-                            "shipping", "courier", "online", "logistics", "cargo", "freight", "import", "inc", "builders", "contractors",
-                            "event", "flingg", "decor", "planter", "cabinet", "furniture", "nursery"
-                        ])
-                        
-                        if "shopping" in query_lower or "mall" in query_lower or "market" in query_lower:
-                             irrelevant_keywords.extend(["cafe", "coffee", "tea", "restaurant", "food", "dining"])
-                             for allowed in ["mall", "shopping", "store", "outlet"]:
-                                 if allowed in irrelevant_keywords:
-                                     irrelevant_keywords.remove(allowed)
-                        
-                    if is_theater_search:
-                        irrelevant_keywords.extend(["maac", "animation", "education", "coaching"])
-                        
-                    if "brewery" in query_lower:
-                        irrelevant_keywords.extend(["coffee", "cafe", "tea"])
-                    if "gym" in query_lower:
-                        irrelevant_keywords.extend(["school", "academy", "class"])
-                        
-                    # Restaurant specific exclusions
-                    if "restaurant" in query_lower or "cafe" in query_lower:
-                        irrelevant_keywords.extend(["tyre", "wheel", "residency", "apartment", "lodge", "pg", "paying guest"])
-
-                    # --- Address Marker Filtering ---
-                    import re
-                    if re.match(r'^\d+', place_name) or "near " in place_name or "opp " in place_name or "opposite " in place_name:
-                         print(f"⚠️ Skipping {d_data.get('name')} (Address marker detected)")
-                         continue
-                         
-                    skipped = False
-                    for keyword in irrelevant_keywords:
-                        if keyword in place_name:
-                            print(f"⚠️ Skipping {d_data.get('name')} (Match: '{keyword}')")
-                            skipped = True
-                            break
-                    
-                    # Debug print for Continental Residency
-                    if "continental residency" in place_name:
-                        print(f"🐞 DEBUG: Checking 'continental residency'. Keywords: {irrelevant_keywords}")
-                        print(f"🐞 DEBUG: Skipped? {skipped}")
-
-                    if skipped:
-                        continue
-                    
-                    loc = d_data.get("geometry", {}).get("location", {})
-                    
-                    # --- Distance Check ---
-                    try:
-                        place_lat = loc.get("lat")
-                        place_lon = loc.get("lng")
-                        if place_lat and place_lon:
-                            from math import radians, sin, cos, sqrt, atan2
-                            R = 6371  # Earth radius in km
-                            dlat = radians(place_lat - lat)
-                            dlon = radians(place_lon - lon)
-                            a = sin(dlat / 2)**2 + cos(radians(lat)) * cos(radians(place_lat)) * sin(dlon / 2)**2
-                            c = 2 * atan2(sqrt(a), sqrt(1 - a))
-                            distance = R * c
-                            
-                            if distance > max_distance:
-                                print(f"⚠️ Skipping {d_data.get('name')} (Too far: {distance:.2f} km > {max_distance} km)")
-                                continue
-                            
-                            place_distance = distance
-                    except Exception as e:
-                        print(f"⚠️ Error calculating distance: {e}")
-                        place_distance = None
-
-                    detailed_results.append({
-                        "name": d_data.get("name") or p.get("description"),
-                        "address": d_data.get("formatted_address"),
-                        "lat": loc.get("lat"),
-                        "lon": loc.get("lng"),
-                        "place_id": place_id,
-                        "rating": d_data.get("rating", "N/A"),
-                        "distance": f"{place_distance:.1f} km" if place_distance else "N/A",
-                        "status": "ACTIVE"
-                    })
-            except Exception as e:
-                print(f"⚠️ Error fetching details for {place_id}: {e}")
+            seen_place_ids.add(place_id)
+
+            # A place rejected for this category before would only be rejected again.
+            cached_reason = rejection_cache.get(query, lat, lon, place_id, recheck=still_too_far)
+            if cached_reason:
+                print(f"⏭️ Skipping {p.get('description') or place_id} (Cached: {cached_reason})")
                 continue
-        
-        # --- Fallback for Parks ---
-        if len(detailed_results) < 3 and ("park" in query_lower or "parks" in query_lower) and "garden" not in query_lower:
-            print(f"⚠️ Found only {len(detailed_results)} parks. Trying fallback search for 'Garden'...")
-            fallback_query = query_lower.replace("parks", "garden").replace("park", "garden")
-            
-            print(f"🗺️ Calling Ola Maps Search (Fallback): {fallback_query} near {lat},{lon}")
-            try:
-                f_params = {
-                    "input": fallback_query,
-                    "location": f"{lat},{lon}",
-                    "api_key": OLA_MAPS_API_KEY
-                }
-                f_resp = requests.get(url, params=f_params)
-                if f_resp.status_code == 200:
-                    f_data = f_resp.json()
-                    f_predictions = f_data.get("predictions", [])
-                    print(f"✅ Ola Maps Fallback Response: Found {len(f_predictions)} places.")
-                    
-                    for p in f_predictions[:25]:
-                        if len(detailed_results) >= 5:
-                            break
-                        
-                        place_id = p.get("place_id")
-                        if not place_id: continue
-                        
-                        # Check if already in results
-                        if any(r["place_id"] == place_id for r in detailed_results):
-                            continue
-                            
-                        try:
-                            d_params = {"place_id": place_id, "api_key": OLA_MAPS_API_KEY}
-                            d_resp = requests.get(details_url, params=d_params)
-                            if d_resp.status_code == 200:
-                                d_data = d_resp.json().get("result", {})
-                                place_name = (d_data.get("name") or p.get("description") or "").lower()
-                                
-                                # Apply same filters
-                                import re
-                                if re.match(r'^\d+', place_name) or "near " in place_name or "opp " in place_name: continue
-                                
-                                skipped = False
-                                for keyword in irrelevant_keywords:
-                                    if keyword in place_name:
-                                        skipped = True
-                                        break
-                                if skipped: continue
-                                
-                                loc = d_data.get("geometry", {}).get("location", {})
-                                place_lat = loc.get("lat")
-                                place_lon = loc.get("lng")
-                                
-                                place_distance = None
-                                if place_lat and place_lon:
-                                    from math import radians, sin, cos, sqrt, atan2
-                                    R = 6371
-                                    dlat = radians(place_lat - lat)
-                                    dlon = radians(place_lon - lon)
-                                    a = sin(dlat / 2)**2 + cos(radians(lat)) * cos(radians(place_lat)) * sin(dlon / 2)**2
-                                    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-                                    distance = R * c
-                                    if distance > max_distance: continue
-                                    place_distance = distance
-
-                                detailed_results.append({
-                                    "name": d_data.get("name") or p.get("description"),
-                                    "address": d_data.get("formatted_address"),
-                                    "lat": loc.get("lat"),
-                                    "lon": loc.get("lng"),
-                                    "place_id": place_id,
-                                    "rating": d_data.get("rating", "N/A"),
-                                    "distance": f"{place_distance:.1f} km" if place_distance else "N/A",
-                                    "status": "ACTIVE"
-                                })
-                        except: continue
-            except: pass
-
-        # --- Fallback for Shopping ---
-        # If we found fewer than 3 results for "Shopping Mall", try searching for generic "Shopping"
-        if len(detailed_results) < 3 and "shopping" in query_lower and "mall" not in query_lower:
-            print(f"⚠️ Found only {len(detailed_results)} malls. Trying fallback search for 'Shopping'...")
-            # We want to search for 'Shopping' specifically, so we use the original query 
-            # (which likely contains 'Shopping') but we must ensure we don't refine it to 'Mall' again.
-            # Since we are calling the API directly here, refinements won't apply.
-            fallback_query = query
-            
-            print(f"🗺️ Calling Ola Maps Search (Fallback): {fallback_query} near {lat},{lon}")
-            try:
-                f_params = {
-                    "input": fallback_query,
-                    "location": f"{lat},{lon}",
-                    "api_key": OLA_MAPS_API_KEY
-                }
-                f_resp = requests.get(url, params=f_params)
-                if f_resp.status_code == 200:
-                    f_data = f_resp.json()
-                    f_predictions = f_data.get("predictions", [])
-                    print(f"✅ Ola Maps Fallback Response: Found {len(f_predictions)} places.")
-                    
-                    for p in f_predictions[:25]:
-                        if len(detailed_results) >= 5:
-                            break
-                        
-                        place_id = p.get("place_id")
-                        if not place_id: continue
-                        
-                        # Check if already in results
-                        if any(r["place_id"] == place_id for r in detailed_results):
-                            continue
-                            
-                        try:
-                            d_params = {"place_id": place_id, "api_key": OLA_MAPS_API_KEY}
-                            d_resp = requests.get(details_url, params=d_params)
-                            if d_resp.status_code == 200:
-                                d_data = d_resp.json().get("result", {})
-                                place_name = (d_data.get("name") or p.get("description") or "").lower()
-                                
-                                # Apply same filters
-                                import re
-                                if re.match(r'^\d+', place_name) or "near " in place_name or "opp " in place_name: continue
-                                
-                                skipped = False
-                                for keyword in irrelevant_keywords:
-                                    if keyword in place_name:
-                                        skipped = True
-                                        break
-                                if skipped: continue
-                                
-                                loc = d_data.get("geometry", {}).get("location", {})
-                                place_lat = loc.get("lat")
-                                place_lon = loc.get("lng")
-                                
-                                place_distance = None
-                                if place_lat and place_lon:
-                                    from math import radians, sin, cos, sqrt, atan2
-                                    R = 6371
-                                    dlat = radians(place_lat - lat)
-                                    dlon = radians(place_lon - lon)
-                                    a = sin(dlat / 2)**2 + cos(radians(lat)) * cos(radians(place_lat)) * sin(dlon / 2)**2
-                                    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-                                    distance = R * c
-                                    if distance > max_distance: continue
-                                    place_distance = distance
-
-                                detailed_results.append({
-                                    "name": d_data.get("name") or p.get("description"),
-                                    "address": d_data.get("formatted_address"),
-                                    "lat": loc.get("lat"),
-                                    "lon": loc.get("lng"),
-                                    "place_id": place_id,
-                                    "rating": d_data.get("rating", "N/A"),
-                                    "distance": f"{place_distance:.1f} km" if place_distance else "N/A",
-                                    "status": "ACTIVE"
-                                })
-                        except: continue
-            except: pass
-
-        return deduplicate_places(detailed_results)
 
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Error calling Ola Maps Search: {e}")
-        return []
+            window.append((p, place_id))
+            if len(window) >= profile.details_concurrency:
+                break
+        return window
+
+    def scan(candidates: List[Dict], scan_depth: int, target: int) -> bool:
+        """
+        Fetch details for candidates, details_concurrency at a time, until
+        target results are found. Returns False once the deadline has passed.
+        """
+        candidates = iter(_within_fence(fence, candidates)[:scan_depth])
+        while len(detailed_results) < target:
+            window = next_window(candidates)
+            if not window:
+                return True
+            futures = [submit(_details_pool, details, place_id) for _, place_id in window]
+            for (p, place_id), future in zip(window, futures):
+                if len(detailed_results) >= target:
+                    break
+                try:
+                    d_data = future.result(timeout=remaining())
+                except FutureTimeoutError:
+                    print(f"⏱️ Search deadline ({profile.deadline:g}s) reached; returning {len(detailed_results)} places")
+                    return False
+                except (CircuitOpenError, DeadlineExceeded) as e:
+                    # The rest of the window would fail the same way.
+                    print(f"⚠️ Stopping details lookups: {e}")
+                    return False
+                except Exception as e:
+                    print(f"⚠️ Error fetching details for {place_id}: {e}")
+                    continue
+                if d_data is not None:
+                    consider(p, place_id, d_data)
+        return True
+
+    in_time = scan(predictions, profile.scan_depth, profile.target)
+
+    for variant_query, future in variant_futures:
+        if not in_time or (profile.fallback == "shortfall" and len(detailed_results) >= profile.target):
+            break
+        try:
+            variant_predictions = future.result(timeout=remaining())
+        except FutureTimeoutError:
+            print(f"⏱️ Search deadline ({profile.deadline:g}s) reached before variant '{variant_query}' answered")
+            break
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️ Variant search '{variant_query}' failed: {e}")
+            continue
+        print(f"⚠️ Found {len(detailed_results)} places. Using {len(variant_predictions)} results for '{variant_query}'...")
+        in_time = scan(variant_predictions, profile.variant_scan_depth, profile.variant_target)
+
+    radius_engine.record(query, lat, lon, relevant_venues)
+    rejection_cache.record(query, lat, lon, rejections)
+    results = deduplicate_places(detailed_results)
+    place_index.add(query, results)
+
+    if not in_time and len(results) < profile.target and local_results:
+        found = {place["place_id"] for place in results}
+        extra = [place for place in local_results if place["place_id"] not in found]
+        print(f"📇 Search cut short; adding {len(extra)} indexed places")
+        results = deduplicate_places(results + extra)
+    return results
 
 def deduplicate_places(places: List[Dict]) -> List[Dict]:
     """
@@ -0,0 +1,71 @@
+import atexit
+import json
+import os
+import threading
+from typing import Callable, Dict, Optional
+
+# Seconds a JSON store may hold unsaved changes; 0 writes on every change.
+PERSIST_INTERVAL = float(os.getenv("PERSIST_INTERVAL", "30"))
+
+def read_json(path: str) -> Optional[Dict]:
+    """
+    The JSON object stored at path, or None if it is missing or unreadable.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+def write_json(path: str, data: Dict):
+    """
+    Replace path with data atomically (write a temp file, then rename).
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+class DeferredWriter:
+    """
+    Batches a store's saves: schedule() after a change starts a background
+    timer, and write() runs once when it fires, however many changes came
+    in meanwhile. Pending changes are also written at exit. write() must
+    check for itself whether there is anything to save.
+    """
+
+    def __init__(self, write: Callable[[], None], name: str, interval: float = PERSIST_INTERVAL):
+        self.write = write
+        self.name = name
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        atexit.register(self.flush)
+
+    def schedule(self):
+        if self.interval <= 0:
+            self.flush()
+            return
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(self.interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """
+        Write pending changes now.
+        """
+        with self._lock:
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+        with self._write_lock:
+            try:
+                self.write()
+            except (OSError, TypeError, ValueError) as e:
+                print(f"⚠️ Could not save {self.name}: {e}")
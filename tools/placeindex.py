@@ -0,0 +1,314 @@
+import math
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from tools.geo import haversine_from
+from tools.persist import DeferredWriter, read_json, write_json
+from tools.radius import category_key
+from tools.rules import irrelevant_keywords, rejection_reason
+
+PLACE_INDEX_PATH = os.getenv("PLACE_INDEX_PATH", os.path.join("data", "place_index.json"))
+# Seconds an indexed place is fresh enough to answer a search without
+# going upstream, so new and closed places show up within a day.
+PLACE_INDEX_TTL = int(os.getenv("PLACE_INDEX_TTL", str(24 * 3600)))
+# Seconds an indexed place is still used when Ola Maps fails or is cut
+# short, and in OFFLINE_MODE. Older places are dropped from the index on
+# load and save; 0 keeps them forever.
+PLACE_INDEX_MAX_AGE = int(os.getenv("PLACE_INDEX_MAX_AGE", str(30 * 24 * 3600)))
+# Answer searches from the index only, without any Ola Maps calls.
+OFFLINE_MODE = os.getenv("OFFLINE_MODE", "0") == "1"
+
+# Grid cell size in degrees (0.01 is ~1.1 km at Bangalore's latitude).
+GRID_CELL_DEG = 0.01
+
+# Ranking: query words found in the name count more than words only found
+# in the address or the categories the place was accepted for.
+NAME_WEIGHT = 2.0
+RATING_WEIGHT = 0.5
+DISTANCE_WEIGHT = 1.0
+
+STOP_WORDS = {"in", "near", "around", "the", "and", "of", "a", "&"}
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase word tokens with a naive plural strip, so 'Parks' matches
+    'Cubbon Park'.
+    """
+    tokens = []
+    for token in _TOKEN.findall((text or "").lower()):
+        if token in STOP_WORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+def _cell(lat: float, lon: float) -> Tuple[int, int]:
+    return math.floor(lat / GRID_CELL_DEG), math.floor(lon / GRID_CELL_DEG)
+
+def _rating(place: Dict) -> float:
+    try:
+        return float(place.get("rating"))
+    except (TypeError, ValueError):
+        return 0.0
+
+class PlaceIndex:
+    """
+    Local index of places earlier searches accepted, so repeat searches can
+    be answered without Ola Maps.
+
+    An inverted index maps name, address and category words to rows, and a
+    lat/lon grid maps cells to rows; a search intersects the posting lists
+    of every query word with the cells around the origin, scores the
+    matches by name hits, rating and distance in one numpy pass, and runs
+    the same exclusion rules as search_places on the best ones until limit
+    places are found. Persisted as JSON; the rest is rebuilt on load.
+    Additions are saved in batches off the request path, after merging in
+    what other processes wrote to the file; places older than max_age are
+    dropped then and when the file is read.
+    """
+
+    def __init__(self, path: str = PLACE_INDEX_PATH, ttl: int = PLACE_INDEX_TTL, max_age: int = PLACE_INDEX_MAX_AGE):
+        self.path = path
+        self.ttl = ttl
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._writer = DeferredWriter(self._write, path)
+        self._places: Optional[Dict[str, Dict]] = None
+        self._rows: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._name_postings: Dict[str, Set[int]] = defaultdict(set)
+        self._tokens: List[Tuple[Set[str], Set[str]]] = []
+        self._grid: Dict[Tuple[int, int], Set[int]] = defaultdict(set)
+        # Per-row columns for vectorized scoring, rebuilt after changes.
+        self._columns: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = None
+
+    def _load(self) -> Dict[str, Dict]:
+        if self._places is None:
+            places = list((read_json(self.path) or {}).get("places", {}).values())
+            self._rebuild([place for place in places if not self._expired(place)])
+            if len(self._places) < len(places):
+                # Saved without the expired places at the next batch.
+                self._dirty = True
+        return self._places
+
+    def _expired(self, place: Dict) -> bool:
+        return self.max_age > 0 and place["at"] < time.time() - self.max_age
+
+    def _rebuild(self, places: Iterable[Dict]):
+        """
+        Replace the index's contents with places, renumbering the rows.
+        """
+        self._places = {}
+        self._rows = {}
+        self._ids = []
+        self._postings = defaultdict(set)
+        self._name_postings = defaultdict(set)
+        self._tokens = []
+        self._grid = defaultdict(set)
+        self._columns = None
+        for place in places:
+            self._add(place)
+
+    def load(self):
+        """
+        Read the index and build its posting lists and grid now rather than
+        on the first search.
+        """
+        with self._lock:
+            self._load()
+            self._get_columns()
+
+    def _write(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+
+        on_disk = (read_json(self.path) or {}).get("places", {})
+        with self._lock:
+            places = self._load()
+            for place_id, place in on_disk.items():
+                current = places.get(place_id)
+                if current is None:
+                    if not self._expired(place):
+                        self._add(place)
+                elif current["at"] < place["at"] or not set(place["categories"]) <= set(current["categories"]):
+                    newer = place if current["at"] < place["at"] else current
+                    self._add(dict(newer, categories=sorted(set(place["categories"]) | set(current["categories"]))))
+            if any(self._expired(place) for place in places.values()):
+                self._rebuild([place for place in places.values() if not self._expired(place)])
+                places = self._places
+            # Records are replaced, never changed in place, so a shallow
+            # copy can be written without the lock.
+            snapshot = dict(places)
+        write_json(self.path, {"places": snapshot})
+
+    def flush(self):
+        """
+        Save pending additions now rather than at the next batch.
+        """
+        self._writer.flush()
+
+    def _add(self, place: Dict):
+        place_id = place["place_id"]
+        row = self._rows.get(place_id)
+        if row is None:
+            row = self._rows[place_id] = len(self._ids)
+            self._ids.append(place_id)
+            self._tokens.append((set(), set()))
+        else:
+            self._remove(row)
+        self._places[place_id] = place
+
+        name_tokens = set(tokenize(place["name"]))
+        tokens = name_tokens | set(tokenize(place.get("address")))
+        for category in place["categories"]:
+            tokens.update(tokenize(category))
+        self._tokens[row] = (tokens, name_tokens)
+        for token in tokens:
+            self._postings[token].add(row)
+        for token in name_tokens:
+            self._name_postings[token].add(row)
+        self._grid[_cell(place["lat"], place["lon"])].add(row)
+        self._columns = None
+
+    def _remove(self, row: int):
+        place = self._places[self._ids[row]]
+        tokens, name_tokens = self._tokens[row]
+        for postings, words in ((self._postings, tokens), (self._name_postings, name_tokens)):
+            for token in words:
+                postings[token].discard(row)
+                if not postings[token]:
+                    del postings[token]
+        self._grid[_cell(place["lat"], place["lon"])].discard(row)
+
+    def _get_columns(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        if self._columns is None:
+            places = [self._places[place_id] for place_id in self._ids]
+            self._columns = (
+                np.array([p["lat"] for p in places], dtype=float),
+                np.array([p["lon"] for p in places], dtype=float),
+                np.array([_rating(p) for p in places], dtype=float),
+                np.array([p["at"] for p in places], dtype=float),
+            )
+        return self._columns
+
+    def add(self, query: str, places: Iterable[Dict]):
+        """
+        Index places a search for query accepted, tagged with its category.
+        """
+        category = category_key(query)
+        now = time.time()
+        with self._lock:
+            indexed = self._load()
+            added = 0
+            for place in places:
+                place_id = place.get("place_id")
+                if not place_id or place_id.startswith("dir_") or place.get("lat") is None or place.get("lon") is None:
+                    continue
+                categories = set(indexed.get(place_id, {}).get("categories", [])) | {category}
+                self._add({
+                    "place_id": place_id,
+                    "name": place["name"],
+                    "address": place.get("address"),
+                    "lat": float(place["lat"]),
+                    "lon": float(place["lon"]),
+                    "rating": place.get("rating", "N/A"),
+                    "categories": sorted(categories),
+                    "at": now,
+                })
+                added += 1
+            if added:
+                self._dirty = True
+        if added:
+            self._writer.schedule()
+
+    def _nearby(self, rows: Set[int], lat: float, lon: float, radius_km: float) -> Set[int]:
+        """
+        Narrow rows to grid cells overlapping the radius' bounding box. For
+        wide radii with few matches the distance filter alone is cheaper.
+        """
+        lat_span = radius_km / 111.0
+        lon_span = radius_km / (111.0 * max(math.cos(math.radians(lat)), 0.01))
+        lat_min, lon_min = _cell(lat - lat_span, lon - lon_span)
+        lat_max, lon_max = _cell(lat + lat_span, lon + lon_span)
+        if (lat_max - lat_min + 1) * (lon_max - lon_min + 1) > len(rows):
+            return rows
+        nearby = set()
+        for i in range(lat_min, lat_max + 1):
+            for j in range(lon_min, lon_max + 1):
+                cell = self._grid.get((i, j))
+                if cell:
+                    nearby |= cell
+        return rows & nearby
+
+    def search(self, query: str, lat: float, lon: float, radius_km: float, limit: int = 10, max_age: Optional[float] = None) -> List[Dict]:
+        """
+        Indexed places matching every word of the query's category within
+        radius_km of (lat, lon), best first, in search_places' result format.
+        Only places indexed within max_age seconds count (default: the
+        index's ttl; 0 for any age).
+        """
+        max_age = self.ttl if max_age is None else max_age
+        tokens = tokenize(category_key(query))
+        if not tokens:
+            return []
+        keywords = irrelevant_keywords(query.lower())
+        with self._lock:
+            self._load()
+            postings = sorted((self._postings.get(token, set()) for token in tokens), key=len)
+            rows = postings[0]
+            for posting in postings[1:]:
+                rows = rows & posting
+            rows = self._nearby(rows, lat, lon, radius_km)
+            if not rows:
+                return []
+
+            lats, lons, ratings, indexed_at = self._get_columns()
+            rows = np.fromiter(rows, dtype=np.int64, count=len(rows))
+            distances = haversine_from(lat, lon, lats[rows], lons[rows])
+            keep = distances <= radius_km
+            if max_age > 0:
+                keep &= indexed_at[rows] >= time.time() - max_age
+            rows, distances = rows[keep], distances[keep]
+
+            scores = RATING_WEIGHT * ratings[rows] - DISTANCE_WEIGHT * distances / radius_km
+            for token in set(tokens):
+                name_rows = self._name_postings.get(token)
+                if name_rows:
+                    scores += NAME_WEIGHT * np.isin(rows, np.fromiter(name_rows, dtype=np.int64, count=len(name_rows)))
+
+            results = []
+            for i in np.argsort(-scores, kind="stable"):
+                place = self._places[self._ids[rows[i]]]
+                if rejection_reason(place["name"].lower(), keywords):
+                    continue
+                results.append({
+                    "name": place["name"],
+                    "address": place["address"],
+                    "lat": place["lat"],
+                    "lon": place["lon"],
+                    "place_id": place["place_id"],
+                    "rating": place["rating"],
+                    "distance": f"{distances[i]:.1f} km",
+                    "status": "ACTIVE"
+                })
+                if len(results) >= limit:
+                    break
+            return results
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load())
+
+place_index = PlaceIndex()
@@ -0,0 +1,57 @@
+import os
+from typing import Dict, NamedTuple, Union
+
+class SearchProfile(NamedTuple):
+    """
+    Latency/quality trade-offs for one search_places call.
+
+    scan_depth / target: autocomplete candidates examined and results wanted
+        from the primary query; variant_scan_depth / variant_target the same
+        for each variant query (variant_target counts all results so far).
+    fallback: when variant queries are used - "never", "shortfall" (only
+        while the primary found fewer than target) or "always".
+    details_concurrency: details requests in flight at once. Above 1, a few
+        candidates past the target may be fetched for nothing.
+    deadline: seconds after which the search returns what it has so far.
+    radius_km / sparse_radius_km: default radius for regular and sparse
+        categories, before the learned radius adjusts it.
+    """
+    name: str
+    scan_depth: int
+    target: int
+    variant_scan_depth: int
+    variant_target: int
+    fallback: str
+    details_concurrency: int
+    deadline: float
+    radius_km: float
+    sparse_radius_km: float
+
+PROFILES: Dict[str, SearchProfile] = {
+    profile.name: profile for profile in [
+        SearchProfile("fast", scan_depth=20, target=3, variant_scan_depth=0, variant_target=0,
+                      fallback="never", details_concurrency=6, deadline=4.0,
+                      radius_km=5.0, sparse_radius_km=20.0),
+        SearchProfile("balanced", scan_depth=50, target=3, variant_scan_depth=25, variant_target=5,
+                      fallback="shortfall", details_concurrency=3, deadline=10.0,
+                      radius_km=7.0, sparse_radius_km=30.0),
+        SearchProfile("thorough", scan_depth=80, target=5, variant_scan_depth=40, variant_target=8,
+                      fallback="always", details_concurrency=4, deadline=25.0,
+                      radius_km=10.0, sparse_radius_km=40.0),
+    ]
+}
+
+DEFAULT_PROFILE = os.getenv("SEARCH_PROFILE", "balanced")
+
+def get_profile(profile: Union[str, SearchProfile, None] = None) -> SearchProfile:
+    """
+    Resolve a profile name (or None for SEARCH_PROFILE) to its settings.
+    Unknown names fall back to "balanced".
+    """
+    if isinstance(profile, SearchProfile):
+        return profile
+    name = profile or DEFAULT_PROFILE
+    if name not in PROFILES:
+        print(f"⚠️ Unknown search profile '{name}', using 'balanced'")
+        name = "balanced"
+    return PROFILES[name]
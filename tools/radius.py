@@ -0,0 +1,130 @@
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from tools.geo import geohash_encode
+from tools.persist import DeferredWriter, read_json, write_json
+
+RADIUS_STATS_PATH = os.getenv("RADIUS_STATS_PATH", os.path.join("data", "radius_stats.json"))
+
+# Geohash length of the area bucket (5 is roughly 5 x 5 km).
+AREA_PRECISION = 5
+# Relevant venues remembered per (category, area); the oldest are evicted first.
+MAX_SAMPLES = 60
+# How many in-range candidates one search should be able to find.
+TARGET_RESULTS = 3
+# Venues that must be observed before the learned radius replaces the default.
+MIN_SAMPLES = 6
+# Headroom over the distance of the TARGET_RESULTS-th nearest venue.
+RADIUS_MARGIN = 1.25
+MIN_RADIUS_KM = 2.0
+# The learned radius may grow past the default by at most this factor.
+MAX_RADIUS_FACTOR = 1.5
+
+_AREA_SUFFIX = re.compile(r"\s+(?:in|near|around)\s+.*$")
+
+def category_key(query: str) -> str:
+    """
+    'Italian Restaurant in Koramangala' -> 'italian restaurant'.
+    """
+    return _AREA_SUFFIX.sub("", " ".join(query.lower().split())).strip()
+
+class RadiusEngine:
+    """
+    Learns how far relevant venues of each category sit from each area and
+    suggests a search radius that should yield enough results on the first try.
+
+    Samples are the distances of places that passed the relevance filters,
+    whether or not they were in range, keyed by place_id so repeat searches
+    do not skew the density estimate. The stats are persisted as JSON in
+    batches; a save replays this process's new samples onto what is in the
+    file, so processes sharing it keep each other's samples.
+    """
+
+    def __init__(self, path: str = RADIUS_STATS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stats: Optional[Dict[str, Dict[str, float]]] = None
+        # Samples recorded since the last save, per bucket key.
+        self._pending: Dict[str, List[Tuple[str, float]]] = {}
+        self._writer = DeferredWriter(self._write, path)
+
+    def _key(self, query: str, lat: float, lon: float) -> str:
+        return f"{category_key(query)}|{geohash_encode(lat, lon, AREA_PRECISION)}"
+
+    def _load(self) -> Dict[str, Dict[str, float]]:
+        if self._stats is None:
+            self._stats = read_json(self.path) or {}
+        return self._stats
+
+    @staticmethod
+    def _apply(bucket: Dict[str, float], venues: Iterable[Tuple[str, float]]):
+        # Re-inserting moves a venue to the end, so eviction drops the oldest.
+        for place_id, distance in venues:
+            bucket.pop(place_id, None)
+            bucket[place_id] = distance
+        while len(bucket) > MAX_SAMPLES:
+            bucket.pop(next(iter(bucket)))
+
+    def _write(self):
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+
+        on_disk = read_json(self.path)
+        with self._lock:
+            stats = self._load() if on_disk is None else on_disk
+            for key, venues in pending.items():
+                self._apply(stats.setdefault(key, {}), venues)
+            # Samples recorded while the file was read go on top.
+            for key, venues in self._pending.items():
+                self._apply(stats.setdefault(key, {}), venues)
+            self._stats = stats
+            snapshot = {key: dict(bucket) for key, bucket in stats.items()}
+        write_json(self.path, snapshot)
+
+    def flush(self):
+        """
+        Save pending samples now rather than at the next batch.
+        """
+        self._writer.flush()
+
+    def load(self):
+        """
+        Read the persisted stats now rather than on the first search.
+        """
+        with self._lock:
+            self._load()
+
+    def suggest(self, query: str, lat: float, lon: float, default_km: float) -> Tuple[float, int]:
+        """
+        Return (radius_km, samples_used). Falls back to default_km until
+        enough venues have been observed for this category and area.
+        """
+        with self._lock:
+            samples = list(self._load().get(self._key(query, lat, lon), {}).values())
+
+        if len(samples) < MIN_SAMPLES:
+            return default_km, len(samples)
+
+        nth_nearest = sorted(samples)[TARGET_RESULTS - 1]
+        radius = min(max(nth_nearest * RADIUS_MARGIN, MIN_RADIUS_KM), default_km * MAX_RADIUS_FACTOR)
+        return round(radius, 1), len(samples)
+
+    def record(self, query: str, lat: float, lon: float, venues: Iterable[Tuple[str, float]]):
+        """
+        Remember (place_id, distance_km) for relevant venues found by a search.
+        """
+        venues = [(pid, round(dist, 2)) for pid, dist in venues if pid and dist is not None]
+        if not venues:
+            return
+
+        key = self._key(query, lat, lon)
+        with self._lock:
+            self._apply(self._load().setdefault(key, {}), venues)
+            self._pending.setdefault(key, []).extend(venues)
+        self._writer.schedule()
+
+radius_engine = RadiusEngine()
@@ -0,0 +1,204 @@
+import hashlib
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from tools.geo import geohash_encode
+from tools.persist import DeferredWriter, read_json, write_json
+from tools.radius import category_key
+from tools.rules import irrelevant_keywords
+
+REJECTIONS_PATH = os.getenv("REJECTIONS_PATH", os.path.join("data", "rejections.json"))
+# Seconds a rejection is trusted before the place gets another details call.
+REJECTION_TTL = int(os.getenv("REJECTION_TTL", str(7 * 24 * 3600)))
+# Oldest rejections are dropped past this many entries.
+MAX_REJECTIONS = 20000
+
+# Rejections that depend on the search origin (and so the area searched),
+# not only on the place.
+ORIGIN_RULES = {"distance", "geofence"}
+# Rejections that also depend on the search's radius. They are stored with
+# what was measured and re-checked against the radius of each search.
+MEASURED_RULES = {"distance"}
+# Rejections that depend on the query's keyword list. The list is built from
+# the whole query, area included ('Malleshwaram' contains 'mall'), so these
+# are keyed on the list itself rather than on the category.
+KEYWORD_RULES = {"keyword"}
+# Geohash length of the origin cell for those (6 is roughly 1.2 x 0.6 km).
+ORIGIN_PRECISION = 6
+
+@lru_cache(maxsize=None)
+def _keyword_scope(keywords: Tuple[str, ...]) -> str:
+    return "kw:" + hashlib.sha1("\n".join(keywords).encode("utf-8")).hexdigest()[:12]
+
+class RejectionCache:
+    """
+    Remembers places that search_places fetched details for and then threw
+    away, so the next autocomplete returning them skips the details call.
+
+    Rejections that only depend on the place (directory, address marker, no
+    coordinates) are keyed by (category, place_id); distance and geofence
+    rejections also by the origin's geohash cell; keyword rejections by the
+    keyword list that rejected the place. A distance rejection only holds
+    while the place is still out of the radius being searched, so it keeps
+    the distance and travel time it was decided on. Per-rule counts of
+    rejections and of details calls skipped are kept with the entries.
+
+    Changes are saved in batches off the request path. A save first merges
+    in what other processes wrote to the file, so they do not overwrite
+    each other's entries or counts.
+    """
+
+    def __init__(self, path: str = REJECTIONS_PATH, ttl: int = REJECTION_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data: Optional[Dict] = None
+        # Counts gathered since the last save, added to the file's on save.
+        self._pending: Dict[str, Dict[str, int]] = {}
+        self._dirty = False
+        self._writer = DeferredWriter(self._write, path)
+
+    def _key(self, scope: str, place_id: str, area: Optional[str] = None) -> str:
+        return f"{scope}|{place_id}|{area}" if area else f"{scope}|{place_id}"
+
+    def _scopes(self, query: str, lat: float, lon: float) -> Tuple[str, str, str]:
+        """
+        (category, origin cell, keyword list id) a query's rejections are keyed by.
+        """
+        return category_key(query), geohash_encode(lat, lon, ORIGIN_PRECISION), _keyword_scope(irrelevant_keywords(query.lower()))
+
+    def _load(self) -> Dict:
+        if self._data is None:
+            self._data = read_json(self.path) or {}
+            self._data.setdefault("entries", {})
+            self._data.setdefault("stats", {})
+        return self._data
+
+    def _write(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            pending, self._pending = self._pending, {}
+
+        on_disk = read_json(self.path)
+        with self._lock:
+            data = self._load()
+            entries = data["entries"]
+            if on_disk is not None:
+                for key, entry in on_disk.get("entries", {}).items():
+                    current = entries.get(key)
+                    if current is None or current["at"] < entry["at"]:
+                        entries[key] = entry
+                data["stats"] = on_disk.get("stats", {})
+            for rule, counts in pending.items():
+                totals = data["stats"].setdefault(rule, {"rejected": 0, "skipped": 0})
+                for name, count in counts.items():
+                    totals[name] = totals.get(name, 0) + count
+
+            if self.ttl > 0:
+                cutoff = time.time() - self.ttl
+                for key in [k for k, entry in entries.items() if entry["at"] < cutoff]:
+                    del entries[key]
+            if len(entries) > MAX_REJECTIONS:
+                for key in sorted(entries, key=lambda k: entries[k]["at"])[:len(entries) - MAX_REJECTIONS]:
+                    del entries[key]
+            snapshot = {
+                "entries": dict(entries),
+                "stats": {rule: dict(counts) for rule, counts in data["stats"].items()},
+            }
+        write_json(self.path, snapshot)
+
+    def _count(self, rule: str, name: str):
+        counts = self._pending.setdefault(rule, {"rejected": 0, "skipped": 0})
+        counts[name] += 1
+        self._dirty = True
+
+    def flush(self):
+        """
+        Save pending changes now rather than at the next batch.
+        """
+        self._writer.flush()
+
+    def get(self, query: str, lat: float, lon: float, place_id: str,
+            recheck: Optional[Callable[[Dict], Optional[str]]] = None) -> Optional[str]:
+        """
+        Cached rejection reason for place_id in this query's category, or None.
+        A hit counts as one skipped details call for its rule.
+
+        Rejections recorded with measurements (a distance rejection's distance
+        and travel minutes) are passed to recheck, which returns the reason
+        they still apply for this search, or None if they no longer do (a
+        larger radius); without recheck they are not trusted.
+        """
+        if self.ttl <= 0:
+            return None
+        category, area, keyword_scope = self._scopes(query, lat, lon)
+        keys = (self._key(category, place_id), self._key(category, place_id, area), self._key(keyword_scope, place_id))
+        now = time.time()
+        with self._lock:
+            entries = self._load()["entries"]
+            for key in keys:
+                entry = entries.get(key)
+                if entry is None:
+                    continue
+                if now - entry["at"] > self.ttl:
+                    del entries[key]
+                    continue
+                reason = entry["reason"]
+                if entry["rule"] in MEASURED_RULES:
+                    measured = entry.get("measured")
+                    reason = recheck(measured) if measured is not None and recheck is not None else None
+                    if reason is None:
+                        continue
+                self._count(entry["rule"], "skipped")
+                break
+            else:
+                return None
+        self._writer.schedule()
+        return reason
+
+    def record(self, query: str, lat: float, lon: float, rejections: Iterable[Tuple[str, str, str, Optional[Dict]]]):
+        """
+        Store one search's (place_id, rule, reason, measured) rejections,
+        measured being what a MEASURED_RULES rejection was decided on. They
+        are saved with the next batch.
+        """
+        rejections = list(rejections)
+        if self.ttl <= 0 or not rejections:
+            return
+        category, area, keyword_scope = self._scopes(query, lat, lon)
+        now = time.time()
+        with self._lock:
+            entries = self._load()["entries"]
+            for place_id, rule, reason, measured in rejections:
+                if rule in ORIGIN_RULES:
+                    key = self._key(category, place_id, area)
+                elif rule in KEYWORD_RULES:
+                    key = self._key(keyword_scope, place_id)
+                else:
+                    key = self._key(category, place_id)
+                entry = {"rule": rule, "reason": reason, "at": now}
+                if measured is not None:
+                    entry["measured"] = measured
+                entries[key] = entry
+                self._count(rule, "rejected")
+        self._writer.schedule()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Per-rule counts: places rejected after a details call, and details
+        calls skipped because the rejection was cached.
+        """
+        with self._lock:
+            stats = {rule: dict(counts) for rule, counts in self._load()["stats"].items()}
+            for rule, counts in self._pending.items():
+                totals = stats.setdefault(rule, {"rejected": 0, "skipped": 0})
+                for name, count in counts.items():
+                    totals[name] = totals.get(name, 0) + count
+        return stats
+
+rejection_cache = RejectionCache()
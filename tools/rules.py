@@ -0,0 +1,174 @@
+"""
+Query refinement and relevance rules for place search, compiled once per
+process and shared by every search.
+"""
+import re
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Pattern, Tuple
+
+# --- Hardcoded Directory ---
+DIRECTORY_PLACES = {
+    "museum": [
+        {"name": "Visvesvaraya Industrial and Technological Museum", "lat": 12.9753, "lon": 77.5963, "address": "Kasturba Rd, Ambedkar Veedhi, Bengaluru, Karnataka 560001"},
+        {"name": "Government Museum", "lat": 12.9767, "lon": 77.5958, "address": "Kasturba Rd, Ambedkar Veedhi, Bengaluru, Karnataka 560001"},
+        {"name": "HAL Heritage Centre and Aerospace Museum", "lat": 12.9532, "lon": 77.6816, "address": "HAL Old Airport Rd, Marathahalli, Bengaluru, Karnataka 560037"},
+        {"name": "Jawaharlal Nehru Planetarium", "lat": 12.9849, "lon": 77.5896, "address": "Sri T, Sankey Rd, High Grounds, Bengaluru, Karnataka 560001"},
+        {"name": "Indian Music Experience Museum", "lat": 12.8914, "lon": 77.5861, "address": "JP Nagar 7th Phase, Bengaluru, Karnataka 560078"},
+        {"name": "Brain Museum", "lat": 12.9344, "lon": 77.5933, "address": "NIMHANS, Hosur Road, Bengaluru, Karnataka 560029"}
+    ],
+    "zoo": [
+        {"name": "Bannerghatta Biological Park", "lat": 12.8009, "lon": 77.5777, "address": "Bannerghatta Rd, Bengaluru, Karnataka 560083"}
+    ]
+}
+
+DIRECTORY_NAMES = [item["name"].lower() for cat_list in DIRECTORY_PLACES.values() for item in cat_list]
+
+class QueryStrategy(NamedTuple):
+    """
+    How to query Ola Maps for one category.
+
+    keywords: words that select this strategy (first matching strategy wins).
+    refine_to: replacement for the matched word in the primary query.
+    variants: replacements issued speculatively alongside the primary query;
+        their results are only used when the primary yields too few places.
+    unless: words that, when already in the query, disable the variants.
+    """
+    keywords: Tuple[str, ...]
+    refine_to: str
+    variants: Tuple[str, ...] = ()
+    unless: Tuple[str, ...] = ()
+
+CATEGORY_STRATEGIES = [
+    QueryStrategy(("parks", "park"), "Park", variants=("Garden",), unless=("garden", "amusement", "theme")),
+    QueryStrategy(("brewery",), "Microbrewery"),
+    QueryStrategy(("gym",), "Gymnasium Fitness Center"),
+    QueryStrategy(("library",), "Public Library"),
+    QueryStrategy(("arcade",), "Shopping Mall"),
+    # Malls are refined in; plain "Shopping" covers markets and high streets.
+    QueryStrategy(("shopping",), "Shopping Mall", variants=("Shopping",), unless=("mall",)),
+    QueryStrategy(("theaters", "movies"), "Cinema"),
+]
+
+SPARSE_CATEGORIES = ["museum", "zoo", "amusement park", "stadium", "airport", "theme park"]
+
+ADDRESS_MARKER = re.compile(r'^\d+')
+ADDRESS_MARKER_WORDS = ["near ", "opp ", "opposite "]
+
+BASE_IRRELEVANT_KEYWORDS = [
+    "parking", "metro", "ward", "road", "junction", "bus stop", 
+    "railway", "station", "atm", "toll", "post office"
+]
+
+ACTIVITY_IRRELEVANT_KEYWORDS = [
+    "hotel", "inn", "residency", "packers", "movers", "travels", "lodge", 
+    "school", "college", "university", "academy", "class", "openhouse",
+    "developers", "enclave", "apartment", "building", "tower", "mall", 
+    "shopping", "store", "outlet", "estate", 
+    "tech park", "industrial", "campus", "office", "corporate", "sez", 
+    "zone", "business park", "export",
+    "infra", "infrastructure", "construction", "pvt ltd", "private limited", "limited",
+    "shipping", "courier", "online", "logistics", "cargo", "freight", "import", "inc", "builders", "contractors",
+    "event", "flingg", "decor", "planter", "cabinet", "furniture", "nursery"
+]
+
+# Word-boundary patterns for every strategy keyword, compiled once.
+_KEYWORD_PATTERNS = {
+    keyword: re.compile(r'\b' + re.escape(keyword) + r'\b', re.IGNORECASE)
+    for strategy in CATEGORY_STRATEGIES
+    for keyword in strategy.keywords
+}
+
+ACTIVITY_QUERY_WORDS = ("park", "activity", "activities", "tourist", "sightseeing", "attraction", "place", "shopping", "mall", "market")
+THEATER_QUERY_WORDS = ("theater", "theatre", "movie", "cinema")
+SHOPPING_QUERY_WORDS = ("shopping", "mall", "market")
+
+def strategy_queries(query: str) -> Tuple[str, List[str]]:
+    """
+    Return (primary_query, variant_queries) for a user query.
+    """
+    query_lower = query.lower()
+    for strategy in CATEGORY_STRATEGIES:
+        matched = next((k for k in strategy.keywords if k in query_lower), None)
+        if not matched:
+            continue
+
+        pattern = _KEYWORD_PATTERNS[matched]
+        primary = query
+        if strategy.refine_to.lower() not in query_lower:
+            primary = pattern.sub(strategy.refine_to, query)
+            print(f"🔄 Refined Query: '{query}' -> '{primary}'")
+
+        variants = []
+        if not any(word in query_lower for word in strategy.unless):
+            for variant in strategy.variants:
+                variant_query = pattern.sub(variant, query)
+                if variant_query.lower() != primary.lower() and variant_query not in variants:
+                    variants.append(variant_query)
+        return primary, variants
+    return query, []
+
+def irrelevant_keywords(query_lower: str) -> Tuple[str, ...]:
+    """
+    Name keywords that disqualify a place for this query.
+    """
+    return _keywords_for(
+        any(k in query_lower for k in ACTIVITY_QUERY_WORDS),
+        any(k in query_lower for k in THEATER_QUERY_WORDS),
+        any(k in query_lower for k in SHOPPING_QUERY_WORDS),
+        "brewery" in query_lower,
+        "gym" in query_lower,
+        "restaurant" in query_lower or "cafe" in query_lower
+    )
+
+@lru_cache(maxsize=None)
+def _keywords_for(is_activity: bool, is_theater: bool, is_shopping: bool, is_brewery: bool, is_gym: bool, is_restaurant: bool) -> Tuple[str, ...]:
+    """
+    Keyword list for one combination of query traits; there are only a few
+    dozen combinations, so each is built once per process.
+    """
+    keywords = list(BASE_IRRELEVANT_KEYWORDS)
+
+    if is_activity or is_theater:
+        keywords.extend(ACTIVITY_IRRELEVANT_KEYWORDS)
+
+        if is_shopping:
+            keywords.extend(["cafe", "coffee", "tea", "restaurant", "food", "dining"])
+            keywords = [k for k in keywords if k not in ("mall", "shopping", "store", "outlet")]
+
+    if is_theater:
+        keywords.extend(["maac", "animation", "education", "coaching"])
+
+    if is_brewery:
+        keywords.extend(["coffee", "cafe", "tea"])
+    if is_gym:
+        keywords.extend(["school", "academy", "class"])
+
+    # Restaurant specific exclusions
+    if is_restaurant:
+        keywords.extend(["tyre", "wheel", "residency", "apartment", "lodge", "pg", "paying guest"])
+
+    return tuple(keywords)
+
+@lru_cache(maxsize=None)
+def _keyword_pattern(keywords: Tuple[str, ...]) -> Pattern[str]:
+    return re.compile("|".join(re.escape(k) for k in keywords))
+
+def rejection_reason(place_name: str, keywords: Tuple[str, ...]) -> Optional[Tuple[str, str]]:
+    """
+    (rule, reason) for a place name that fails the relevance filters, or
+    None if it passes. rule is 'directory', 'address' or 'keyword'.
+    """
+    for dir_name in DIRECTORY_NAMES:
+        if dir_name in place_name or place_name in dir_name:
+            return "directory", "Exists in Directory"
+
+    if ADDRESS_MARKER.match(place_name) or any(marker in place_name for marker in ADDRESS_MARKER_WORDS):
+        return "address", "Address marker detected"
+
+    # One compiled scan rejects most names; only a hit needs the ordered
+    # walk to report the same keyword the list order would.
+    if _keyword_pattern(keywords).search(place_name):
+        for keyword in keywords:
+            if keyword in place_name:
+                return "keyword", f"Match: '{keyword}'"
+    return None
@@ -0,0 +1,83 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import requests
+
+from tools.http import DeadlineExceeded, current_deadline
+
+# Errors a call gets from running out of its caller's time budget, rather
+# than from the resource it asked for.
+DEADLINE_ERRORS = (DeadlineExceeded, requests.exceptions.Timeout)
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one in-flight call.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running wait for and share its result (or exception). With
+    keep=False nothing is kept once the call finishes, so this is not a
+    cache; with keep=True finished calls are kept and later callers get
+    their result too (a memo for the lifetime of the object).
+
+    A leader that fails on its own, earlier deadline does not fail its
+    followers: a follower with time left runs the call again itself.
+    """
+
+    def __init__(self, keep: bool = False):
+        self.keep = keep
+        # key -> (future, the leader's deadline)
+        self._calls: Dict[Hashable, Tuple[Future, Optional[float]]] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        while True:
+            deadline = current_deadline()
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = (Future(), deadline)
+                    self.executed += 1
+                else:
+                    self.coalesced += 1
+            future, leader_deadline = call
+
+            if leader:
+                return self._lead(key, future, fn, *args, **kwargs)
+
+            try:
+                return future.result()
+            except DEADLINE_ERRORS:
+                if not self._outlived(leader_deadline, deadline):
+                    raise
+                print(f"🔁 Retrying {key} after the shared call ran out of its caller's time")
+
+    @staticmethod
+    def _outlived(leader_deadline: Optional[float], deadline: Optional[float]) -> bool:
+        """
+        True if the leader's deadline has passed but this caller's has not.
+        """
+        if leader_deadline is None or time.monotonic() < leader_deadline:
+            return False
+        return deadline is None or deadline > leader_deadline
+
+    def _lead(self, key: Hashable, future: Future, fn: Callable, *args, **kwargs) -> Any:
+        failed_on_deadline = False
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except DEADLINE_ERRORS as e:
+            failed_on_deadline = True
+            future.set_exception(e)
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            # A deadline failure is the leader's own; never keep it.
+            if not self.keep or failed_on_deadline:
+                with self._lock:
+                    if self._calls.get(key, (None,))[0] is future:
+                        del self._calls[key]
+        return future.result()
@@ -0,0 +1,209 @@
+"""
+Precomputed road travel times between geohash cells.
+
+The grid is built offline from an OpenStreetMap XML extract:
+
+    python -m tools.traveltime city.osm data/travel_times.npz --precision 6
+
+and loaded once per process. Lookups are two geohash encodes plus one matrix
+read, so distance filtering and itinerary ordering need no routing API calls.
+"""
+import argparse
+import heapq
+import os
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from tools.geo import geohash_encode, haversine_km
+
+TRAVEL_TIME_GRID = os.getenv("TRAVEL_TIME_GRID", os.path.join("data", "travel_times.npz"))
+
+# Typical Bangalore speeds (km/h) by OSM highway class, including congestion.
+HIGHWAY_SPEEDS = {
+    "motorway": 45, "motorway_link": 35,
+    "trunk": 30, "trunk_link": 25,
+    "primary": 22, "primary_link": 20,
+    "secondary": 20, "secondary_link": 18,
+    "tertiary": 18, "tertiary_link": 16,
+    "unclassified": 15, "residential": 14,
+    "living_street": 10, "service": 10,
+}
+
+# uint16 seconds saturates at ~18h, far beyond any in-city trip.
+UNREACHABLE = np.iinfo(np.uint16).max
+
+class TravelTimeGrid:
+    """
+    Travel seconds between geohash cells, stored as a dense uint16 matrix.
+    """
+
+    def __init__(self, cells: List[str], seconds: np.ndarray, precision: int):
+        self.precision = precision
+        self.seconds = seconds
+        self.index: Dict[str, int] = {cell: i for i, cell in enumerate(cells)}
+
+    @classmethod
+    def load(cls, path: str) -> "TravelTimeGrid":
+        data = np.load(path)
+        return cls(list(data["cells"]), data["seconds"], int(data["precision"]))
+
+    def save(self, path: str):
+        cells = sorted(self.index, key=self.index.get)
+        np.savez_compressed(path, cells=np.array(cells), seconds=self.seconds, precision=self.precision)
+
+    def cell(self, lat: float, lon: float) -> Optional[int]:
+        return self.index.get(geohash_encode(lat, lon, self.precision))
+
+    def travel_minutes(self, lat1: float, lon1: float, lat2: float, lon2: float) -> Optional[float]:
+        """
+        Road travel time in minutes, or None if either point is outside the grid.
+        """
+        i = self.cell(lat1, lon1)
+        j = self.cell(lat2, lon2)
+        if i is None or j is None:
+            return None
+        seconds = self.seconds[i, j]
+        if seconds == UNREACHABLE:
+            return None
+        return float(seconds) / 60
+
+_grid: Optional[TravelTimeGrid] = None
+_grid_loaded = False
+_grid_lock = threading.Lock()
+
+def get_grid() -> Optional[TravelTimeGrid]:
+    """
+    The process-wide grid, loaded on first use. None if no grid file is installed.
+    """
+    global _grid, _grid_loaded
+    if not _grid_loaded:
+        with _grid_lock:
+            if not _grid_loaded:
+                if os.path.exists(TRAVEL_TIME_GRID):
+                    _grid = TravelTimeGrid.load(TRAVEL_TIME_GRID)
+                    print(f"🚦 Loaded travel-time grid: {len(_grid.index)} cells")
+                _grid_loaded = True
+    return _grid
+
+def travel_minutes(lat1: float, lon1: float, lat2: float, lon2: float) -> Optional[float]:
+    """
+    O(1) road travel time between two points, or None if no grid covers them.
+    """
+    grid = get_grid()
+    if grid is None:
+        return None
+    return grid.travel_minutes(lat1, lon1, lat2, lon2)
+
+# --- Offline build ---
+
+def _edge_seconds(lat1: float, lon1: float, lat2: float, lon2: float, speed_kmph: float) -> float:
+    return haversine_km(lat1, lon1, lat2, lon2) / speed_kmph * 3600
+
+def load_road_graph(osm_path: str) -> Tuple[Dict[int, Tuple[float, float]], Dict[int, List[Tuple[int, float]]]]:
+    """
+    Parse an OSM XML extract into (node coordinates, adjacency with edge seconds).
+    Only ways tagged with a drivable highway class are kept.
+    """
+    coords: Dict[int, Tuple[float, float]] = {}
+    ways: List[Tuple[List[int], float, bool]] = []
+
+    for _, elem in ET.iterparse(osm_path, events=("end",)):
+        if elem.tag == "node":
+            coords[int(elem.get("id"))] = (float(elem.get("lat")), float(elem.get("lon")))
+            elem.clear()
+        elif elem.tag == "way":
+            tags = {t.get("k"): t.get("v") for t in elem.findall("tag")}
+            speed = HIGHWAY_SPEEDS.get(tags.get("highway"))
+            if speed:
+                refs = [int(nd.get("ref")) for nd in elem.findall("nd")]
+                ways.append((refs, speed, tags.get("oneway") == "yes"))
+            elem.clear()
+
+    graph: Dict[int, List[Tuple[int, float]]] = {}
+    for refs, speed, oneway in ways:
+        for a, b in zip(refs, refs[1:]):
+            if a not in coords or b not in coords:
+                continue
+            seconds = _edge_seconds(*coords[a], *coords[b], speed)
+            graph.setdefault(a, []).append((b, seconds))
+            graph.setdefault(b, [])
+            if not oneway:
+                graph[b].append((a, seconds))
+    return {n: c for n, c in coords.items() if n in graph}, graph
+
+def _cell_representatives(coords: Dict[int, Tuple[float, float]], graph: Dict, precision: int) -> Dict[str, int]:
+    """
+    Pick the best-connected road node in each geohash cell as its representative.
+    """
+    reps: Dict[str, int] = {}
+    for node, (lat, lon) in coords.items():
+        cell = geohash_encode(lat, lon, precision)
+        best = reps.get(cell)
+        if best is None or len(graph[node]) > len(graph[best]):
+            reps[cell] = node
+    return reps
+
+_build_graph: Dict = {}
+_build_targets: Dict[int, int] = {}
+
+def _init_worker(graph: Dict, targets: Dict[int, int]):
+    global _build_graph, _build_targets
+    _build_graph = graph
+    _build_targets = targets
+
+def _dijkstra_row(source: int) -> np.ndarray:
+    """
+    Shortest travel seconds from one representative node to every other one.
+    Stops as soon as all representatives are settled.
+    """
+    row = np.full(len(_build_targets), UNREACHABLE, dtype=np.uint16)
+    dist = {source: 0.0}
+    heap = [(0.0, source)]
+    remaining = len(_build_targets)
+    settled = set()
+    while heap and remaining:
+        d, node = heapq.heappop(heap)
+        if node in settled:
+            continue
+        settled.add(node)
+        if node in _build_targets:
+            row[_build_targets[node]] = min(int(d), UNREACHABLE - 1)
+            remaining -= 1
+        for nxt, seconds in _build_graph.get(node, ()):
+            nd = d + seconds
+            if nd < dist.get(nxt, float("inf")):
+                dist[nxt] = nd
+                heapq.heappush(heap, (nd, nxt))
+    return row
+
+def build_grid(osm_path: str, precision: int = 6, workers: Optional[int] = None) -> TravelTimeGrid:
+    """
+    Build the all-pairs cell travel-time matrix from a road graph file.
+    """
+    coords, graph = load_road_graph(osm_path)
+    reps = _cell_representatives(coords, graph, precision)
+    cells = sorted(reps)
+    targets = {reps[cell]: i for i, cell in enumerate(cells)}
+    print(f"🚦 Road graph: {len(coords)} nodes, {len(cells)} cells at precision {precision}")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(graph, targets)) as pool:
+        rows = list(pool.map(_dijkstra_row, [reps[cell] for cell in cells], chunksize=8))
+
+    return TravelTimeGrid(cells, np.vstack(rows), precision)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the geohash travel-time grid from an OSM extract.")
+    parser.add_argument("osm", help="OpenStreetMap XML extract (.osm)")
+    parser.add_argument("output", nargs="?", default=TRAVEL_TIME_GRID)
+    parser.add_argument("--precision", type=int, default=6, help="Geohash length (6 is ~1.2 x 0.6 km)")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    grid = build_grid(args.osm, args.precision, args.workers)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    grid.save(args.output)
+    print(f"✅ Saved {grid.seconds.shape[0]}x{grid.seconds.shape[1]} grid to {args.output}")
@@ -1,7 +1,18 @@
 from typing import List, Dict, Any
 import datetime
+import re
 import urllib.parse
-from fpdf import FPDF
+
+# Compiled once at import; parse_markdown_itinerary runs them on every line.
+# Matches: ### Name, * **Name**, 1. **Name**
+NAME_PATTERN = re.compile(r'^###\s+(.*)|^\*\s+\*\*(.*?)\*\*|^\d+\.\s+\*\*(.*?)\*\*')
+# Matches: *Address*, Address: ...
+ADDRESS_PATTERN = re.compile(r'^\*(.*?)\*|^Address:\s*(.*)', re.IGNORECASE)
+ADDRESS_PREFIX = re.compile(r'^Address:\s*', re.IGNORECASE)
+# Matches: 🕒 ..., Time: ..., 10:00 AM - ...
+TIME_PATTERN = re.compile(r'(?:🕒|Time:)\s*(.*)|(\d{1,2}:\d{2}\s*[AP]M\s*-\s*\d{1,2}:\d{2}\s*[AP]M)', re.IGNORECASE)
+
+GENERIC_HEADERS = {'itinerary', 'mini-itinerary', 'shopping', 'restaurants', 'activities'}
 
 def parse_time_to_ics_format(time_str: str) -> str:
     """
@@ -20,8 +31,6 @@ def parse_time_to_ics_format(time_str: str) -> str:
     except ValueError:
         return ""
 
-import re
-
 def parse_markdown_itinerary(markdown_text: str) -> tuple[List[Dict[str, str]], str]:
     """
     Parse the markdown itinerary to extract structured data and the summary.
@@ -54,14 +63,13 @@ def parse_markdown_itinerary(markdown_text: str) -> tuple[List[Dict[str, str]],
             continue
             
         # Check for Name (Strict Header or Bullet Point)
-        # Matches: ### Name, * **Name**, 1. **Name**
-        name_match = re.search(r'^###\s+(.*)|^\*\s+\*\*(.*?)\*\*|^\d+\.\s+\*\*(.*?)\*\*', line)
+        name_match = NAME_PATTERN.search(line)
         if name_match:
             # Extract name from whichever group matched
             potential_name = next((g for g in name_match.groups() if g), "").strip()
             
             # Ignore generic headers or summary sections
-            if potential_name.lower() in ['itinerary', 'mini-itinerary', 'shopping', 'restaurants', 'activities'] or 'summary' in potential_name.lower():
+            if potential_name.lower() in GENERIC_HEADERS or 'summary' in potential_name.lower():
                 continue
                 
             # If we have a previous item with at least a name, save it
@@ -73,8 +81,7 @@ def parse_markdown_itinerary(markdown_text: str) -> tuple[List[Dict[str, str]],
             continue
             
         # Check for Address
-        # Matches: *Address*, Address: ...
-        address_match = re.search(r'^\*(.*?)\*|^Address:\s*(.*)', line, re.IGNORECASE)
+        address_match = ADDRESS_PATTERN.search(line)
         if address_match:
              extracted_addr = ""
              for group in address_match.groups():
@@ -83,15 +90,14 @@ def parse_markdown_itinerary(markdown_text: str) -> tuple[List[Dict[str, str]],
                     break
              
              # Clean up "Address:" prefix if captured inside italics
-             extracted_addr = re.sub(r'^Address:\s*', '', extracted_addr, flags=re.IGNORECASE).strip()
+             extracted_addr = ADDRESS_PREFIX.sub('', extracted_addr).strip()
              
              if extracted_addr and not current_item.get('address'):
                  current_item['address'] = extracted_addr
                  continue
 
         # Check for Time
-        # Matches: 🕒 ..., Time: ..., 10:00 AM - ...
-        time_match = re.search(r'(?:🕒|Time:)\s*(.*)|(\d{1,2}:\d{2}\s*[AP]M\s*-\s*\d{1,2}:\d{2}\s*[AP]M)', line, re.IGNORECASE)
+        time_match = TIME_PATTERN.search(line)
         if time_match:
             time_str = ""
             for group in time_match.groups():
@@ -194,6 +200,9 @@ def create_pdf_file(itinerary_items: List[Any], summary: str) -> bytes:
     """
     Create a PDF file for the itinerary.
     """
+    # Imported on first export so app startup does not pay for it.
+    from fpdf import FPDF
+
     pdf = FPDF()
     pdf.add_page()
     pdf.set_font("Arial", size=12)
@@ -0,0 +1,49 @@
+import threading
+import time
+
+from tools.areas import area_centroids
+from tools.http import warm_connections
+from tools.olamaps import AUTOCOMPLETE_URL, preload_reverse_geocode
+from tools.placeindex import OFFLINE_MODE, place_index
+from tools.radius import radius_engine
+from tools.traveltime import get_grid
+
+def _timed(label: str, fn, *args):
+    start = time.perf_counter()
+    try:
+        fn(*args)
+        print(f"🔥 Warm-up: {label} ({(time.perf_counter() - start) * 1000:.0f} ms)")
+    except Exception as e:
+        print(f"⚠️ Warm-up step '{label}' failed: {e}")
+
+def _load_pdf_library():
+    import fpdf
+
+def _load_agent_stack():
+    from agent import load_agent_stack
+    load_agent_stack()
+
+def warm_up():
+    """
+    Pay one-off startup costs before the first plan request: open pooled
+    connections to Ola Maps, load the on-disk caches and place index,
+    import the lazily loaded agent stack and PDF library, and preload area
+    reverse geocodes. Network steps are skipped in OFFLINE_MODE.
+    """
+    if not OFFLINE_MODE:
+        _timed("Ola Maps connection", warm_connections, [AUTOCOMPLETE_URL])
+    _timed("travel-time grid", get_grid)
+    _timed("radius stats", radius_engine.load)
+    _timed("place index", place_index.load)
+    _timed("agent stack", _load_agent_stack)
+    _timed("PDF library", _load_pdf_library)
+    if not OFFLINE_MODE:
+        _timed("area reverse geocodes", preload_reverse_geocode, list(area_centroids().values()))
+
+def start_warm_up() -> threading.Thread:
+    """
+    Run warm_up in a daemon thread so the UI can render meanwhile.
+    """
+    thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+    thread.start()
+    return thread